@@ -14,10 +14,12 @@ from mesa import Agent, Model
 from mesa.time import RandomActivation
 import random
 import matplotlib.pyplot as plt
-from mesa.space import MultiGrid
+from torusGrid import TorusGrid
 import numpy as np
 from mesa.datacollection import DataCollector
 import pandas as pd
+from arrayCollector import ArrayDataCollector
+import checkpoint as ckpt
 
 
 class MoneyAgent(Agent):
@@ -39,13 +41,15 @@ class MoneyAgent(Agent):
             self.pos,
             moore=True,
             include_center=False)
-        new_position = random.choice(possible_steps)
+        new_position = self.random.choice(possible_steps)
         self.model.grid.move_agent(self, new_position)
         
     def give_money(self):
-        cellmates = self.model.grid.get_cell_list_contents([self.pos])
+        cellmates = self.model.grid.cell_contents(self.pos)
         if len(cellmates) > 1:
-            other = random.choice(cellmates)
+            other = self.random.choice(cellmates)
+            if other is not self:
+                self.model.histogram.transfer(self.wealth, other.wealth)
             other.wealth += 1
             self.wealth -= 1
 
@@ -55,33 +59,163 @@ def compute_gini(model):
     N = model.num_agents
     B = sum( xi * (N-i) for i,xi in enumerate(x) ) / (N*sum(x))
     return (1 + (1/N) - 2*B)
-                
+
+
+def gini_from_counts(counts):
+    """Gini of integer wealth from counts[w] = number of agents with wealth w.
+
+    Same result as compute_gini in O(max wealth): the agents with wealth w
+    take the sorted positions s..s+c-1, their weights N-i sum up to
+    c*(N-s) - c*(c-1)/2. All sums are exact integers like in compute_gini.
+    """
+    counts = np.asarray(counts, dtype=np.int64)
+    w = np.arange(len(counts), dtype=np.int64)
+    N = int(counts.sum())
+    s = np.cumsum(counts) - counts
+    B = int(np.sum(w * (counts * (N - s) - counts * (counts - 1) // 2))) / (N * int(np.sum(w * counts)))
+    return (1 + (1/N) - 2*B)
+
+
+def compute_gini_bincount(model):
+    """Vectorized compute_gini for any model with agents carrying a wealth."""
+    wealth = np.array([agent.wealth for agent in model.schedule.agents])
+    if np.issubdtype(wealth.dtype, np.integer) and wealth.min() >= 0:
+        return gini_from_counts(np.bincount(wealth))
+    return compute_gini(model)
+
+
+def compute_gini_histogram(model):
+    """Gini from the wealth histogram kept up to date by give_money."""
+    return model.histogram.gini()
+
+
+class WealthHistogram():
+    """Number of agents per wealth, updated on every transfer."""
+    def __init__(self, wealth):
+        self.counts = np.bincount(np.asarray(wealth, dtype=np.int64), minlength=2)
+        self.max_wealth = int(np.flatnonzero(self.counts)[-1]) if self.counts.any() else 0
+
+    def transfer(self, giver, receiver):
+        '''One unit from an agent with wealth giver to one with wealth receiver.'''
+        if receiver + 1 >= len(self.counts):
+            self.counts = np.concatenate([self.counts, np.zeros(len(self.counts), dtype=self.counts.dtype)])
+        self.counts[giver] -= 1
+        self.counts[giver - 1] += 1
+        self.counts[receiver] -= 1
+        self.counts[receiver + 1] += 1
+        self.max_wealth = max(self.max_wealth, receiver + 1)
+        while self.max_wealth > 0 and self.counts[self.max_wealth] == 0:
+            self.max_wealth -= 1
+
+    def gini(self):
+        return gini_from_counts(self.counts[:self.max_wealth + 1])
+
+
+def columnar_collector(interval=1, path=None, chunk=None):
+    """ArrayDataCollector with the reporters of MoneyModel (Gini, Wealth)."""
+    return ArrayDataCollector(model_reporters={"Gini": compute_gini_histogram},
+                              agent_reporters={"Wealth": "wealth"},
+                              interval=interval, chunk=chunk, path=path,
+                              dtypes={"Wealth": np.int64})
+
+
+def collector_state(collector):
+    """Checkpoint state of a data collector (mesa's DataCollector: model variables only)."""
+    if isinstance(collector, ArrayDataCollector):
+        arrays, meta = collector.state()
+        return arrays, dict(meta, kind='array')
+    return {name: np.asarray(values) for name, values in collector.model_vars.items()}, {'kind': 'mesa'}
+
+
+def restore_collector(collector, arrays, meta):
+    """Continue a data collector from collector_state."""
+    if meta['kind'] == 'array':
+        collector.restore(arrays, meta)
+    else:
+        for name in collector.model_vars:
+            collector.model_vars[name] = arrays[name].tolist() if name in arrays else []
+
 
 class MoneyModel(Model):
     """A model with some number of agents."""
-    def __init__(self, N, width, height):
+    def __init__(self, N, width, height, datacollector=None, seed=None, checkpoint=None):
+        # own RNG per model (mesa sets Model.random on the class): runs are
+        # reproducible from the seed and independent of other models
+        self.random = random.Random(seed)
         self.num_agents = N
         self.schedule = RandomActivation(self)
-        self.grid = MultiGrid(width, height, True)
+        self.grid = TorusGrid(width, height)
         # self.num = 1
         # Create agents
         for i in range(self.num_agents):
             a = MoneyAgent(i, self)
             self.schedule.add(a)
-            x = random.randrange(self.grid.width)
-            y = random.randrange(self.grid.height)
+            x = self.random.randrange(self.grid.width)
+            y = self.random.randrange(self.grid.height)
             self.grid.place_agent(a, (x, y))
+        self.histogram = WealthHistogram([a.wealth for a in self.schedule.agents])
         
-        self.datacollector = DataCollector(
-                model_reporters={"Gini": compute_gini},  # A function to call
+        if datacollector is None:
+            datacollector = DataCollector(
+                model_reporters={"Gini": compute_gini_histogram},  # A function to call
                 agent_reporters={"Wealth": "wealth"})  # An agent attribute
+        self.datacollector = datacollector
+        # checkpoint.Checkpointer that saves the model every interval steps (or None)
+        self.checkpoint = checkpoint
             
     def step(self):
         '''Advance the model by one step.'''
         # print('run %.0f' %self.num)
         self.datacollector.collect(self)
         self.schedule.step()
+        if self.checkpoint is not None:
+            self.checkpoint.tick(self.checkpoint_state)
         # self.num += 1
+
+    def checkpoint_state(self):
+        '''Positions, wealth, RNG and step counter as (arrays, meta) for checkpoint.save.
+
+        With mesa's DataCollector only the model variables are kept, agent
+        variables of long runs belong in columnar_collector(path=...).
+        '''
+        agents = self.schedule.agents
+        cells, order = self.grid.cell_order(agents)
+        version, mt, gauss = self.random.getstate()
+        arrays = {'cell': ckpt.compact(cells),
+                  'order': ckpt.compact(order),
+                  'wealth': ckpt.compact(np.fromiter((a.wealth for a in agents), np.int64, len(agents))),
+                  'mt': np.array(mt, dtype=np.uint32)}
+        collected, meta = collector_state(self.datacollector)
+        arrays.update({'collector/' + name: values for name, values in collected.items()})
+        return arrays, {'model': 'MoneyModel', 'N': self.num_agents,
+                        'width': self.grid.width, 'height': self.grid.height,
+                        'steps': self.schedule.steps, 'time': self.schedule.time,
+                        'rng': [version, gauss], 'collector': meta}
+
+    def restore_state(self, arrays, meta):
+        '''Continue from checkpoint_state: the next step is the same as in the saved run.'''
+        if (meta['N'], meta['width'], meta['height']) != (self.num_agents, self.grid.width, self.grid.height):
+            raise ValueError('Checkpoint of a model with %i agents on %ix%i' % (meta['N'], meta['width'], meta['height']))
+        agents = self.schedule.agents
+        for agent, wealth in zip(agents, arrays['wealth'].tolist()):
+            agent.wealth = wealth
+        self.grid.set_positions(agents, arrays['cell'], arrays['order'])
+        self.histogram = WealthHistogram(arrays['wealth'])
+        version, gauss = meta['rng']
+        self.random.setstate((version, tuple(arrays['mt'].tolist()), gauss))
+        self.schedule.steps = meta['steps']
+        self.schedule.time = meta['time']
+        restore_collector(self.datacollector,
+                          {name[len('collector/'):]: a for name, a in arrays.items() if name.startswith('collector/')},
+                          meta['collector'])
+
+    @classmethod
+    def resume(cls, path, datacollector=None, checkpoint=None):
+        '''Model from a checkpoint file (the data collector must match the saved one).'''
+        arrays, meta = ckpt.load(path)
+        model = cls(meta['N'], meta['width'], meta['height'], datacollector=datacollector, checkpoint=checkpoint)
+        model.restore_state(arrays, meta)
+        return model
         
 
         
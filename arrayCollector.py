@@ -0,0 +1,205 @@
+#-----------------------------------------------------------------------------
+#
+# Columnar data collection for (array based) Mesa models
+#
+# 17.10.2026
+#
+# Christian Rieke
+#
+#-----------------------------------------------------------------------------
+
+
+# ArrayDataCollector replaces mesa's DataCollector for long runs: every
+# variable is written into a preallocated typed buffer (chunk samples, for
+# agent variables chunk x agents), only every interval-th step is sampled.
+# Full buffers are flushed either to memory or, with a path, appended to
+# one raw file per variable (path/<name>.bin, layout in path/meta.json), so
+# RAM stays bounded by the buffer size. Stored runs are opened lazily as
+# np.memmap (load_collection). For checkpoints the collector reports its
+# counters (state) and continues from them (restore): files on disk are
+# cut back to the checkpoint, so samples written after it are not doubled.
+import os
+import json
+import numpy as np
+import pandas as pd
+
+
+class ArrayDataCollector:
+    """Data collector with typed, preallocated buffers and optional disk streaming."""
+    def __init__(self, model_reporters=None, agent_reporters=None, interval=1, chunk=None, path=None,
+                 dtypes=None, buffer_size=2**26):
+        # model_reporters: {name: function(model) -> scalar}
+        # agent_reporters: {name: agent attribute or function(model) -> array over all agents}
+        # chunk: samples per buffer, by default as many as fit into buffer_size bytes
+        self.model_reporters = model_reporters or {}
+        self.agent_reporters = agent_reporters or {}
+        self.interval = interval
+        self.chunk = chunk
+        self.buffer_size = buffer_size
+        self.path = path
+        self.dtypes = {name: np.dtype(dtype).str for name, dtype in (dtypes or {}).items()}
+        self.calls = 0                  # calls of collect (steps)
+        self.flushed = 0                # samples flushed (memory or disk)
+        self.rows = 0                   # samples in the buffers
+        self.num_agents = None
+        self.agent_ids = None
+        self.buffers = None
+        self.chunks = []                # flushed buffers without path
+        if path is not None:
+            os.makedirs(path, exist_ok=True)
+
+    def _agent_values(self, model, reporter):
+        if callable(reporter):
+            return np.asarray(reporter(model))
+        return np.array([getattr(agent, reporter) for agent in model.schedule.agents])
+
+    def _allocate(self, model, values):
+        '''Buffers and dtypes from the first sample.'''
+        agents = {name: v for name, v in values.items() if name in self.agent_reporters}
+        self.num_agents = len(next(iter(agents.values()))) if agents else 0
+        if hasattr(model, 'schedule'):
+            self.agent_ids = np.array([agent.unique_id for agent in model.schedule.agents])
+        else:
+            self.agent_ids = np.arange(self.num_agents)
+        for name, v in values.items():
+            self.dtypes.setdefault(name, np.asarray(v).dtype.str)
+        self.dtypes['Step'] = np.dtype(np.int64).str
+        if self.chunk is None:
+            row = sum(np.dtype(self.dtypes[name]).itemsize * (self.num_agents if name in self.agent_reporters else 1)
+                      for name in values) + 8
+            self.chunk = max(1, min(4096, self.buffer_size // row))
+        self.buffers = {'Step': np.empty(self.chunk, dtype=np.int64)}
+        for name in self.model_reporters:
+            self.buffers[name] = np.empty(self.chunk, dtype=self.dtypes[name])
+        for name in self.agent_reporters:
+            self.buffers[name] = np.empty((self.chunk, self.num_agents), dtype=self.dtypes[name])
+        if self.path is not None and self.flushed == 0:
+            # a new collection replaces files of an earlier run in the same path
+            for name in self.buffers:
+                open(os.path.join(self.path, name + '.bin'), 'wb').close()
+            np.save(os.path.join(self.path, 'agent_ids.npy'), self.agent_ids)
+
+    def collect(self, model):
+        '''Record all variables of the current step (every interval-th call).'''
+        step = self.calls
+        self.calls += 1
+        if step % self.interval != 0:
+            return
+        values = {name: reporter(model) for name, reporter in self.model_reporters.items()}
+        values.update({name: self._agent_values(model, reporter) for name, reporter in self.agent_reporters.items()})
+        if self.buffers is None:
+            self._allocate(model, values)
+        self.buffers['Step'][self.rows] = step
+        for name, v in values.items():
+            if name in self.agent_reporters and len(v) != self.num_agents:
+                raise ValueError('Number of agents changed from %i to %i' % (self.num_agents, len(v)))
+            self.buffers[name][self.rows] = v
+        self.rows += 1
+        if self.rows == self.chunk:
+            self.flush()
+
+    def flush(self):
+        '''Move the buffered samples to memory or append them to the files.'''
+        if self.rows == 0:
+            return
+        if self.path is None:
+            self.chunks.append({name: buffer[:self.rows].copy() for name, buffer in self.buffers.items()})
+        else:
+            for name, buffer in self.buffers.items():
+                with open(os.path.join(self.path, name + '.bin'), 'ab') as f:
+                    f.write(buffer[:self.rows].tobytes())
+        self.flushed += self.rows
+        self.rows = 0
+        if self.path is not None:
+            self._write_meta()
+
+    def _write_meta(self):
+        meta = {'rows': self.flushed,
+                'num_agents': self.num_agents,
+                'interval': self.interval,
+                'dtypes': self.dtypes,
+                'model_vars': list(self.model_reporters),
+                'agent_vars': list(self.agent_reporters)}
+        with open(os.path.join(self.path, 'meta.json'), 'w') as f:
+            json.dump(meta, f)
+
+    def _column(self, name):
+        '''All samples of a variable (memmap for flushed data on disk).'''
+        buffered = self.buffers[name][:self.rows] if self.buffers is not None else None
+        if self.path is not None:
+            shape = (self.flushed, self.num_agents) if name in self.agent_reporters else (self.flushed,)
+            stored = np.memmap(os.path.join(self.path, name + '.bin'), dtype=self.dtypes[name], mode='r',
+                               shape=shape) if self.flushed > 0 else None
+        else:
+            stored = np.concatenate([chunk[name] for chunk in self.chunks]) if self.chunks else None
+        if stored is None:
+            return buffered if buffered is not None else np.empty(0)
+        if buffered is None or len(buffered) == 0:
+            return stored
+        return np.concatenate([stored, buffered])
+
+    def state(self):
+        '''Counters (without path also the samples) for a checkpoint, flushes the buffers.'''
+        self.flush()
+        meta = {'calls': self.calls, 'flushed': self.flushed, 'num_agents': self.num_agents,
+                'chunk': self.chunk, 'dtypes': self.dtypes}
+        arrays = {}
+        if self.agent_ids is not None:
+            arrays['agent_ids'] = self.agent_ids
+        if self.path is None and self.flushed > 0:
+            arrays.update({name: self._column(name) for name in self.chunks[0]})
+        return arrays, meta
+
+    def restore(self, arrays, meta):
+        '''Continue a collection from state() (files on disk are cut back to the checkpoint).'''
+        self.calls = meta['calls']
+        self.flushed = meta['flushed']
+        self.num_agents = meta['num_agents']
+        self.chunk = meta['chunk']
+        self.dtypes.update(meta['dtypes'])
+        self.agent_ids = arrays.get('agent_ids')
+        self.buffers = None
+        self.rows = 0
+        self.chunks = []
+        if self.path is None:
+            if self.flushed > 0:
+                names = ['Step'] + list(self.model_reporters) + list(self.agent_reporters)
+                self.chunks.append({name: np.array(arrays[name]) for name in names})
+        elif self.flushed > 0:
+            for name in ['Step'] + list(self.model_reporters) + list(self.agent_reporters):
+                width = self.num_agents if name in self.agent_reporters else 1
+                os.truncate(os.path.join(self.path, name + '.bin'),
+                            self.flushed * width * np.dtype(self.dtypes[name]).itemsize)
+            self._write_meta()
+
+    def get_steps(self):
+        return self._column('Step')
+
+    def get_agent_vars(self, name):
+        '''Samples x agents array of an agent variable.'''
+        return self._column(name)
+
+    def get_model_vars_dataframe(self):
+        return pd.DataFrame({name: self._column(name) for name in self.model_reporters},
+                            index=pd.Index(self.get_steps(), name='Step'))
+
+    def get_agent_vars_dataframe(self):
+        '''Long format like mesa (index Step, AgentID), loads all samples into memory.'''
+        steps = self.get_steps()
+        index = pd.MultiIndex.from_arrays([np.repeat(steps, self.num_agents),
+                                           np.tile(self.agent_ids, len(steps))], names=['Step', 'AgentID'])
+        return pd.DataFrame({name: np.asarray(self._column(name)).ravel() for name in self.agent_reporters},
+                            index=index)
+
+
+def load_collection(path):
+    '''Open a stored collection lazily (agent variables as np.memmap).'''
+    with open(os.path.join(path, 'meta.json')) as f:
+        meta = json.load(f)
+    collector = ArrayDataCollector(model_reporters=dict.fromkeys(meta['model_vars']),
+                                   agent_reporters=dict.fromkeys(meta['agent_vars']),
+                                   interval=meta['interval'], path=path, dtypes=meta['dtypes'])
+    collector.flushed = meta['rows']
+    collector.num_agents = meta['num_agents']
+    collector.agent_ids = np.load(os.path.join(path, 'agent_ids.npy'))
+    return collector
@@ -0,0 +1,361 @@
+#-----------------------------------------------------------------------------
+#
+# Autor: Christian Rieke
+# Datum: 17.10.2026
+#
+# Beschreibung: Benchmarks für die Portfoliooptimierung
+#
+#               syntheticPortfolio erzeugt parametrische Portfolios
+#               (konv. Kraftwerke, Speicher, Horizont, Zeitschrittweite).
+#               runSuite misst Portfolios (Aufbau, Lösung, Ergebnisabfrage)
+#               und MoneyModel-Konfigurationen (Agenten, Gitter, Schritte:
+#               Aufbau, step, collect) inkl. Spitzenspeicher. Ergebnisse
+#               werden als JSON abgelegt und mit einer Baseline verglichen.
+#
+#               benchReduction vergleicht die Zeitreihenaggregation
+#               (repräsentative Perioden, Segmente) mit dem vollen Modell.
+#
+#               python benchmark.py --save results.json --baseline baseline.json
+#
+# Letzte Änderung:
+#
+#           17.10.2026  Vergleich paarweise/kompakte Lauf-/Stillstandszeiten
+#           17.10.2026  Benchmark-Suite mit Baseline-Vergleich
+#           17.10.2026  Lösungs- und Abfragezeit aus der Telemetrie des Portfolios
+#           17.10.2026  Fehler der Zeitreihenaggregation gegenüber dem vollen Modell
+#           17.10.2026  Synthetische Kraftwerke können anfahren (Gradient >= powerMin), teils laufend zu Beginn
+#           17.10.2026  Schaltvorgänge je Portfoliofall (Kraftwerkseinsatz in der Suite)
+#           17.10.2026  Verletzungen und Neueinsatz der zurückgeführten Fahrpläne (benchReduction)
+#           17.10.2026  Suite standardmäßig mit HiGHS, Abbruch wenn ein Portfoliofall nicht optimal gelöst wird
+#
+#-----------------------------------------------------------------------------
+
+# Laden der Abhängigkeiten
+import sys
+import copy
+import json
+import time
+import argparse
+import platform
+import tracemalloc
+import numpy as np
+import pandas as pd
+import solverBackend as sb
+import portfolioReduce as pr
+from portfolioOpt import powerPlantPortfolio
+from Mesa_Tutorial import MoneyModel
+
+
+def syntheticPortfolio(nConv, nStorage, T, dt=0.25, seed=0): # Zufälliges Portfolio mit passenden Preiszeitreihen
+
+    rng = np.random.default_rng(seed)
+    hours = np.arange(T) * dt
+    # Preise: Tagesgang + Rauschen
+    prices = {'power'   : 40 + 20 * np.sin(2 * np.pi * (hours - 8) / 24) + rng.normal(0, 5, T),
+              'co'      : 20 + rng.normal(0, 1, T),
+              'gas'     : 25 + rng.normal(0, 2, T),
+              'lignite' : 5,
+              'coal'    : 10,
+              'nuc'     : 3}
+
+    powerPlants = []
+    for k in range(nConv):
+        fuel = rng.choice(['lignite', 'coal', 'gas', 'nuc'])
+        powerMax = float(rng.integers(100, 1000))
+        powerMin = round(powerMax * rng.uniform(0.2, 0.4))
+        running = k % 2 == 1                            # jedes zweite Kraftwerk läuft zu Beginn
+        # Gradienten mindestens powerMin, sonst kann das Kraftwerk nie anfahren (wie plantDatabase.fleetRecords)
+        powerPlants.append({'typ'        :   'konv',
+                            'name'       :   'K%i' % k,
+                            'fuel'       :   fuel,
+                            'powerMax'   :   powerMax,
+                            'powerMin'   :   powerMin,
+                            'eta'        :   rng.uniform(0.3, 0.6),
+                            'chi'        :   {'lignite': 0.4, 'coal': 0.34, 'gas': 0.2, 'nuc': 0.0}[fuel],
+                            'grad+'      :   max(round(powerMax * rng.uniform(0.2, 0.5) * dt), powerMin),
+                            'grad-'      :   max(round(powerMax * rng.uniform(0.2, 0.5) * dt), powerMin),
+                            'stopTime'   :   int(rng.integers(2, 12) / dt),
+                            'runTime'    :   int(rng.integers(2, 12) / dt),
+                            'P0'         :   round((powerMin + powerMax) / 2) if running else 0,
+                            'on'         :   int(12 / dt) if running else -int(12 / dt),
+                            'heat'       :   []})
+    for k in range(nStorage):
+        pMax = float(rng.integers(50, 500))
+        powerPlants.append({'typ'        :   'storage',
+                            'name'       :   'S%i' % k,
+                            'VMax'       :   pMax * 6,
+                            'VMin'       :   pMax * 0.5,
+                            'P+_Max'     :   pMax,
+                            'P+_Min'     :   round(pMax * 0.1),
+                            'P-_Max'     :   pMax,
+                            'P-_Min'     :   0,
+                            'eta+'       :   0.85,
+                            'eta-'       :   0.85,
+                            'grad++'     :   round(pMax * 0.5),
+                            'grad+-'     :   round(pMax * 0.5),
+                            'grad-+'     :   round(pMax * 0.5),
+                            'grad--'     :   round(pMax * 0.5),
+                            'P+0'        :   0,
+                            'P-0'        :   0,
+                            'V0'         :   pMax * 3})
+
+    return powerPlants, prices
+
+
+def modelSize(problem): # Modellgröße des Gesamtproblems
+
+    return {'rows'     : problem['A'].shape[0],
+            'cols'     : problem['A'].shape[1],
+            'nonzeros' : problem['A'].nnz,
+            'binaries' : int(np.sum(problem['vtype'] == 'B'))}
+
+
+def benchMinUpDown(nConv=10, nStorage=0, T=96, dt=0.25, backend='gurobi', seed=0):
+    # Vergleich paarweise und kompakte Lauf-/Stillstandszeiten: Aufbauzeit, Modellgröße, LP-Schranke, MIP-Lösungszeit
+
+    powerPlants, prices = syntheticPortfolio(nConv, nStorage, T, dt, seed)
+    rows = []
+    for compact in (False, True):
+        pf = powerPlantPortfolio(dt=dt, backend=backend, compact=compact)
+        pf.setPrices(prices['power'], prices['co'], prices['gas'], prices['lignite'], prices['coal'], prices['nuc'])
+        for powerPlant in powerPlants:
+            pf.addPowerPlant(powerPlant)
+        start = time.perf_counter()
+        pf.buildModel()
+        build = time.perf_counter() - start
+        # LP-Relaxation (Güte der Formulierung)
+        relaxed = sb.highsBackend(dict(pf.problem, vtype=np.full(pf.problem['A'].shape[1], 'C')))
+        relaxed.optimize()
+        start = time.perf_counter()
+        pf.backend.optimize()
+        solve = time.perf_counter() - start
+        row = {'formulation' : 'compact' if compact else 'pairwise',
+               'build'       : build,
+               'solve'       : solve,
+               'objective'   : pf.backend.objVal,
+               'lpBound'     : relaxed.objVal}
+        row.update(modelSize(pf.problem))
+        rows.append(row)
+
+    return pd.DataFrame(rows).set_index('formulation')
+
+
+def benchReduction(nConv=4, nStorage=2, days=28, dt=1.0, backend='gurobi', periodHours=24,
+                   reductions=((4, 1), (4, 3), (7, 1), (7, 3)), seed=0):
+    # Volles Modell gegen repräsentative Perioden (Anzahl, max. Segmentlänge) je Reduktion:
+    # Größe, Zeiten, Zielfunktionswert (reduziert und in voller Auflösung bewertet), Fehler,
+    # Verletzungen des zurückgeführten Fahrplans (bewertet wird der Neueinsatz, wenn repaired)
+
+    T = int(days * 24 / dt)
+    powerPlants, prices = syntheticPortfolio(nConv, nStorage, T, dt, seed)
+    pf = powerPlantPortfolio(dt=dt, backend=backend, compact=True)
+    pf.setPrices(prices['power'], prices['co'], prices['gas'], prices['lignite'], prices['coal'], prices['nuc'])
+    for powerPlant in powerPlants:
+        pf.addPowerPlant(powerPlant)
+    # Reduzierte Modelle zuerst (die Optimierung setzt die Startzustände des Portfolios auf das Ende des Horizonts)
+    reduced = [pr.solveReduced(pf, int(periodHours / dt), periods, maxLength, seed=seed)
+               for periods, maxLength in reductions]
+    initial = copy.deepcopy(pf.results)
+    start = time.perf_counter()
+    pf.buildModel()
+    build = time.perf_counter() - start
+    if not pf.runOpt(plot=False):
+        raise RuntimeError('Volles Modell ohne optimale Lösung')
+    full = pf.backend.objVal
+    power = pf.schedule['P'].groupby(level='t').sum().to_numpy()
+    # Startzustände für die Prüfung der Fahrpläne wieder auf den Anfang des Horizonts
+    pf.results = initial
+    rows = [{'reduction' : 'full',
+             'T'         : T,
+             'rows'      : pf.problem['A'].shape[0],
+             'cols'      : pf.problem['A'].shape[1],
+             'build'     : build,
+             'solve'     : pf.telemetry.last('solve'),
+             'objective' : full,
+             'evaluated' : full}]
+    for (periods, maxLength), result in zip(reductions, reduced):
+        P = result['schedule']['P'].groupby(level='t').sum().to_numpy()
+        rows.append({'reduction'      : '%i periods, segments <= %i' % (periods, maxLength),
+                     'T'              : result['T'],
+                     'rows'           : result['rows'],
+                     'cols'           : result['cols'],
+                     'build'          : result['build'],
+                     'solve'          : result['solve'],
+                     'repair'         : result['repair'],
+                     'violations'     : len(result['violations']),
+                     'repaired'       : result['repaired'],
+                     'objective'      : result['objective'],
+                     'evaluated'      : result['evaluated'],
+                     'objectiveError' : (result['objective'] - full) / abs(full),
+                     'evaluatedError' : (result['evaluated'] - full) / abs(full),
+                     'powerError'     : np.sqrt(np.mean((P - power) ** 2)) / max(np.mean(np.abs(power)), 1e-9)})
+
+    return pd.DataFrame(rows).set_index('reduction')
+
+
+# Standardfälle (Name: Parameter)
+portfolioCases = {'small'  : {'nConv' : 5,  'nStorage' : 1, 'T' : 96,  'dt' : 0.25},
+                  'medium' : {'nConv' : 20, 'nStorage' : 4, 'T' : 96,  'dt' : 0.25},
+                  'long'   : {'nConv' : 20, 'nStorage' : 4, 'T' : 384, 'dt' : 0.25}}
+moneyCases = {'tutorial' : {'N' : 75,   'width' : 10, 'height' : 10, 'steps' : 100},
+              'medium'   : {'N' : 1000, 'width' : 50, 'height' : 50, 'steps' : 100},
+              'large'    : {'N' : 5000, 'width' : 100, 'height' : 100, 'steps' : 50}}
+quickCases = (['small'], ['tutorial'])
+timeColumns = ['build', 'solve', 'extract', 'step', 'collect']
+
+
+def benchPortfolio(nConv, nStorage, T, dt=0.25, backend='highs', compact=True, seed=0):
+    # Zeiten für Aufbau (Kraftwerke + Modell), Lösung und Ergebnisabfrage eines synthetischen Portfolios
+
+    powerPlants, prices = syntheticPortfolio(nConv, nStorage, T, dt, seed)
+    start = time.perf_counter()
+    pf = powerPlantPortfolio(dt=dt, backend=backend, compact=compact)
+    pf.setPrices(prices['power'], prices['co'], prices['gas'], prices['lignite'], prices['coal'], prices['nuc'])
+    for powerPlant in powerPlants:
+        pf.addPowerPlant(powerPlant)
+    pf.buildModel()
+    times = {'build' : time.perf_counter() - start}
+    # ohne optimale Lösung wären Zeiten und Kennzahlen die eines Fehlschlags (z.B. Größenlimit der Lizenz)
+    if not pf.runOpt(plot=False):
+        raise RuntimeError('Portfolio (%i konv., %i Speicher, T=%i, %s) ohne optimale Lösung (Status %s)'
+                           % (nConv, nStorage, T, backend, pf.telemetry.counters.get('status')))
+    times['solve'] = pf.telemetry.last('solve')
+    times['extract'] = pf.telemetry.last('extract')
+    times['objective'] = pf.backend.objVal
+    # An- und Abfahrvorgänge der konv. Kraftwerke: 0 hieße, der Fall prüft keinen Kraftwerkseinsatz (Binärvariablen)
+    # (gegen den Startzustand, ein Anfahren im ersten Zeitschritt zählt mit)
+    conv = [p for p in powerPlants if p['typ'] == 'konv']
+    on = pf.schedule['On'].unstack('t').loc[[p['name'] for p in conv]].round().to_numpy()
+    on0 = np.array([[1.0 if p['on'] > 0 else 0.0] for p in conv])
+    times['switches'] = int(np.abs(np.diff(np.hstack([on0, on]), axis=1)).sum())
+    times.update(modelSize(pf.problem))
+
+    return times
+
+
+def benchMoney(N, width, height, steps, seed=0):
+    # Zeiten für Aufbau, Agentenschritte (schedule.step) und Datensammlung (collect) des MoneyModel
+
+    start = time.perf_counter()
+    model = MoneyModel(N, width, height, seed=seed)
+    times = {'build' : time.perf_counter() - start, 'step' : 0.0, 'collect' : 0.0}
+    # wie MoneyModel.step, aber getrennt gemessen
+    for i in range(steps):
+        start = time.perf_counter()
+        model.datacollector.collect(model)
+        times['collect'] += time.perf_counter() - start
+        start = time.perf_counter()
+        model.schedule.step()
+        times['step'] += time.perf_counter() - start
+
+    return times
+
+
+def _measure(bench, kwargs, repeat): # Bestzeit aus repeat Läufen, Spitzenspeicher (Python) aus einem weiteren Lauf
+
+    runs = [bench(**kwargs) for k in range(repeat)]
+    result = dict(runs[0])
+    for column in timeColumns:
+        if column in result:
+            result[column] = min(run[column] for run in runs)
+    tracemalloc.start()
+    try:
+        bench(**kwargs)
+        result['peakMemory'] = tracemalloc.get_traced_memory()[1] / 2**20
+    finally:
+        tracemalloc.stop()
+
+    return result
+
+
+def runSuite(portfolio=None, money=None, backend='highs', repeat=3, seed=0):
+    # Alle Fälle messen (Namen aus portfolioCases/moneyCases, None = alle)
+
+    rows = []
+    for name in (portfolioCases if portfolio is None else portfolio):
+        kwargs = dict(portfolioCases[name], backend=backend, seed=seed)
+        row = {'case' : 'portfolio/' + name}
+        row.update(_measure(benchPortfolio, kwargs, repeat))
+        rows.append(row)
+    for name in (moneyCases if money is None else money):
+        kwargs = dict(moneyCases[name], seed=seed)
+        row = {'case' : 'money/' + name}
+        row.update(_measure(benchMoney, kwargs, repeat))
+        rows.append(row)
+
+    return pd.DataFrame(rows).set_index('case')
+
+
+def saveResults(results, path): # Ergebnisse mit Umgebung als JSON
+
+    data = {'python'   : sys.version.split()[0],
+            'platform' : platform.platform(),
+            'time'     : time.strftime('%Y-%m-%d %H:%M:%S'),
+            'results'  : json.loads(results.reset_index().to_json(orient='records'))}
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2)
+
+    pass
+
+
+def loadResults(path): # Ergebnisse aus einer JSON-Datei (saveResults)
+
+    with open(path) as f:
+        data = json.load(f)
+
+    return pd.DataFrame(data['results']).set_index('case')
+
+
+def compareBaseline(results, baseline, tolerance=0.2, minDelta=0.005):
+    # Verhältnis zur Baseline je Fall und Kennzahl, Regression wenn > 1 + tolerance und absolut > minDelta [s bzw. MB]
+
+    rows = []
+    for case in results.index.intersection(baseline.index):
+        for column in timeColumns + ['peakMemory']:
+            if column not in results.columns or column not in baseline.columns:
+                continue
+            new, old = results.at[case, column], baseline.at[case, column]
+            if pd.isna(new) or pd.isna(old):
+                continue
+            rows.append({'case'       : case,
+                         'metric'     : column,
+                         'baseline'   : old,
+                         'current'    : new,
+                         'ratio'      : new / old if old > 0 else np.inf,
+                         'regression' : bool(new > old * (1 + tolerance) and new - old > minDelta)})
+
+    return pd.DataFrame(rows, columns=['case', 'metric', 'baseline', 'current', 'ratio', 'regression'])
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description='Benchmarks Portfoliooptimierung und MoneyModel')
+    parser.add_argument('--quick', action='store_true', help='nur kleine Fälle')
+    parser.add_argument('--backend', default='highs', help='Solver-Backend (highs, gurobi: Lizenz für große Fälle)')
+    parser.add_argument('--repeat', type=int, default=3, help='Wiederholungen je Fall (Bestzeit)')
+    parser.add_argument('--save', help='Ergebnisse als JSON speichern')
+    parser.add_argument('--baseline', help='Vergleich mit gespeicherten Ergebnissen (JSON)')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='zulässige relative Verschlechterung')
+    parser.add_argument('--minupdown', action='store_true', help='Vergleich paarweise/kompakte Lauf-/Stillstandszeiten')
+    parser.add_argument('--reduction', action='store_true', help='Fehler der Zeitreihenaggregation gegenüber dem vollen Modell')
+    args = parser.parse_args()
+
+    pd.set_option('display.width', 120)
+    if args.minupdown:
+        print(benchMinUpDown(backend=args.backend))
+        sys.exit(0)
+    if args.reduction:
+        print(benchReduction(backend=args.backend))
+        sys.exit(0)
+
+    portfolio, money = quickCases if args.quick else (None, None)
+    results = runSuite(portfolio, money, backend=args.backend, repeat=args.repeat)
+    print(results)
+    if args.save:
+        saveResults(results, args.save)
+    if args.baseline:
+        comparison = compareBaseline(results, loadResults(args.baseline), args.tolerance)
+        print(comparison)
+        if comparison['regression'].any():
+            print('Regression gegenüber %s' % args.baseline)
+            sys.exit(1)
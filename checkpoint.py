@@ -0,0 +1,119 @@
+#-----------------------------------------------------------------------------
+#
+# Binary checkpoints for long model runs
+#
+# 17.10.2026
+#
+# Christian Rieke
+#
+#-----------------------------------------------------------------------------
+
+
+# A checkpoint is one file: magic, header length, JSON header (metadata and
+# name/dtype/shape/offset of every array) and the raw arrays, each aligned
+# to 64 bytes. Writing goes to a temporary file that replaces the old
+# checkpoint in one rename, so a crash while saving leaves the previous
+# checkpoint intact. Loading reads the file in one call and returns
+# writable views, there is no per-element encoding in either direction.
+# Checkpointer saves the state of a model every interval steps; the models
+# provide the state as (arrays, meta) and restore themselves from it.
+import os
+import json
+import time
+import struct
+import numpy as np
+
+MAGIC = b'CKPT0001'
+ALIGN = 64
+
+
+def _aligned(n):
+    return -(-n // ALIGN) * ALIGN
+
+
+def compact(values):
+    """Non-negative integers in the smallest unsigned dtype (positions, wealth)."""
+    values = np.asarray(values)
+    if values.size == 0 or values.min() < 0:
+        return values
+    return values.astype(np.min_scalar_type(values.max()), copy=False)
+
+
+def save(path, arrays, meta=None, sync=False):
+    '''Write arrays and JSON metadata to path (atomic replace).
+
+    sync: fsync before the rename (survives power loss, costs disk latency).
+    '''
+    arrays = {name: np.ascontiguousarray(a) for name, a in arrays.items()}
+    entries = []
+    offset = 0
+    for name, a in arrays.items():
+        entries.append({'name': name, 'dtype': a.dtype.str, 'shape': list(a.shape), 'offset': offset})
+        offset += _aligned(a.nbytes)
+    header = json.dumps({'meta': meta or {}, 'arrays': entries, 'size': offset}).encode()
+    start = _aligned(len(MAGIC) + 8 + len(header))
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<Q', len(header)))
+        f.write(header)
+        f.write(bytes(start - len(MAGIC) - 8 - len(header)))
+        for a in arrays.values():
+            f.write(a.reshape(-1).view(np.uint8))
+            f.write(bytes(_aligned(a.nbytes) - a.nbytes))
+        if sync:
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def load(path):
+    '''Arrays (writable) and metadata of a checkpoint written by save.'''
+    with open(path, 'rb') as f:
+        data = bytearray(os.fstat(f.fileno()).st_size)
+        f.readinto(data)
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError('%s is not a checkpoint' % path)
+    n = struct.unpack('<Q', data[len(MAGIC):len(MAGIC) + 8])[0]
+    header = json.loads(data[len(MAGIC) + 8:len(MAGIC) + 8 + n])
+    start = _aligned(len(MAGIC) + 8 + n)
+    if len(data) < start + header['size']:
+        raise ValueError('Checkpoint %s is truncated' % path)
+    arrays = {}
+    for entry in header['arrays']:
+        count = int(np.prod(entry['shape']))
+        arrays[entry['name']] = np.frombuffer(data, dtype=entry['dtype'], count=count,
+                                              offset=start + entry['offset']).reshape(entry['shape'])
+    return arrays, header['meta']
+
+
+class Checkpointer:
+    """Saves the state of a model every `interval` steps."""
+    def __init__(self, path, interval=100, sync=False):
+        self.path = path
+        self.interval = interval
+        self.sync = sync
+        self.calls = 0                  # steps seen
+        self.saves = 0                  # checkpoints written
+        self.last = np.nan              # duration of the last save [s]
+        self.total = 0.0                # duration of all saves [s]
+
+    def tick(self, state):
+        '''One step done; state() -> (arrays, meta) is only called when a checkpoint is due.'''
+        self.calls += 1
+        if self.calls % self.interval == 0:
+            self.save(state)
+
+    def save(self, state):
+        start = time.perf_counter()
+        arrays, meta = state()
+        save(self.path, arrays, meta, self.sync)
+        self.last = time.perf_counter() - start
+        self.total += self.last
+        self.saves += 1
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def load(self):
+        return load(self.path)
@@ -0,0 +1,177 @@
+#-----------------------------------------------------------------------------
+#
+# Agent based market: traders dispatching their own power plant portfolios
+#
+# 17.10.2026
+#
+# Christian Rieke
+#
+#-----------------------------------------------------------------------------
+
+
+# Every TraderAgent owns a powerPlantPortfolio. One model step is one
+# delivery period (T time steps):
+#   - the agents dispatch their portfolios against the price forecast
+#     (the last market price) and bid the scheduled output of every
+#     conventional plant at its marginal cost, storages bid their
+#     discharge at 0 and add their charging to the demand
+#   - the market clears every time step by merit order against the demand,
+#     the price is the bid of the marginal plant (priceCap if the bids do
+#     not cover the demand)
+#   - the forecast for the next period moves towards the clearing price
+#     (damping), the portfolios keep their end states
+# Agents with the same plant types see the same prices and often start from
+# the same states, so all solves go through one shared solveCache.
+import random
+import numpy as np
+from mesa import Agent, Model
+from mesa.time import BaseScheduler
+from mesa.datacollection import DataCollector
+import portfolioMatrix as pm
+from portfolioOpt import powerPlantPortfolio
+from portfolioCache import solveCache
+from telemetry import log
+
+
+class TraderAgent(Agent):
+    """A trader dispatching its own power plant portfolio."""
+    def __init__(self, unique_id, model, powerPlants):
+        super().__init__(unique_id, model)
+        self.portfolio = powerPlantPortfolio(dt=model.dt, backend=model.backend, compact=True)
+        for powerPlant in powerPlants:
+            self.portfolio.addPowerPlant(powerPlant)
+        self.quantity = None            # bid quantities (bids x T) of the last period
+        self.price = None               # bid prices (bids x T)
+        self.charge = np.zeros(model.T) # additional demand of the storages
+        self.revenue = 0.0              # scheduled output of the last period at the clearing price
+        self.solved = False             # dispatch of the last period optimal (otherwise no bids, no revenue)
+
+    def step(self):
+        '''Dispatch against the forecast and place the bids.'''
+        model = self.model
+        pf = self.portfolio
+        pf.setPrices(model.forecast, model.co, model.gas, model.lignite, model.coal, model.nuc)
+        self.solved = model.cache.solve(pf)
+        if not self.solved:
+            log.warning('Agent %i: keine optimale Lösung, keine Gebote', self.unique_id)
+            self.quantity = np.zeros((0, model.T))
+            self.price = np.zeros((0, model.T))
+            self.charge = np.zeros(model.T)
+            return
+        quantity, price = [], []
+        self.charge = np.zeros(model.T)
+        prices = {'power': model.forecast, 'co': model.co, 'gas': model.gas,
+                  'lignite': model.lignite, 'coal': model.coal, 'nuc': model.nuc}
+        for powerPlant in pf.powerPlants:
+            frame = pf.schedule.loc[powerPlant['name']]
+            if powerPlant['typ'] == 'konv':
+                fuel = pm.fuelPrice(powerPlant, prices, model.T)
+                cost = (fuel / powerPlant['eta'] if fuel is not None else 0) \
+                    + powerPlant['chi'] * np.asarray(model.co, dtype=float)
+                quantity.append(frame['P'].to_numpy())
+                price.append(np.broadcast_to(cost, (model.T,)))
+            else:
+                quantity.append(frame['P-'].to_numpy())
+                price.append(np.zeros(model.T))
+                self.charge += frame['P+'].to_numpy()
+        self.quantity = np.array(quantity).reshape(-1, model.T)
+        self.price = np.array(price).reshape(-1, model.T)
+
+
+def clear(quantity, price, demand, priceCap):
+    """Merit order clearing per time step: clearing price and volume.
+
+    quantity, price: bids x T, demand: T. The price is the bid of the
+    marginal (last accepted) bid, priceCap if the bids do not cover the demand.
+    """
+    order = np.argsort(price, axis=0, kind='stable')
+    q = np.take_along_axis(quantity, order, axis=0)
+    p = np.take_along_axis(price, order, axis=0)
+    supply = np.cumsum(q, axis=0)
+    marginal = np.sum(supply < demand - 1e-9, axis=0)
+    covered = marginal < len(q)
+    t = np.arange(quantity.shape[1])
+    clearing = np.full(quantity.shape[1], float(priceCap))
+    clearing[covered] = p[marginal[covered], t[covered]]
+    volume = np.minimum(supply[-1] if len(q) > 0 else np.zeros_like(demand), demand)
+    return clearing, volume
+
+
+def samplePortfolios(catalogue, agents, size, seed=None):
+    """Portfolios of `size` plant types from the catalogue (plant dicts) for every agent.
+
+    Plants keep the names of the catalogue, agents with the same types have
+    identical portfolios (and share solves in the cache).
+    """
+    rng = random.Random(seed)
+    return [[dict(catalogue[k]) for k in sorted(rng.sample(range(len(catalogue)), size))] for i in range(agents)]
+
+
+class MarketModel(Model):
+    """Traders with own portfolios and an energy-only market with merit order clearing."""
+    def __init__(self, portfolios, demand, forecast, co, gas, lignite, coal, nuc, dt=0.25,
+                 backend='highs', damping=0.5, priceCap=3000.0, cacheSize=256, tol=0.0, seed=None):
+        # portfolios: list of power plant lists (one per agent), demand: T
+        # forecast: initial price forecast (T), co/gas: T or scalar, lignite/coal/nuc: scalar
+        self.random = random.Random(seed)
+        self.T = len(demand)
+        self.dt = dt
+        self.backend = backend
+        self.demand = np.asarray(demand, dtype=float)
+        self.forecast = np.asarray(forecast, dtype=float)
+        self.co = co
+        self.gas = gas
+        self.lignite = lignite
+        self.coal = coal
+        self.nuc = nuc
+        self.damping = damping
+        self.priceCap = priceCap
+        self.cache = solveCache(cacheSize, tol)
+        self.price = self.forecast.copy()     # clearing price of the last period
+        self.volume = np.zeros(self.T)
+        self.schedule = BaseScheduler(self)
+        for i, powerPlants in enumerate(portfolios):
+            self.schedule.add(TraderAgent(i, self, powerPlants))
+        self.datacollector = DataCollector(
+            model_reporters={'Price': lambda m: float(np.mean(m.price)),
+                             'Forecast': lambda m: float(np.mean(m.forecast)),
+                             'Volume': lambda m: float(np.sum(m.volume) * m.dt),
+                             'Shortage': lambda m: int(np.sum(m.price >= m.priceCap)),
+                             'CacheHitRate': lambda m: m.cache.stats()['hitRate']},
+            agent_reporters={'Revenue': 'revenue'})
+
+    def step(self):
+        '''One delivery period: dispatch and bids of all agents, clearing, new forecast.'''
+        self.schedule.step()
+        agents = self.schedule.agents
+        quantity = np.vstack([a.quantity for a in agents])
+        price = np.vstack([a.price for a in agents])
+        demand = self.demand + np.sum([a.charge for a in agents], axis=0)
+        self.price, self.volume = clear(quantity, price, demand, self.priceCap)
+        for a in agents:
+            # like Profit in the portfolio: output (storages: discharge - charge) times price,
+            # nothing without a dispatch (the schedule is still the one of an earlier period)
+            if not a.solved:
+                a.revenue = 0.0
+                continue
+            a.revenue = float(np.sum(a.portfolio.schedule['P'].groupby(level='t').sum().to_numpy() * self.price))
+        self.forecast = (1 - self.damping) * self.forecast + self.damping * self.price
+        self.datacollector.collect(self)
+
+
+if __name__ == '__main__':
+
+    import benchmark
+
+    T = 96
+    catalogue, prices = benchmark.syntheticPortfolio(6, 2, T, seed=0)
+    portfolios = samplePortfolios(catalogue, agents=40, size=3, seed=0)
+    capacity = sum(p['powerMax'] for plants in portfolios for p in plants if p['typ'] == 'konv')
+    hours = np.arange(T) * 0.25
+    demand = capacity * (0.5 + 0.2 * np.sin(2 * np.pi * (hours - 8) / 24))
+    model = MarketModel(portfolios, demand, prices['power'], prices['co'], prices['gas'],
+                        prices['lignite'], prices['coal'], prices['nuc'], seed=0)
+    for i in range(8):
+        model.step()
+    print(model.datacollector.get_model_vars_dataframe())
+    print(model.cache.stats())
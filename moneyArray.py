@@ -0,0 +1,220 @@
+#-----------------------------------------------------------------------------
+#
+# Array based MoneyModel (vectorized engine for Mesa_Tutorial.MoneyModel)
+#
+# 17.10.2026
+#
+# Christian Rieke
+#
+#-----------------------------------------------------------------------------
+
+
+# Positions and wealth of all agents are NumPy arrays, one step moves all
+# agents at once and resolves the cellmate transfers in batches. The
+# result has the same distribution as the reference model
+# (RandomActivation, torus MultiGrid, Moore moves):
+#   - agents act in a random order, each one moves and then, if it has
+#     wealth, gives one unit to a random cellmate (possibly itself)
+#   - at the turn of an agent, agents earlier in the order are already at
+#     their new cell and agents later in the order still at their old cell
+#   - an agent without wealth at the start of the step still gives if an
+#     agent earlier in the order gave it a unit
+# Cellmates at a turn are counted with sorted (cell, rank) keys, the
+# transfers are applied in rounds until no late giver is left.
+# On grids narrower than 3 cells the 8 Moore offsets hit some cells twice,
+# mesa counts every neighbour cell once; moves there use the de-duplicated
+# neighbour table of TorusGrid.
+import numpy as np
+from scipy import stats
+from Mesa_Tutorial import MoneyModel, gini_from_counts, collector_state, restore_collector
+from arrayCollector import ArrayDataCollector
+from torusGrid import TorusGrid
+import checkpoint as ckpt
+
+# Moore neighbourhood without the center
+moore = np.array([(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1) if (dx, dy) != (0, 0)])
+
+
+def gini(wealth):
+    """Gini coefficient of a wealth array (same result as compute_gini)."""
+    return gini_from_counts(np.bincount(wealth))
+
+
+class ArrayMoneyModel:
+    """MoneyModel with positions and wealth stored as arrays."""
+    def __init__(self, N, width, height, seed=None, interval=1, path=None, agent_vars=False, checkpoint=None):
+        self.num_agents = N
+        self.width = width
+        self.height = height
+        self.rng = np.random.default_rng(seed)
+        self.x = self.rng.integers(0, width, N)
+        self.y = self.rng.integers(0, height, N)
+        self.wealth = np.ones(N, dtype=np.int64)
+        self.steps = 0
+        # neighbour table (cells x 8, padded with -1) and number of distinct neighbours, only for small grids
+        self.neighbors = self.neighbor_count = None
+        if width < 3 or height < 3:
+            grid = TorusGrid(width, height)
+            self.neighbors, self.neighbor_count = grid.neighbors, grid.neighbor_count
+        # Gini (and the wealth of every agent with agent_vars) every interval steps, streamed to path
+        self.datacollector = ArrayDataCollector(
+            model_reporters={'Gini': lambda model: gini(model.wealth)},
+            agent_reporters={'Wealth': lambda model: model.wealth} if agent_vars else None,
+            interval=interval, path=path)
+        # checkpoint.Checkpointer that saves the model every interval steps (or None)
+        self.checkpoint = checkpoint
+
+    def move(self):
+        '''Move every agent to a random Moore neighbour on the torus.'''
+        if self.neighbors is not None:
+            cell = self.cells()
+            k = (self.rng.random(self.num_agents) * self.neighbor_count[cell]).astype(np.int64)
+            self.x, self.y = np.divmod(self.neighbors[cell, k], self.height)
+            return
+        d = moore[self.rng.integers(0, len(moore), self.num_agents)]
+        self.x = (self.x + d[:, 0]) % self.width
+        self.y = (self.y + d[:, 1]) % self.height
+
+    def cells(self):
+        return self.x * self.height + self.y
+
+    def give_money(self, old, rank):
+        '''Transfers to random cellmates, resolved in activation order.
+
+        old: cells before the move, rank: position in the activation order.
+        '''
+        N = self.num_agents
+        new = self.cells()
+        cells = self.width * self.height
+        # agent j is in its old cell for turns t < rank[j], in its new cell for t >= rank[j]
+        keyOld = old * N + rank
+        byOld = np.argsort(keyOld)
+        keyOld = keyOld[byOld]
+        keyNew = new * N + rank
+        byNew = np.argsort(keyNew)
+        keyNew = keyNew[byNew]
+        newLo = np.cumsum(np.bincount(new, minlength=cells)) - np.bincount(new, minlength=cells)
+        oldHi = np.cumsum(np.bincount(old, minlength=cells))
+        # cellmates at the turn of agent i (cell new[i], turn rank[i]), including i:
+        # nNew agents in the new cell with rank <= rank[i], nOld agents still in it with rank > rank[i]
+        # (computed in key order, the sorted queries make searchsorted cheap)
+        cell = new[byNew]
+        nNew = np.empty(N, dtype=np.int64)
+        nNew[byNew] = np.arange(N) - newLo[cell] + 1
+        oldLo = np.empty(N, dtype=np.int64)
+        oldLo[byNew] = np.searchsorted(keyOld, keyNew, 'right')
+        nOld = oldHi[new] - oldLo
+        newLo = newLo[new]
+        count = nNew + nOld
+
+        acted = np.zeros(N, dtype=bool)
+        givers = np.flatnonzero((self.wealth > 0) & (count > 1))
+        while len(givers) > 0:
+            acted[givers] = True
+            u = (self.rng.random(len(givers)) * count[givers]).astype(np.int64)
+            moved = u < nNew[givers]
+            other = np.empty(len(givers), dtype=np.int64)
+            other[moved] = byNew[newLo[givers[moved]] + u[moved]]
+            other[~moved] = byOld[oldLo[givers[~moved]] + u[~moved] - nNew[givers[~moved]]]
+            self.wealth -= np.bincount(givers, minlength=N)
+            self.wealth += np.bincount(other, minlength=N)
+            # receivers that had no wealth give as well if the gift came before their turn
+            late = (~acted[other]) & (rank[givers] < rank[other]) & (count[other] > 1)
+            givers = np.unique(other[late])
+
+    def step(self):
+        '''Advance the model by one step.'''
+        self.datacollector.collect(self)
+        rank = self.rng.permutation(self.num_agents)
+        old = self.cells()
+        self.move()
+        self.give_money(old, rank)
+        self.steps += 1
+        if self.checkpoint is not None:
+            self.checkpoint.tick(self.checkpoint_state)
+
+    def checkpoint_state(self):
+        '''Positions, wealth, RNG and step counter as (arrays, meta) for checkpoint.save.'''
+        arrays = {'x': ckpt.compact(self.x), 'y': ckpt.compact(self.y), 'wealth': ckpt.compact(self.wealth)}
+        collected, meta = collector_state(self.datacollector)
+        arrays.update({'collector/' + name: values for name, values in collected.items()})
+        return arrays, {'model': 'ArrayMoneyModel', 'N': self.num_agents, 'width': self.width, 'height': self.height,
+                        'steps': self.steps, 'rng': self.rng.bit_generator.state,
+                        'interval': self.datacollector.interval, 'path': self.datacollector.path,
+                        'agent_vars': bool(self.datacollector.agent_reporters), 'collector': meta}
+
+    def restore_state(self, arrays, meta):
+        '''Continue from checkpoint_state: the next step is the same as in the saved run.'''
+        if (meta['N'], meta['width'], meta['height']) != (self.num_agents, self.width, self.height):
+            raise ValueError('Checkpoint of a model with %i agents on %ix%i' % (meta['N'], meta['width'], meta['height']))
+        self.x = arrays['x'].astype(np.int64)
+        self.y = arrays['y'].astype(np.int64)
+        self.wealth = arrays['wealth'].astype(np.int64)
+        self.rng.bit_generator.state = meta['rng']
+        self.steps = meta['steps']
+        restore_collector(self.datacollector,
+                          {name[len('collector/'):]: a for name, a in arrays.items() if name.startswith('collector/')},
+                          meta['collector'])
+
+    @classmethod
+    def resume(cls, path, checkpoint=None):
+        '''Model from a checkpoint file, with the data collection settings of the saved run.'''
+        arrays, meta = ckpt.load(path)
+        model = cls(meta['N'], meta['width'], meta['height'], interval=meta['interval'], path=meta['path'],
+                    agent_vars=meta['agent_vars'], checkpoint=checkpoint)
+        model.restore_state(arrays, meta)
+        return model
+
+    def get_model_vars_dataframe(self):
+        return self.datacollector.get_model_vars_dataframe()
+
+
+def compareReference(N=100, width=10, height=10, steps=100, runs=30, seed=0):
+    '''Statistical equivalence of ArrayMoneyModel and MoneyModel.
+
+    Runs both models `runs` times and compares the Gini after `steps` steps,
+    the pooled final wealth distribution and the Gini trajectory (two-sample
+    Kolmogorov-Smirnov tests, mean difference in units of the standard error).
+    test_moneyArray.py turns the result into a pass/fail test.
+    '''
+    reference = {'gini': [], 'wealth': [], 'trajectory': []}
+    vectorized = {'gini': [], 'wealth': [], 'trajectory': []}
+    for run in range(runs):
+        model = MoneyModel(N, width, height, seed=seed + run)
+        for i in range(steps):
+            model.step()
+        wealth = np.array([agent.wealth for agent in model.schedule.agents])
+        reference['gini'].append(gini(wealth))
+        reference['wealth'].append(wealth)
+        reference['trajectory'].append(model.datacollector.get_model_vars_dataframe()['Gini'].to_numpy())
+
+        model = ArrayMoneyModel(N, width, height, seed=seed + run)
+        for i in range(steps):
+            model.step()
+        vectorized['gini'].append(gini(model.wealth))
+        vectorized['wealth'].append(model.wealth)
+        vectorized['trajectory'].append(model.get_model_vars_dataframe()['Gini'].to_numpy())
+
+    a, b = np.array(reference['trajectory']), np.array(vectorized['trajectory'])
+    se = np.sqrt(a.var(axis=0, ddof=1) / runs + b.var(axis=0, ddof=1) / runs)
+    z = np.abs(a.mean(axis=0) - b.mean(axis=0)) / np.where(se > 0, se, np.inf)
+
+    return {'gini': float(stats.ks_2samp(reference['gini'], vectorized['gini']).pvalue),
+            'wealth': float(stats.ks_2samp(np.concatenate(reference['wealth']),
+                                           np.concatenate(vectorized['wealth'])).pvalue),
+            'trajectory': float(np.max(z))}
+
+
+if __name__ == '__main__':
+
+    import time
+
+    result = compareReference()
+    print('KS p-values: Gini %.3f, wealth %.3f; max |z| of the Gini trajectory %.2f'
+          % (result['gini'], result['wealth'], result['trajectory']))
+
+    model = ArrayMoneyModel(10**6, 1000, 1000, seed=0)
+    start = time.perf_counter()
+    for i in range(10):
+        model.step()
+    print('10^6 agents: %.3f s per step' % ((time.perf_counter() - start) / 10))
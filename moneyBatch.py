@@ -0,0 +1,111 @@
+#-----------------------------------------------------------------------------
+#
+# Parameter sweeps for the MoneyModel over a process pool
+#
+# 17.10.2026
+#
+# Christian Rieke
+#
+#-----------------------------------------------------------------------------
+
+
+# Every run is defined by its parameters (N, width, height, steps) and a
+# seed, the model draws only from its own seeded RNG. The result of a sweep
+# therefore depends only on the parameter grid and the seed list, not on
+# the number of processes or the order in which runs finish. Summaries are
+# streamed into one table (optionally a CSV file) as runs complete.
+import os
+import csv
+import json
+import itertools
+import multiprocessing as mp
+import numpy as np
+import pandas as pd
+from Mesa_Tutorial import MoneyModel, gini_from_counts
+from moneyArray import ArrayMoneyModel
+
+columns = ['run', 'engine', 'N', 'width', 'height', 'steps', 'seed',
+           'gini', 'mean', 'std', 'max', 'zero', 'p50', 'p90', 'p99', 'counts']
+
+
+def sweepGrid(N, width, height, steps, seeds):
+    '''All combinations of the parameter lists, each with every seed.'''
+    return [{'N': n, 'width': w, 'height': h, 'steps': s, 'seed': seed}
+            for n, w, h, s, seed in itertools.product(N, width, height, steps, seeds)]
+
+
+def summary(wealth):
+    '''Final Gini and wealth distribution (histogram counts[w] and key figures).'''
+    counts = np.bincount(wealth)
+    share = np.cumsum(counts) / len(wealth)
+    return {'gini': gini_from_counts(counts),
+            'mean': float(np.mean(wealth)),
+            'std': float(np.std(wealth)),
+            'max': int(len(counts) - 1),
+            'zero': float(share[0]),
+            'p50': int(np.searchsorted(share, 0.5)),
+            'p90': int(np.searchsorted(share, 0.9)),
+            'p99': int(np.searchsorted(share, 0.99)),
+            'counts': counts.tolist()}
+
+
+def _run(task):
+    '''One run in a worker process.'''
+    run, engine, params = task
+    if engine == 'array':
+        model = ArrayMoneyModel(params['N'], params['width'], params['height'], seed=params['seed'])
+        for i in range(params['steps']):
+            model.step()
+        wealth = model.wealth
+    else:
+        # without a data collector (only the final state is needed)
+        model = MoneyModel(params['N'], params['width'], params['height'], seed=params['seed'])
+        for i in range(params['steps']):
+            model.schedule.step()
+        wealth = np.array([agent.wealth for agent in model.schedule.agents])
+    row = dict(params, run=run, engine=engine)
+    row.update(summary(wealth))
+    return row
+
+
+def runSweep(params, engine='mesa', processes=None, path=None):
+    '''Run all parameter sets (sweepGrid) on a process pool.
+
+    engine: 'mesa' (MoneyModel) or 'array' (ArrayMoneyModel), path: CSV file
+    the summaries are appended to as soon as a run finishes.
+    '''
+    tasks = [(run, engine, p) for run, p in enumerate(params)]
+    processes = os.cpu_count() if processes is None else processes
+    rows = []
+    pool = None
+    f = open(path, 'w', newline='') if path is not None else None
+    try:
+        writer = csv.DictWriter(f, columns) if f is not None else None
+        if writer is not None:
+            writer.writeheader()
+        if processes <= 1 or len(tasks) == 1:
+            results = map(_run, tasks)
+        else:
+            pool = mp.Pool(min(processes, len(tasks)))
+            results = pool.imap_unordered(_run, tasks, chunksize=max(1, len(tasks) // (8 * processes)))
+        for row in results:
+            rows.append(row)
+            if writer is not None:
+                writer.writerow(dict(row, counts=json.dumps(row['counts'])))
+                f.flush()
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+        if f is not None:
+            f.close()
+
+    # order of the runs, independent of the completion order
+    return pd.DataFrame(rows, columns=columns).sort_values('run').set_index('run')
+
+
+if __name__ == '__main__':
+
+    params = sweepGrid(N=[50, 100, 200], width=[10], height=[10], steps=[100], seeds=range(8))
+    results = runSweep(params)
+    print(results.groupby('N')[['gini', 'zero', 'max']].agg(['mean', 'std']))
@@ -0,0 +1,298 @@
+#-----------------------------------------------------------------------------
+#
+# Autor: Christian Rieke
+# Datum: 17.10.2026
+#
+# Beschreibung: Kraftwerksdatensätze und Kraftwerksdatenbank
+#
+#               convPlant und storagePlant sind geprüfte Datensätze für
+#               addPowerPlant (statt ungeprüfter dicts). loadFleet liest
+#               die mitgelieferten Excel-Dateien (Kraftwerke.xlsx, UBA
+#               Datenbank) einmal ein und legt die Kraftwerksliste
+#               spaltenweise als npz-Datei ab. Der Schlüssel ist der Hash
+#               der Quelldateien; ändern sich diese, wird neu eingelesen.
+#               Technische Parameter, die nicht in den Dateien stehen
+#               (Wirkungsgrad, Gradienten, Mindestlast, ...), werden je
+#               Brennstoff mit typischen Werten belegt (fleetRecords).
+#
+# Letzte Änderung:
+#
+#           17.10.2026  Datensätze und Kraftwerksdatenbank mit Cache
+#
+#-----------------------------------------------------------------------------
+
+# Laden der Abhängigkeiten
+import os
+import hashlib
+from dataclasses import dataclass, field, MISSING
+import numpy as np
+import pandas as pd
+
+fuels = ('lignite', 'coal', 'gas', 'nuc')               # Brennstoffe im Portfoliomodell
+
+here = os.path.dirname(os.path.abspath(__file__))
+sources = {'entsoe' : os.path.join(here, 'Kraftwerke.xlsx'),
+           'uba'    : os.path.join(here, 'Umweltbundesamt 04.09.2018 - Datenbank Kraftwerke in Deutschland.xls')}
+cacheDir = os.path.join(here, '.cache')
+version = 1                                             # bei Änderungen am Einlesen erhöhen (neuer Cache)
+
+
+def _check(condition, name, message): # Prüfung eines Datensatzes
+
+    if not condition:
+        raise ValueError('Kraftwerk %s: %s' % (name, message))
+
+    pass
+
+
+@dataclass(slots=True)
+class convPlant:
+
+        name: str
+        fuel: str
+        powerMax: float
+        powerMin: float
+        eta: float
+        chi: float
+        gradUp: float
+        gradDown: float
+        stopTime: int
+        runTime: int
+        P0: float = 0.0
+        on: int = 0
+        heat: np.ndarray = field(default_factory=lambda: np.zeros(0))
+
+        typ = 'konv'
+        # Schlüssel im Kraftwerks-dict --> Attribut
+        dictKeys = {'name' : 'name', 'fuel' : 'fuel', 'powerMax' : 'powerMax', 'powerMin' : 'powerMin',
+                    'eta' : 'eta', 'chi' : 'chi', 'grad+' : 'gradUp', 'grad-' : 'gradDown',
+                    'stopTime' : 'stopTime', 'runTime' : 'runTime', 'P0' : 'P0', 'on' : 'on', 'heat' : 'heat'}
+
+        def __post_init__(self):
+
+            self.heat = np.asarray(self.heat, dtype=float)
+            _check(self.fuel in fuels, self.name, 'Brennstoff %r unbekannt, erlaubt: %s' % (self.fuel, ', '.join(fuels)))
+            _check(self.powerMax > 0, self.name, 'powerMax muss positiv sein')
+            _check(0 <= self.powerMin <= self.powerMax, self.name, 'powerMin muss in [0, powerMax] liegen')
+            _check(0 < self.eta <= 1, self.name, 'eta muss in (0, 1] liegen')
+            _check(self.chi >= 0, self.name, 'chi darf nicht negativ sein')
+            _check(self.gradUp >= 0 and self.gradDown >= 0, self.name, 'Gradienten dürfen nicht negativ sein')
+            _check(self.stopTime >= 0 and self.runTime >= 0, self.name, 'Lauf-/Stillstandszeit darf nicht negativ sein')
+            _check(self.heat.ndim == 1, self.name, 'heat muss eine Zeitreihe sein')
+
+            pass
+
+        def asDict(self): # Kraftwerks-dict für powerPlantPortfolio
+
+            powerPlant = {'typ' : self.typ}
+            powerPlant.update({key : getattr(self, attr) for key, attr in self.dictKeys.items()})
+
+            return powerPlant
+
+
+@dataclass(slots=True)
+class storagePlant:
+
+        name: str
+        VMax: float
+        VMin: float
+        PPlusMax: float
+        PPlusMin: float
+        PMinusMax: float
+        PMinusMin: float
+        etaPlus: float
+        etaMinus: float
+        gradPlusUp: float
+        gradPlusDown: float
+        gradMinusUp: float
+        gradMinusDown: float
+        PPlus0: float = 0.0
+        PMinus0: float = 0.0
+        V0: float = 0.0
+
+        typ = 'storage'
+        # Schlüssel im Kraftwerks-dict --> Attribut
+        dictKeys = {'name' : 'name', 'VMax' : 'VMax', 'VMin' : 'VMin',
+                    'P+_Max' : 'PPlusMax', 'P+_Min' : 'PPlusMin', 'P-_Max' : 'PMinusMax', 'P-_Min' : 'PMinusMin',
+                    'eta+' : 'etaPlus', 'eta-' : 'etaMinus',
+                    'grad++' : 'gradPlusUp', 'grad+-' : 'gradPlusDown', 'grad-+' : 'gradMinusUp', 'grad--' : 'gradMinusDown',
+                    'P+0' : 'PPlus0', 'P-0' : 'PMinus0', 'V0' : 'V0'}
+
+        def __post_init__(self):
+
+            _check(0 <= self.VMin <= self.VMax, self.name, 'VMin muss in [0, VMax] liegen')
+            _check(self.VMin <= self.V0 <= self.VMax, self.name, 'V0 muss in [VMin, VMax] liegen')
+            _check(0 <= self.PPlusMin <= self.PPlusMax, self.name, 'P+_Min muss in [0, P+_Max] liegen')
+            _check(0 <= self.PMinusMin <= self.PMinusMax, self.name, 'P-_Min muss in [0, P-_Max] liegen')
+            _check(0 < self.etaPlus <= 1 and 0 < self.etaMinus <= 1, self.name, 'eta+/eta- müssen in (0, 1] liegen')
+            _check(min(self.gradPlusUp, self.gradPlusDown, self.gradMinusUp, self.gradMinusDown) >= 0,
+                   self.name, 'Gradienten dürfen nicht negativ sein')
+
+            pass
+
+        def asDict(self): # Kraftwerks-dict für powerPlantPortfolio
+
+            powerPlant = {'typ' : self.typ}
+            powerPlant.update({key : getattr(self, attr) for key, attr in self.dictKeys.items()})
+
+            return powerPlant
+
+
+records = {'konv' : convPlant, 'storage' : storagePlant}
+
+
+def toRecord(powerPlant): # Datensatz aus Datensatz oder Kraftwerks-dict (prüft Schlüssel und Werte)
+
+    if isinstance(powerPlant, (convPlant, storagePlant)):
+        return powerPlant
+
+    typ = powerPlant.get('typ')
+    name = powerPlant.get('name', '?')
+    _check(typ in records, name, 'typ %r unbekannt, erlaubt: %s' % (typ, ', '.join(records)))
+    record = records[typ]
+    keys = set(powerPlant) - {'typ'}
+    _check(not keys - set(record.dictKeys), name, 'unbekannte Schlüssel %s' % sorted(keys - set(record.dictKeys)))
+    required = {key for key, attr in record.dictKeys.items()
+                if record.__dataclass_fields__[attr].default is MISSING
+                and record.__dataclass_fields__[attr].default_factory is MISSING}
+    _check(not required - keys, name, 'fehlende Schlüssel %s' % sorted(required - keys))
+
+    return record(**{record.dictKeys[key] : value for key, value in powerPlant.items() if key != 'typ'})
+
+
+# Zuordnung der Energieträger in den Quelldateien (erster genannter Energieträger)
+entsoeFuels = {'Fossil Brown coal/Lignite' : 'lignite',
+               'Fossil Hard coal'          : 'coal',
+               'Fossil Coal-derived gas'   : 'coal',
+               'Fossil Gas'                : 'gas',
+               'Nuclear'                   : 'nuc'}
+ubaFuels = {'Braunkohle'   : 'lignite',
+            'Steinkohle'   : 'coal',
+            'Gichtgas'     : 'coal',
+            'Konvertergas' : 'coal',
+            'Erdgas'       : 'gas',
+            'Raffineriegas': 'gas',
+            'Uran'         : 'nuc'}
+
+
+def _hash(paths): # Hash der Quelldateien (Schlüssel des Caches)
+
+    h = hashlib.sha1(str(version).encode())
+    for path in paths:
+        with open(path, 'rb') as f:
+            h.update(f.read())
+
+    return h.hexdigest()
+
+
+def readFleet(paths=None): # Einlesen der Excel-Dateien in Spalten (langsam, siehe loadFleet)
+
+    paths = dict(sources, **(paths or {}))
+    rows = []
+    # Kraftwerke.xlsx: konv. Kraftwerke und Pumpspeicher
+    conv = pd.read_excel(paths['entsoe'], 'konv. KW')
+    for typ, name, capacity, ident in zip(conv['TYP'], conv['Name'], conv['Leistung'], conv['ID']):
+        if typ in entsoeFuels:
+            rows.append(('entsoe', str(ident), str(name), 'konv', entsoeFuels[typ], float(capacity), 0.0))
+    storage = pd.read_excel(paths['entsoe'], 'Speicher')
+    for typ, name, capacity, ident in zip(storage['TYP'], storage['Name'], storage['Leistung'], storage['ID']):
+        if typ == 'Hydro Pumped Storage':
+            rows.append(('entsoe', str(ident), str(name), 'storage', '', float(capacity), 0.0))
+    # UBA-Datenbank: Tabellenkopf in Zeile 10, Anmerkungen am Ende ohne Leistung
+    uba = pd.read_excel(paths['uba'], 'Kraftwerke', header=9)
+    uba.columns = [str(c).strip() for c in uba.columns]
+    uba = uba[pd.to_numeric(uba['Elektrische Bruttoleistung (MW)'], errors='coerce').notna()]
+    for k, (name, kind, carrier, capacity, heat) in enumerate(zip(uba['Kraftwerksname / Standort'], uba['Anlagenart'],
+                                                                   uba['Primärenergieträger'],
+                                                                   uba['Elektrische Bruttoleistung (MW)'],
+                                                                   uba['Fernwärme-leistung (MW)'])):
+        heat = float(pd.to_numeric(heat, errors='coerce')) if pd.notna(pd.to_numeric(heat, errors='coerce')) else 0.0
+        if str(kind).startswith('PSW'):
+            rows.append(('uba', 'UBA%03i' % k, str(name), 'storage', '', float(capacity), 0.0))
+            continue
+        fuel = ubaFuels.get(str(carrier).split(',')[0].strip())
+        if fuel is not None:
+            rows.append(('uba', 'UBA%03i' % k, str(name), 'konv', fuel, float(capacity), heat))
+
+    columns = ('source', 'id', 'name', 'typ', 'fuel', 'powerMax', 'heatMax')
+
+    return {col : np.array([row[k] for row in rows], dtype=float if col in ('powerMax', 'heatMax') else str)
+            for k, col in enumerate(columns)}
+
+
+def loadFleet(paths=None, cache=True): # Kraftwerksliste in Spalten, aus dem Cache wenn die Quellen unverändert sind
+
+    paths = dict(sources, **(paths or {}))
+    if not cache:
+        return readFleet(paths)
+
+    key = _hash([paths['entsoe'], paths['uba']])
+    cacheFile = os.path.join(cacheDir, 'fleet_%s.npz' % key)
+    if os.path.exists(cacheFile):
+        with np.load(cacheFile, allow_pickle=False) as data:
+            return {col : data[col] for col in data.files}
+
+    fleet = readFleet(paths)
+    os.makedirs(cacheDir, exist_ok=True)
+    tmp = cacheFile + '.tmp.npz'
+    np.savez(tmp, **fleet)
+    os.replace(tmp, cacheFile)
+
+    return fleet
+
+
+# Typische technische Parameter je Brennstoff
+#   minLoad: Mindestlast [-], ramp: Gradient [Anteil Pmax je Stunde], runTime/stopTime [h],
+#   eta: Wirkungsgrad [-], emission: CO2 je MWh Brennstoff [t/MWh]
+defaults = {'lignite' : {'minLoad' : 0.40, 'ramp' : 1.2, 'runTime' : 8, 'stopTime' : 6, 'eta' : 0.38, 'emission' : 0.36},
+            'coal'    : {'minLoad' : 0.30, 'ramp' : 1.8, 'runTime' : 6, 'stopTime' : 4, 'eta' : 0.42, 'emission' : 0.34},
+            'gas'     : {'minLoad' : 0.20, 'ramp' : 4.8, 'runTime' : 2, 'stopTime' : 2, 'eta' : 0.55, 'emission' : 0.20},
+            'nuc'     : {'minLoad' : 0.50, 'ramp' : 1.2, 'runTime' : 24, 'stopTime' : 24, 'eta' : 0.33, 'emission' : 0.0}}
+storageHours = 6                                        # Speicherdauer Pumpspeicher [h]
+storageEta = 0.87                                       # Wirkungsgrad Laden/Entladen (je Richtung)
+
+
+def fleetRecords(fleet, dt=0.25, source='uba', minPower=0): # Datensätze aus der Kraftwerksliste für eine Zeitschrittweite
+
+    records = []
+    names = {}
+    keep = (fleet['source'] == source) & (fleet['powerMax'] >= minPower)
+    for typ, name, fuel, powerMax in zip(fleet['typ'][keep], fleet['name'][keep], fleet['fuel'][keep],
+                                         fleet['powerMax'][keep]):
+        typ, name, fuel, powerMax = str(typ), str(name), str(fuel), float(powerMax)
+        # eindeutige Namen (Ergebnisse und Variablen werden über den Namen angesprochen)
+        names[name] = names.get(name, 0) + 1
+        name = name if names[name] == 1 else '%s (%i)' % (name, names[name])
+        if typ == 'konv':
+            p = defaults[fuel]
+            powerMin = round(p['minLoad'] * powerMax, 1)
+            # An- und Abfahren laufen über die Gradienten --> Gradient mindestens Mindestlast
+            grad = max(round(p['ramp'] * powerMax * dt, 1), powerMin)
+            records.append(convPlant(name=name, fuel=fuel, powerMax=powerMax, powerMin=powerMin,
+                                     eta=p['eta'], chi=round(p['emission'] / p['eta'], 3),
+                                     gradUp=grad, gradDown=grad,
+                                     stopTime=int(np.ceil(p['stopTime'] / dt)), runTime=int(np.ceil(p['runTime'] / dt)),
+                                     P0=0.0, on=-int(np.ceil(p['stopTime'] / dt))))
+        if typ == 'storage':
+            volume = storageHours * powerMax
+            records.append(storagePlant(name=name, VMax=volume, VMin=0.0,
+                                        PPlusMax=powerMax, PPlusMin=round(0.1 * powerMax, 1),
+                                        PMinusMax=powerMax, PMinusMin=0.0,
+                                        etaPlus=storageEta, etaMinus=storageEta,
+                                        gradPlusUp=powerMax, gradPlusDown=powerMax,
+                                        gradMinusUp=powerMax, gradMinusDown=powerMax,
+                                        V0=volume / 2))
+
+    return records
+
+
+if __name__ == "__main__":
+
+    import time
+
+    start = time.perf_counter()
+    fleet = loadFleet()
+    print('Kraftwerksliste geladen: %i Einträge in %.1f ms' % (len(fleet['name']), 1000 * (time.perf_counter() - start)))
+    records = fleetRecords(fleet)
+    print('%i Datensätze (UBA), %.0f MW' % (len(records), sum(getattr(r, 'powerMax', getattr(r, 'PPlusMax', 0))
+                                                             for r in records)))
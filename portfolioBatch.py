@@ -0,0 +1,221 @@
+#-----------------------------------------------------------------------------
+#
+# Autor: Christian Rieke
+# Datum: 17.10.2026
+#
+# Beschreibung: Optimierung eines Portfolios über viele Preisszenarien
+#
+#               Die Preisszenarien (Szenarien x Zeitschritte) liegen im
+#               Shared Memory und werden nicht je Aufgabe gepickelt. Jeder
+#               Prozess baut das Modell einmal auf und tauscht je Szenario
+#               nur Preise und Startzustand aus (updateModel). Die
+#               Ergebnisse werden direkt in gemeinsame Arrays geschrieben.
+#               Jeder Prozess schließt seine Abbildungen beim Beenden,
+#               freigegeben (unlink) wird der Speicher vom Hauptprozess.
+#
+# Letzte Änderung:
+#
+#           17.10.2026  Parallele Szenariooptimierung (runScenarios)
+#           17.10.2026  Shared Memory in den Arbeitsprozessen schließen, Pool regulär beenden
+#
+#-----------------------------------------------------------------------------
+
+# Laden der Abhängigkeiten
+import copy
+import multiprocessing as mp
+from multiprocessing import shared_memory, util
+import numpy as np
+from portfolioOpt import powerPlantPortfolio
+
+# Zustand je Arbeitsprozess (wird im Initializer gesetzt)
+_worker = {}
+
+
+def _share(shape): # Legt Speicher für ein Array im Shared Memory an
+
+    return shared_memory.SharedMemory(create=True, size=max(int(np.prod(shape)) * 8, 1))
+
+
+def _attach(specs): # Öffnet die Arrays im Shared Memory eines anderen Prozesses
+
+    handles, arrays = [], {}
+    for key, (name, shape) in specs.items():
+        shm = shared_memory.SharedMemory(name=name)
+        handles.append(shm)
+        arrays[key] = np.ndarray(shape, dtype=float, buffer=shm.buf)
+
+    return handles, arrays
+
+
+def _detach(): # Schließt die Arrays im Shared Memory des Prozesses (ohne unlink)
+
+    handles = _worker.get('handles', [])
+    _worker.clear()                                     # Arrays vor dem Schließen freigeben (Puffer exportiert)
+    for shm in handles:
+        shm.close()
+
+    pass
+
+
+def _init(specs, powerPlants, fuels, dt, backend): # Initialisierung eines Arbeitsprozesses
+
+    handles, arrays = _attach(specs)
+    if mp.parent_process() is not None:
+        # Arbeitsprozess: Abbildungen beim regulären Ende des Prozesses schließen
+        util.Finalize(None, _detach, exitpriority=10)
+    _worker.clear()
+    _worker.update({'handles'     : handles,
+                    'arrays'      : arrays,
+                    'powerPlants' : powerPlants,
+                    'fuels'       : fuels,
+                    'dt'          : dt,
+                    'backend'     : backend,
+                    'portfolio'   : None,
+                    'initial'     : None})
+
+    pass
+
+
+def _solve(s): # Optimierung von Szenario s im Arbeitsprozess
+
+    arrays = _worker['arrays']
+    lignite, coal, nuc = _worker['fuels']
+    pf = _worker['portfolio']
+
+    if pf is None:
+        # Erstes Szenario im Prozess: Portfolio und Modell aufbauen
+        pf = powerPlantPortfolio(dt=_worker['dt'], backend=_worker['backend'])
+        if pf.m is not None:
+            pf.m.Params.Threads = 1                     # ein Thread je Prozess
+        for powerPlant in copy.deepcopy(_worker['powerPlants']):
+            pf.addPowerPlant(powerPlant)
+        _worker['initial'] = copy.deepcopy(pf.results)
+        pf.setPrices(arrays['power'][s], arrays['co'][s], arrays['gas'][s], lignite, coal, nuc)
+        pf.buildModel()
+        _worker['portfolio'] = pf
+    else:
+        # Weitere Szenarien: Startzustand zurücksetzen, nur Preise austauschen
+        pf.results = copy.deepcopy(_worker['initial'])
+        pf.setPrices(arrays['power'][s], arrays['co'][s], arrays['gas'][s], lignite, coal, nuc)
+        pf.updateModel()
+    pf.runOpt(plot=False)
+
+    arrays['objective'][s] = pf.backend.objVal
+    if np.isnan(pf.backend.objVal):
+        arrays['profit'][s] = np.nan
+        arrays['P'][s] = np.nan
+        return s
+    for k, powerPlant in enumerate(pf.powerPlants):
+        result = pf.results[powerPlant['name']]
+        arrays['profit'][s, k] = result['profit']
+        arrays['P'][s, k] = result['PTs']
+
+    return s
+
+
+def runScenarios(powerPlants, power, co, gas, lignite, coal, nuc, dt=0.25, backend='gurobi', processes=None):
+    # Optimierung aller Szenarien. power, co, gas: Arrays (Szenarien x Zeitschritte) oder eine Zeitreihe für alle
+
+    power = np.atleast_2d(np.asarray(power, dtype=float))
+    S, T = power.shape
+    co = np.broadcast_to(np.atleast_2d(np.asarray(co, dtype=float)), (S, T))
+    gas = np.broadcast_to(np.atleast_2d(np.asarray(gas, dtype=float)), (S, T))
+    nPlants = len(powerPlants)
+
+    # Ein- und Ausgaben im Shared Memory
+    shapes = {'power'     : (S, T),
+              'co'        : (S, T),
+              'gas'       : (S, T),
+              'objective' : (S,),
+              'profit'    : (S, nPlants),
+              'P'         : (S, nPlants, T)}
+    handles, arrays, specs = [], {}, {}
+    try:
+        for key, shape in shapes.items():
+            shm = _share(shape)
+            handles.append(shm)
+            arrays[key] = np.ndarray(shape, dtype=float, buffer=shm.buf)
+            specs[key] = (shm.name, shape)
+        arrays['power'][:] = power
+        arrays['co'][:] = co
+        arrays['gas'][:] = gas
+
+        args = (specs, powerPlants, (lignite, coal, nuc), dt, backend)
+        processes = mp.cpu_count() if processes is None else processes
+        if processes <= 1 or S == 1:
+            # Ohne Prozesspool (z.B. zur Fehlersuche)
+            _init(*args)
+            try:
+                for s in range(S):
+                    _solve(s)
+            finally:
+                _detach()
+        else:
+            with mp.Pool(min(processes, S), initializer=_init, initargs=args) as pool:
+                for s in pool.imap_unordered(_solve, range(S), chunksize=max(1, S // (4 * processes))):
+                    pass
+                # Prozesse regulär beenden (schließen ihre Abbildungen), nicht über terminate beim Verlassen
+                pool.close()
+                pool.join()
+
+        # Ergebnisse aus dem Shared Memory kopieren
+        results = {'plants'    : [powerPlant['name'] for powerPlant in powerPlants],
+                   'objective' : arrays['objective'].copy(),
+                   'profit'    : arrays['profit'].copy(),
+                   'P'         : arrays['P'].copy()}
+    finally:
+        arrays.clear()
+        for shm in handles:
+            shm.close()
+            shm.unlink()
+
+    return results
+
+
+if __name__ == "__main__":
+
+    # Monte-Carlo-Preispfade um eine Tageskurve
+    S = 64
+    T = 24
+    rng = np.random.default_rng(1)
+    base = 30 + 15 * np.sin(np.linspace(0, 2 * np.pi, T))
+    power = base + rng.normal(0, 5, (S, T)).cumsum(axis=1)
+    co = 5 + rng.random((S, T))
+    gas = 10 + rng.random((S, T))
+
+    myPlan1 = {'typ'        :   'konv',
+               'name'       :   'WW',
+               'fuel'       :   'gas',
+               'powerMax'   :   750,
+               'powerMin'   :   100,
+               'eta'        :   0.35,
+               'chi'        :   0.21,
+               'grad+'      :   100,
+               'grad-'      :   100,
+               'stopTime'   :   8,
+               'runTime'    :   7,
+               'P0'         :   600,
+               'on'         :   1,
+               'heat'       :   []}
+
+    myPlan2 = {'typ'        :   'storage',
+               'name'       :   'VI',
+               'VMax'       :   1230,
+               'VMin'       :   100,
+               'P+_Max'     :   500,
+               'P+_Min'     :   50,
+               'P-_Max'     :   450,
+               'P-_Min'     :   0,
+               'eta+'       :   0.85,
+               'eta-'       :   0.85,
+               'grad++'     :   75,
+               'grad+-'     :   68,
+               'grad-+'     :   50,
+               'grad--'     :   45,
+               'P+0'        :   0,
+               'P-0'        :   0,
+               'V0'         :   500}
+
+    results = runScenarios([myPlan1, myPlan2], power, co, gas, 2, 4, 1)
+    print('Gewinn je Szenario: Mittelwert %.0f, 5%%-Quantil %.0f' %
+          (np.nanmean(results['objective']), np.nanpercentile(results['objective'], 5)))
@@ -0,0 +1,117 @@
+#-----------------------------------------------------------------------------
+#
+# Autor: Christian Rieke
+# Datum: 17.10.2026
+#
+# Beschreibung: Zwischenspeicher für Portfoliooptimierungen
+#
+#               Ein Einsatzproblem ist durch die Kraftwerksparameter, die
+#               Startzustände, die Preiszeitreihen (und Wärmebedarf im
+#               Zeitfenster), dt, die Zeitschritte (Länge, Gewicht), das
+#               Backend und die Formulierung vollständig bestimmt.
+#               solveCache bildet daraus einen Hash und speichert je
+#               Schlüssel Fahrpläne und Endzustände (getState), bei einem
+#               Treffer werden diese per setState übernommen statt neu zu
+#               optimieren. Mit tol > 0 werden Preise vor dem Hashen auf ein
+#               Raster der Weite tol gerundet, fast gleiche Probleme teilen
+#               sich dann einen Eintrag (Fahrplan und Gewinn der ersten
+#               Lösung). Verdrängt wird der am längsten nicht genutzte
+#               Eintrag (LRU).
+#
+# Letzte Änderung:
+#
+#           17.10.2026  LRU-Zwischenspeicher mit Hash über Parameter, Zustand und Preise
+#           17.10.2026  Länge und Gewicht der Zeitschritte sowie Backend im Schlüssel
+#
+#-----------------------------------------------------------------------------
+
+# Laden der Abhängigkeiten
+import json
+import hashlib
+from collections import OrderedDict
+import numpy as np
+import portfolioMatrix as pm
+from portfolioOpt import stateKeys
+from telemetry import log
+
+
+def problemKey(pf, tol=0.0): # Hash über Kraftwerke, Startzustände, Preise und Einstellungen eines Portfolios
+
+    h = hashlib.blake2b(digest_size=20)
+    h.update(json.dumps([pf.backendName, pf.dt, pf.compact, pf.T, pf.lignitePrice, pf.coalPrice, pf.nucPrice,
+                         pf.length is None, pf.weight is None]).encode())
+    # Länge und Gewicht der Zeitschritte (setResolution), None = 1
+    for series in (pf.length, pf.weight):
+        if series is not None:
+            h.update(np.asarray(series, dtype=float).tobytes())
+    for series in (pf.powerPrice, pf.coPrice, pf.gasPrice):
+        series = np.broadcast_to(np.asarray(series, dtype=float), (pf.T,))
+        h.update((np.round(series / tol) if tol > 0 else series).tobytes())
+    for powerPlant in pf.powerPlants:
+        name = powerPlant['name']
+        h.update(json.dumps({key : value for key, value in powerPlant.items() if key != 'heat'},
+                            sort_keys=True, default=float).encode())
+        if powerPlant['typ'] == 'konv' and len(powerPlant['heat']) > 0:
+            h.update(pm.window(powerPlant['heat'], pf.offset, pf.T).tobytes())
+        # Startzustand (auf 1e-6 gerundet, damit Rundungsrauschen keine neuen Schlüssel erzeugt)
+        h.update(np.round([float(pf.results[name].get(key, np.nan)) for key in stateKeys], 6).tobytes())
+
+    return h.hexdigest()
+
+
+class solveCache:
+
+        def __init__(self,maxSize=256,tol=0.0):
+
+            self.maxSize = maxSize                      # maximale Anzahl Einträge
+            self.tol = tol                              # Rasterweite der Preise im Schlüssel (0 = exakt)
+            self.entries = OrderedDict()                # Schlüssel --> (Arrays, Metadaten, Zielfunktionswert)
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+            pass
+
+        def solve(self,pf): # Optimierung des Portfolios mit gesetzten Preisen, True wenn (zwischengespeichert) optimal
+
+            key = problemKey(pf, self.tol)
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                arrays, meta, objVal = self.entries[key]
+                pf.setState(arrays, meta)
+                pf.telemetry.count(cached=True, objective=objVal)
+                self.hits += 1
+                return True
+
+            self.misses += 1
+            # Bestehendes Modell nur anpassen, sonst neu aufbauen
+            if pf.backend is None:
+                pf.buildModel()
+            else:
+                pf.updateModel()
+            if not pf.runOpt(plot=False):
+                return False
+            arrays, meta = pf.getState()
+            self.entries[key] = (arrays, meta, pf.backend.objVal)
+            pf.telemetry.count(cached=False, objective=pf.backend.objVal)
+            if len(self.entries) > self.maxSize:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+            log.debug('Zwischenspeicher: %i Einträge, %i Treffer, %i Fehlzugriffe', len(self.entries), self.hits, self.misses)
+
+            return True
+
+        def stats(self): # Trefferquote und Belegung
+
+            total = self.hits + self.misses
+            return {'entries'   : len(self.entries),
+                    'hits'      : self.hits,
+                    'misses'    : self.misses,
+                    'evictions' : self.evictions,
+                    'hitRate'   : self.hits / total if total > 0 else np.nan}
+
+        def clear(self):
+
+            self.entries.clear()
+
+            pass
@@ -0,0 +1,249 @@
+#-----------------------------------------------------------------------------
+#
+# Autor: Christian Rieke
+# Datum: 17.10.2026
+#
+# Beschreibung: Zerlegung der Portfoliooptimierung je Kraftwerk
+#
+#               Ohne Kopplung auf Portfolioebene zerfällt das Modell in
+#               unabhängige Teilprobleme je Kraftwerk. Mit einer Kopplung
+#               der Gesamtleistung (P <= cap, P >= cap oder P == cap) wird
+#               diese per Lagrange-Relaxation aufgelöst: der Multiplikator
+#               lambda verschiebt den Strompreis jedes Teilproblems
+#               (Preis - lambda), der Koordinator passt lambda per
+#               Subgradientenverfahren an. Zulässige Lösungen entstehen
+#               aus den Teillösungen oder durch eine LP-Reparatur mit
+#               festen Betriebszuständen. Berichtet wird die Dualitätslücke
+#               zwischen Lagrange-Schranke und bester zulässiger Lösung.
+#
+# Letzte Änderung:
+#
+#           17.10.2026  Lagrange-Zerlegung mit parallelen Teilproblemen
+#           17.10.2026  Feste Zuordnung der Kraftwerke zu Arbeitsprozessen (Modelle je Kraftwerk einmal)
+#
+#-----------------------------------------------------------------------------
+
+# Laden der Abhängigkeiten
+import copy
+import time
+import multiprocessing as mp
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+import solverBackend as sb
+from portfolioOpt import powerPlantPortfolio
+
+# Zustand je Arbeitsprozess (wird im Initializer gesetzt)
+_worker = {}
+
+
+def _init(powerPlants, states, prices, settings): # Initialisierung eines Arbeitsprozesses
+
+    _worker.clear()
+    _worker.update({'powerPlants' : powerPlants,
+                    'states'      : states,
+                    'prices'      : prices,
+                    'settings'    : settings,
+                    'portfolios'  : {}})
+
+    pass
+
+
+def _solve(task): # Teilproblem eines Kraftwerks mit verschobenem Strompreis
+
+    k, power = task
+    powerPlant = _worker['powerPlants'][k]
+    name = powerPlant['name']
+    prices = _worker['prices']
+    pf = _worker['portfolios'].get(k)
+
+    if pf is None:
+        # Erstes Teilproblem des Kraftwerks im Prozess: Modell aufbauen
+        pf = powerPlantPortfolio(**_worker['settings'])
+        if pf.m is not None:
+            pf.m.Params.Threads = 1                     # ein Thread je Prozess
+        pf.addPowerPlant(copy.deepcopy(powerPlant))
+        pf.results[name] = copy.deepcopy(_worker['states'][name])
+        pf.setPrices(power, prices['co'], prices['gas'], prices['lignite'], prices['coal'], prices['nuc'])
+        pf.buildModel()
+        _worker['portfolios'][k] = pf
+    else:
+        # Weitere Iterationen: Startzustand zurücksetzen, nur den Strompreis austauschen
+        pf.results[name] = copy.deepcopy(_worker['states'][name])
+        pf.setPrices(power, prices['co'], prices['gas'], prices['lignite'], prices['coal'], prices['nuc'])
+        pf.updateModel()
+    pf.runOpt(plot=False)
+
+    if np.isnan(pf.backend.objVal):
+        return k, np.nan, np.nan, None
+
+    values = {family : pf.x[cols] for family, cols in pf.problem['cols'][name].items()}
+
+    return k, pf.backend.objVal, pf.backend.objBound, values
+
+
+def _objective(values, power): # Wert eines Kraftwerksfahrplans in der Zielfunktion des Portfolios
+
+    fuel = np.sum(values['F']) if 'F' in values else 0
+    emission = np.sum(values['E']) if 'E' in values else 0
+
+    return power @ values['P'] - fuel + emission
+
+
+def _feasible(total, cap, sense, tol=1e-6): # Einhaltung der Kopplung
+
+    if sense == '<':
+        return np.all(total <= cap + tol)
+    if sense == '>':
+        return np.all(total >= cap - tol)
+
+    return np.all(np.abs(total - cap) <= tol)
+
+
+def _repair(pf, values, cap, sense): # LP mit festen Betriebszuständen und Kopplung der Gesamtleistung
+
+    problem = pf.buildProblem()
+    lb = problem['lb'].copy()
+    ub = problem['ub'].copy()
+    for name, cols in problem['cols'].items():
+        if 'On' in cols:
+            lb[cols['On']] = ub[cols['On']] = np.round(values[name]['On'])
+    # Kopplung: Gesamtleistung P (Portfoliosumme) gegen cap
+    T = problem['T']
+    P = problem['totals']['P']
+    coupling = sp.csr_matrix((np.ones(T), (np.arange(T), np.arange(P.start, P.stop))), shape=(T, problem['A'].shape[1]))
+    lp = dict(problem,
+              A=sp.vstack([problem['A'], coupling], format='csr'),
+              sense=np.concatenate([problem['sense'], np.full(T, sense)]),
+              rhs=np.concatenate([problem['rhs'], cap]),
+              lb=lb, ub=ub, vtype=np.full(len(lb), 'C'))
+    backend = sb.backends[pf.backendName](lp)
+    if not backend.optimize():
+        return np.nan, None
+    x = backend.values()
+
+    return backend.objVal, {name : {family : x[c] for family, c in cols.items()}
+                            for name, cols in problem['cols'].items()}
+
+
+def solveDecomposed(pf, cap=None, sense='<', maxIter=50, gapTol=1e-3, timeLimit=np.inf, processes=None):
+    # Zerlegte Optimierung eines Portfolios mit gesetzten Preisen und Kraftwerken
+    # cap: Kopplung der Gesamtleistung je Zeitschritt (None = keine Kopplung), sense: '<', '>' oder '='
+
+    start = time.perf_counter()
+    T = pf.T
+    power = np.asarray(pf.powerPrice, dtype=float)
+    names = [powerPlant['name'] for powerPlant in pf.powerPlants]
+    coupled = cap is not None
+    cap = np.broadcast_to(np.asarray(cap if coupled else 0, dtype=float), (T,))
+    lam = np.zeros(T)                                   # Multiplikator der Kopplung (Preisverschiebung)
+
+    args = (pf.powerPlants,
+            {name : pf.results[name] for name in names},
+            {'co' : pf.coPrice, 'gas' : pf.gasPrice,
+             'lignite' : pf.lignitePrice, 'coal' : pf.coalPrice, 'nuc' : pf.nucPrice},
+            {'dt' : pf.dt, 'backend' : pf.backendName, 'compact' : pf.compact})
+    processes = mp.cpu_count() if processes is None else processes
+    # Feste Aufteilung der Kraftwerke auf Prozesse (je ein Pool mit einem Prozess), damit jedes
+    # Teilproblemmodell nur in einem Prozess aufgebaut und danach nur angepasst wird
+    workers = min(processes, len(names))
+    groups = [list(range(w, len(names), workers)) for w in range(workers)]
+    pools = []
+    if workers > 1:
+        pools = [mp.Pool(1, initializer=_init, initargs=args) for group in groups]
+    else:
+        _init(*args)
+
+    bound = np.inf                                      # beste (kleinste) Lagrange-Schranke
+    best = -np.inf                                      # beste zulässige Lösung
+    bestValues = None
+    theta = 2.0                                         # Schrittweitenfaktor (Polyak)
+    stall = 0
+    history = []
+    try:
+        for it in range(maxIter):
+            # Teilprobleme je Kraftwerk (parallel)
+            tasks = [(k, power - lam) for k in range(len(names))]
+            if len(pools) > 0:
+                pending = [pool.map_async(_solve, [tasks[k] for k in group]) for pool, group in zip(pools, groups)]
+                solved = [result for p in pending for result in p.get()]
+            else:
+                solved = [_solve(task) for task in tasks]
+            if any(values is None for k, objVal, objBound, values in solved):
+                raise RuntimeError('Fehler während der Optimierung eines Teilproblems')
+            values = {names[k] : v for k, objVal, objBound, v in solved}
+            total = np.sum([v['P'] for v in values.values()], axis=0)
+
+            # Lagrange-Schranke: Summe der Teilprobleme + lambda * cap
+            L = np.sum([objBound for k, objVal, objBound, v in solved]) + lam @ cap
+            if L < bound - 1e-9 * abs(L):
+                bound = L
+                stall = 0
+            else:
+                stall += 1
+
+            # Zulässige Lösung: Teillösungen direkt oder LP-Reparatur
+            if not coupled or _feasible(total, cap, sense):
+                primal, primalValues = sum(_objective(v, power) for v in values.values()), values
+            else:
+                primal, primalValues = _repair(pf, values, cap, sense)
+            if primal > best:
+                best, bestValues = primal, primalValues
+
+            gap = (bound - best) / max(abs(bound), 1) if np.isfinite(best) else np.inf
+            history.append({'iteration' : it,
+                            'bound'     : bound,
+                            'primal'    : best,
+                            'gap'       : gap,
+                            'time'      : time.perf_counter() - start})
+            if not coupled or gap <= gapTol or time.perf_counter() - start > timeLimit:
+                break
+
+            # Subgradientenschritt: g = cap - Gesamtleistung, Projektion auf zulässige Vorzeichen von lambda
+            g = cap - total
+            if stall >= 3:
+                theta /= 2
+                stall = 0
+            target = best if np.isfinite(best) else L - max(abs(L), 1) * 0.05
+            step = theta * (L - target) / max(g @ g, 1e-9)
+            lam = lam - step * g
+            if sense == '<':
+                lam = np.maximum(lam, 0)
+            if sense == '>':
+                lam = np.minimum(lam, 0)
+    finally:
+        for pool in pools:
+            pool.close()
+            pool.join()
+        _worker.clear()
+
+    # Fahrpläne der besten zulässigen Lösung (Index: Kraftwerk, Zeitschritt)
+    schedule = pd.DataFrame()
+    if bestValues is not None:
+        schedule = pd.concat([pd.DataFrame(bestValues[name],
+                                           index=pd.MultiIndex.from_product([[name], np.arange(T)],
+                                                                            names=['plant', 't']))
+                              for name in names])
+
+    return {'objective'  : best,
+            'bound'      : bound,
+            'gap'        : history[-1]['gap'] if len(history) > 0 else np.inf,
+            'iterations' : len(history),
+            'lambda'     : lam,
+            'schedule'   : schedule,
+            'history'    : pd.DataFrame(history)}
+
+
+if __name__ == "__main__":
+
+    import benchmark
+
+    powerPlants, prices = benchmark.syntheticPortfolio(20, 4, 96, 0.25)
+    pf = powerPlantPortfolio(dt=0.25, backend='highs', compact=True)
+    pf.setPrices(prices['power'], prices['co'], prices['gas'], prices['lignite'], prices['coal'], prices['nuc'])
+    for powerPlant in powerPlants:
+        pf.addPowerPlant(powerPlant)
+    # Netzanschluss des Portfolios begrenzt die Gesamtleistung (ca. 11 GW installiert, cap bindet)
+    result = solveDecomposed(pf, cap=3000, sense='<', maxIter=30)
+    print(result['history'])
+    print('Gewinn %.0f, Schranke %.0f, Lücke %.3f%%' % (result['objective'], result['bound'], 100 * result['gap']))
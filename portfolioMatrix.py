@@ -0,0 +1,376 @@
+#-----------------------------------------------------------------------------
+#
+# Autor: Christian Rieke
+# Datum: 17.10.2026
+#
+# Beschreibung: Matrixaufbau der Kraftwerksnebenbedingungen
+#
+#               Jedes Kraftwerk wird als ein Block über den gesamten
+#               Optimierungshorizont aufgebaut. Die Variablen eines Blocks
+#               liegen familienweise hintereinander (z.B. P[0..T-1],
+#               F[0..T-1], ...), die Nebenbedingungen als dünnbesetzte
+#               Matrix A mit Relation (sense) und rechter Seite (rhs).
+#
+# Letzte Änderung:
+#
+#           17.10.2026  Blöcke für konv. Kraftwerke und Speicher
+#           17.10.2026  Startzustand über Variablengrenzen, Zeitfenster (offset)
+#           17.10.2026  Aufbau des Gesamtproblems für die Solver-Backends (assemble)
+#           17.10.2026  Kompakte Lauf-/Stillstandszeiten mit Start-/Stoppvariablen
+#           17.10.2026  Speicher mit Zeitschritten unterschiedlicher Länge (length), Gewichte (weight)
+#           17.10.2026  Lauf-/Stillstandszeiten am Übergang in den ersten Zeitschritt (Fensternaht)
+#           17.10.2026  Fensterabhängige Werte (Preise, Startzustand, Wärme) mit Indizes im Gesamtproblem
+#
+#-----------------------------------------------------------------------------
+
+# Laden der Abhängigkeiten
+import numpy as np
+import scipy.sparse as sp
+
+# Variablenfamilien je Kraftwerkstyp (Reihenfolge = Spaltenblöcke)
+convVars = ['P', 'F', 'E', 'Profit', 'On']
+compactVars = ['Start', 'Stop']                         # zusätzlich bei kompakten Lauf-/Stillstandszeiten
+storageVars = ['P', 'V', 'P+', 'P-', 'On', 'Profit']
+
+
+class rowStack:
+
+        def __init__(self, T):
+
+            self.T = T                                  # Zeitschritte je Variablenfamilie
+            self.rows = []                              # Zeilenindizes der Koeffizienten
+            self.cols = []                              # Spaltenindizes der Koeffizienten
+            self.vals = []                              # Koeffizienten
+            self.sense = []                             # Relation je Zeile ('<','>','=')
+            self.rhs = []                               # rechte Seite je Zeile
+            self.n = 0                                  # Anzahl Zeilen
+
+            pass
+
+        def add(self, terms, sense, rhs): # Fügt eine Familie von Nebenbedingungen hinzu
+
+            # terms: Liste aus (Familie, Zeitschritte, Koeffizient[, Maske]) --> eine Zeile je Eintrag in rhs
+            #        Maske (optional): nur die markierten Zeilen erhalten den Term
+            rhs = np.asarray(rhs, dtype=float)
+            k = len(rhs)
+            rows = self.n + np.arange(k)
+            for term in terms:
+                family, steps, coef = term[:3]
+                where = term[3] if len(term) > 3 else np.ones(k, dtype=bool)
+                self.rows.append(rows[where])
+                self.cols.append(family * self.T + np.broadcast_to(np.asarray(steps), (k,))[where])
+                self.vals.append(np.broadcast_to(np.asarray(coef, dtype=float), (k,))[where])
+            self.sense.append(np.full(k, sense))
+            self.rhs.append(rhs)
+            self.n += k
+
+            return slice(self.n - k, self.n)
+
+        def matrix(self, nFamilies): # Dünnbesetzte Matrix der Nebenbedingungen
+
+            if self.n == 0:
+                return sp.csr_matrix((0, nFamilies * self.T)), np.array([], dtype='<U1'), np.array([])
+
+            A = sp.coo_matrix((np.concatenate(self.vals),
+                               (np.concatenate(self.rows), np.concatenate(self.cols))),
+                              shape=(self.n, nFamilies * self.T)).tocsr()
+
+            return A, np.concatenate(self.sense), np.concatenate(self.rhs)
+
+
+def fuelPrice(powerPlant, prices, T): # Brennstoffpreis je Zeitschritt für den Kraftwerkstyp
+
+    if powerPlant['fuel'] in ('lignite', 'coal', 'gas', 'nuc'):
+        return np.broadcast_to(np.asarray(prices[powerPlant['fuel']], dtype=float), (T,))[:T]
+
+    return None
+
+
+def window(series, offset, T): # Ausschnitt [offset, offset+T) einer Zeitreihe, am Ende mit dem letzten Wert aufgefüllt
+
+    series = np.asarray(series, dtype=float)[offset:offset + T]
+
+    return np.pad(series, (0, T - len(series)), mode='edge') if len(series) > 0 else series
+
+
+def windowIndex(coef, rhs, priceCols, boundCols): # Lage der fensterabhängigen Werte in einem Block
+
+    # coef: Zeilenbereiche mit Preiskoeffizient an priceCols (je Zeile ein Zeitschritt), rhs: Zeilenbereiche,
+    # boundCols: Spalten mit Grenzen aus dem Startzustand
+    return {'coefRows' : np.concatenate([np.arange(r.start, r.stop) for r in coef]),
+            'coefCols' : np.concatenate([priceCols for r in coef]),
+            'rhs'      : np.concatenate([np.arange(r.start, r.stop) for r in rhs]),
+            'bounds'   : np.asarray(boundCols, dtype=int)}
+
+
+def convWindow(powerPlant, state, prices, T, offset=0): # Fensterabhängige Werte eines konv. Kraftwerks
+
+    # coef: Preiskoeffizienten an P (Gewinn, [Brennstoff,] Emission)
+    # rhs : Startbedingungen, Übergang in den ersten Zeitschritt (Abschalten, Anfahren), [Wärmebedarf]
+    # lb/ub: Grenzen von On (Lauf-/Stillstandszeit aus der letzten Optimierung)
+    t = np.arange(T)
+    coef = [-np.asarray(prices['power'], dtype=float)[:T]]
+    price = fuelPrice(powerPlant, prices, T)
+    if price is not None:
+        coef.append(-price / powerPlant['eta'])
+    coef.append(-powerPlant['chi'] * np.asarray(prices['co'], dtype=float)[:T])
+    rhs = [np.array([state['P0'] + powerPlant['grad+']]),
+           np.array([state['P0'] - powerPlant['grad-']]),
+           np.full(len(t[1:max(powerPlant['stopTime'] - 1, 1)]), 0.0 if state['on'] > 0 else 1.0),
+           np.full(len(t[1:max(powerPlant['runTime'] - 1, 1)]), 0.0 if state['on'] < 0 else 1.0)]
+    if len(powerPlant['heat']) > 0:
+        rhs.append(window(powerPlant['heat'], offset, T))
+    lb = np.zeros(T)
+    ub = np.ones(T)
+    # Stillstandszeit aus der letzten Optimierung (als Grenze, damit die Struktur des Blocks gleich bleibt)
+    if state['on'] < 0:
+        ub[:min(max(powerPlant['stopTime'] + state['on'], 0), T)] = 0
+    # Laufzeit aus der letzten Optimierung
+    if state['on'] > 0:
+        lb[:min(max(powerPlant['runTime'] - state['on'], 0), T)] = 1
+
+    return {'coef': coef, 'rhs': rhs, 'lb': lb, 'ub': ub}
+
+
+def storageWindow(powerPlant, state, prices, T): # Fensterabhängige Werte eines Speichers
+
+    # coef: Preiskoeffizienten an P (Gewinn), rhs: Füllstand und Gradienten zu Beginn, keine Grenzen
+    rhs = [np.array([state['V0']]),
+           np.array([state['P+0'] + powerPlant['grad++']]),
+           np.array([state['P+0'] - powerPlant['grad+-']]),
+           np.array([state['P-0'] + powerPlant['grad-+']]),
+           np.array([state['P-0'] - powerPlant['grad--']])]
+
+    return {'coef': [-np.asarray(prices['power'], dtype=float)[:T]], 'rhs': rhs, 'lb': np.array([]), 'ub': np.array([])}
+
+
+def convBlock(powerPlant, state, prices, T, offset=0, compact=False): # Block eines konv. Kraftwerks
+
+    # compact: Lauf-/Stillstandszeiten über Start-/Stoppvariablen (eine Zeile je Zeitschritt)
+    families = convVars + compactVars if compact else convVars
+    P, F, E, Profit, On, Start, Stop = range(len(convVars + compactVars))
+    t = np.arange(T)
+    t1 = t[1:]
+    inf = np.inf
+    rs = rowStack(T)
+
+    # Grenzen und Typen der Variablen
+    lb = np.concatenate([np.zeros(T), np.full(T, -inf), np.zeros(T), np.full(T, -inf), np.zeros(T)])
+    ub = np.concatenate([np.full(T, inf), np.full(T, inf), np.full(T, inf), np.full(T, inf), np.ones(T)])
+    vtype = np.array(['C'] * (4 * T) + ['B'] * T)
+    if compact:
+        # Start/Stopp in [0,1] (ganzzahlig durch on), im ersten Zeitschritt ohne Übergang wie paarweise
+        lb = np.concatenate([lb, np.zeros(2 * T)])
+        ub = np.concatenate([ub, np.ones(2 * T)])
+        ub[[Start * T, Stop * T]] = 0
+        vtype = np.concatenate([vtype, np.full(2 * T, 'C')])
+
+    # Preise, Startzustand und Wärmebedarf des Fensters, Indizes für updateModel
+    w = convWindow(powerPlant, state, prices, T, offset)
+    coef, rhs = [], []
+    # Gewinnzeitreihe
+    coef.append(rs.add([(Profit, t, 1), (P, t, w['coef'][0])], '=', np.zeros(T)))
+    # Brennstoffkosten je Kraftwerkstyp
+    if len(w['coef']) > 2:
+        coef.append(rs.add([(F, t, 1), (P, t, w['coef'][1])], '=', np.zeros(T)))
+    # Emissionkosten
+    coef.append(rs.add([(E, t, 1), (P, t, w['coef'][-1])], '=', np.zeros(T)))
+    # Startbedingungen
+    rhs.append(rs.add([(P, [0], 1)], '<', w['rhs'][0]))
+    rhs.append(rs.add([(P, [0], 1)], '>', w['rhs'][1]))
+    # Gradienten
+    rs.add([(P, t1, 1), (P, t1 - 1, -1)], '<', np.full(T - 1, powerPlant['grad+']))
+    rs.add([(P, t1, 1), (P, t1 - 1, -1)], '>', np.full(T - 1, -powerPlant['grad-']))
+    # Wenn das Kraftwerk läuft --> [Pmin,Pmax]
+    rs.add([(P, t, 1), (On, t, -powerPlant['powerMin'])], '>', np.zeros(T))
+    rs.add([(P, t, 1), (On, t, -powerPlant['powerMax'])], '<', np.zeros(T))
+    # Lauf-/Stillstandszeit aus der letzten Optimierung als Grenzen von On
+    lb[On * T:(On + 1) * T] = w['lb']
+    ub[On * T:(On + 1) * T] = w['ub']
+    # Übergang in den ersten Zeitschritt gegen den Startzustand (Nahtstelle der Fenster)
+    # Abschalten in 0: on[k] <= on[0], Anfahren in 0: on[0] <= on[k]; sonst rechte Seite 1 (frei),
+    # damit die Struktur des Blocks gleich bleibt
+    k = t[1:max(powerPlant['stopTime'] - 1, 1)]
+    rhs.append(rs.add([(On, k, 1), (On, 0, -1)], '<', w['rhs'][2]))
+    k = t[1:max(powerPlant['runTime'] - 1, 1)]
+    rhs.append(rs.add([(On, 0, 1), (On, k, -1)], '<', w['rhs'][3]))
+    if compact:
+        # Übergang: on[i]-on[i-1] = start[i]-stop[i]
+        rs.add([(On, t1, 1), (On, t1 - 1, -1), (Start, t1, -1), (Stop, t1, 1)], '=', np.zeros(T - 1))
+        # Stillstandszeit: Summe stop[i-stopTime+2..i] <= 1-on[i]
+        terms = [(On, t1, 1)] + [(Stop, t1 - d, 1, t1 - d >= 1) for d in range(powerPlant['stopTime'] - 1)]
+        if powerPlant['stopTime'] > 2:
+            rs.add(terms, '<', np.ones(T - 1))
+        # Laufzeit: Summe start[i-runTime+2..i] <= on[i]
+        terms = [(On, t1, -1)] + [(Start, t1 - d, 1, t1 - d >= 1) for d in range(powerPlant['runTime'] - 1)]
+        if powerPlant['runTime'] > 2:
+            rs.add(terms, '<', np.zeros(T - 1))
+    else:
+        # Stillstandszeit: on[i-1]-on[i]+on[k] <= 1 für k in [i+1, i+stopTime-1)
+        for d in range(1, powerPlant['stopTime'] - 1):
+            i = t1[t1 + d < T]
+            rs.add([(On, i - 1, 1), (On, i, -1), (On, i + d, 1)], '<', np.ones(len(i)))
+        # Laufzeit: on[i]-on[i-1]-on[k] <= 0 für k in [i+1, i+runTime-1)
+        for d in range(1, powerPlant['runTime'] - 1):
+            i = t1[t1 + d < T]
+            rs.add([(On, i, 1), (On, i - 1, -1), (On, i + d, -1)], '<', np.zeros(len(i)))
+    # Wärmebedarf
+    if len(powerPlant['heat']) > 0:
+        rhs.append(rs.add([(P, t, 1)], '>', w['rhs'][4]))
+
+    A, sense, b = rs.matrix(len(families))
+
+    return {'vars': families, 'lb': lb, 'ub': ub, 'vtype': vtype,
+            'A': A, 'sense': sense, 'rhs': b, 'window': windowIndex(coef, rhs, P * T + t, On * T + t)}
+
+
+def storageBlock(powerPlant, state, prices, T, dt, offset=0, length=None): # Block eines Speichers
+
+    # length: Länge der Zeitschritte in dt (Segmente, skaliert die Füllstandsänderung), None = 1
+    #         Gradienten gelten weiter je dt, damit der Fahrplan in voller Auflösung zulässig bleibt
+    length = np.ones(T) if length is None else np.asarray(length, dtype=float)
+    P, V, Pp, Pm, On, Profit = range(len(storageVars))
+    t = np.arange(T)
+    t1 = t[1:]
+    inf = np.inf
+    rs = rowStack(T)
+
+    # Grenzen und Typen der Variablen
+    lb = np.concatenate([np.full(T, -inf), np.full(T, powerPlant['VMin'], dtype=float),
+                         np.zeros(T), np.zeros(T), np.zeros(T), np.full(T, -inf)])
+    ub = np.concatenate([np.full(T, inf), np.full(T, powerPlant['VMax'], dtype=float),
+                         np.full(T, powerPlant['P+_Max'], dtype=float), np.full(T, powerPlant['P-_Max'], dtype=float),
+                         np.ones(T), np.full(T, inf)])
+    vtype = np.array(['C'] * (4 * T) + ['B'] * T + ['C'] * T)
+
+    charge = dt * length * powerPlant['eta+']           # Füllstandsänderung je MW Ladeleistung
+    discharge = dt * length / powerPlant['eta-']        # Füllstandsänderung je MW Entladeleistung
+
+    # Leistung, die dem Portfolio hinzugefügt wird
+    rs.add([(P, t, 1), (Pp, t, 1), (Pm, t, -1)], '=', np.zeros(T))
+    # maximale und minimale Ladeleistung
+    rs.add([(Pp, t, 1), (On, t, -powerPlant['P+_Max'])], '<', np.zeros(T))
+    rs.add([(Pp, t, 1), (On, t, -powerPlant['P+_Min'])], '>', np.zeros(T))
+    # maximale und minimale Entladeleistung
+    rs.add([(Pm, t, 1), (On, t, powerPlant['P-_Max'])], '<', np.full(T, powerPlant['P-_Max']))
+    rs.add([(Pm, t, 1), (On, t, powerPlant['P-_Min'])], '>', np.full(T, powerPlant['P-_Min']))
+    # Preise und Startzustand des Fensters, Indizes für updateModel
+    w = storageWindow(powerPlant, state, prices, T)
+    rhs = []
+    # Speicherfüllstand zu Beginn
+    rhs.append(rs.add([(V, [0], 1), (Pp, [0], -charge[0]), (Pm, [0], discharge[0])], '=', w['rhs'][0]))
+    # weitere Speicherfüllstände
+    rs.add([(V, t1, 1), (V, t1 - 1, -1), (Pp, t1, -charge[t1]), (Pm, t1, discharge[t1])], '=', np.zeros(T - 1))
+    # Gewinnzeitreihe
+    coef = [rs.add([(Profit, t, 1), (P, t, w['coef'][0])], '=', np.zeros(T))]
+    # Gradienten Laden
+    rhs.append(rs.add([(Pp, [0], 1)], '<', w['rhs'][1]))
+    rhs.append(rs.add([(Pp, [0], 1)], '>', w['rhs'][2]))
+    rs.add([(Pp, t1, 1), (Pp, t1 - 1, -1)], '<', np.full(T - 1, powerPlant['grad++']))
+    rs.add([(Pp, t1, 1), (Pp, t1 - 1, -1)], '>', np.full(T - 1, -powerPlant['grad+-']))
+    # Gradienten Entladen
+    rhs.append(rs.add([(Pm, [0], 1)], '<', w['rhs'][3]))
+    rhs.append(rs.add([(Pm, [0], 1)], '>', w['rhs'][4]))
+    rs.add([(Pm, t1, 1), (Pm, t1 - 1, -1)], '<', np.full(T - 1, powerPlant['grad-+']))
+    rs.add([(Pm, t1, 1), (Pm, t1 - 1, -1)], '>', np.full(T - 1, -powerPlant['grad--']))
+
+    A, sense, b = rs.matrix(len(storageVars))
+
+    return {'vars': storageVars, 'lb': lb, 'ub': ub, 'vtype': vtype,
+            'A': A, 'sense': sense, 'rhs': b, 'window': windowIndex(coef, rhs, P * T + t, np.array([], dtype=int))}
+
+
+def assemble(blocks, prices, T, weight=None): # Gesamtproblem aus den Kraftwerksblöcken und den Portfoliosummen
+
+    # blocks: Liste aus (Name, Block). Spalten: Blöcke hintereinander, dann P, F, E (je T) und Profit (1)
+    # weight: Gewicht der Zeitschritte in der Zielfunktion (repräsentative Perioden, Segmente), None = 1
+    weight = np.ones(T) if weight is None else np.asarray(weight, dtype=float)
+    layout = []                                         # (Variablenname, Form) je Variablenfamilie
+    cols = {}                                           # Spalten je Kraftwerk und Familie
+    n = 0
+    for name, block in blocks:
+        cols[name] = {}
+        for family in block['vars']:
+            cols[name][family] = slice(n, n + T)
+            layout.append((family + '_' + name, T))
+            n += T
+    totals = {}
+    for family in ('P', 'F', 'E'):
+        totals[family] = slice(n, n + T)
+        layout.append((family, T))
+        n += T
+    totals['Profit'] = slice(n, n + 1)
+    layout.append(('Profit', ()))
+    n += 1
+
+    # Portfoliosummen: P - Summe P_Kraftwerk = 0 (analog F, E)
+    rows, colsIdx, vals = [], [], []
+    for k, family in enumerate(('P', 'F', 'E')):
+        r = k * T + np.arange(T)
+        rows.append(r); colsIdx.append(np.arange(totals[family].start, totals[family].stop)); vals.append(np.ones(T))
+        for name, block in blocks:
+            if family in cols[name]:
+                rows.append(r); colsIdx.append(np.arange(cols[name][family].start, cols[name][family].stop))
+                vals.append(-np.ones(T))
+    # Gewinn des Portfolios: Profit - Strompreis * P = 0
+    rows.append(np.full(T + 1, 3 * T))
+    colsIdx.append(np.concatenate([[totals['Profit'].start], np.arange(totals['P'].start, totals['P'].stop)]))
+    vals.append(np.concatenate([[1.0], -np.asarray(prices['power'], dtype=float)[:T] * weight]))
+    portfolio = sp.coo_matrix((np.concatenate(vals), (np.concatenate(rows), np.concatenate(colsIdx))),
+                              shape=(3 * T + 1, n)).tocsr()
+
+    # Kraftwerksblöcke auf der Diagonalen, darunter die Portfoliozeilen
+    A = sp.vstack([sp.block_diag([block['A'] for name, block in blocks] + [sp.csr_matrix((0, 3 * T + 1))]),
+                   portfolio], format='csr')
+
+    # Fensterabhängige Werte der Blöcke und der Gewinnzeile (Preis) im Gesamtproblem
+    r0 = np.cumsum([0] + [block['A'].shape[0] for name, block in blocks])
+    c0 = [cols[name][block['vars'][0]].start for name, block in blocks]
+    index = [block['window'] for name, block in blocks]
+    coefRows = np.concatenate([w['coefRows'] + r for w, r in zip(index, r0)] + [np.full(T, r0[-1] + 3 * T)])
+    coefCols = np.concatenate([w['coefCols'] + c for w, c in zip(index, c0)]
+                              + [np.arange(totals['P'].start, totals['P'].stop)])
+    # Position der Einträge in A.data (Zeilen und Spalten in A sortiert)
+    A.sort_indices()
+    keys = np.repeat(np.arange(A.shape[0], dtype=np.int64), np.diff(A.indptr)) * A.shape[1] + A.indices
+    data = np.searchsorted(keys, coefRows.astype(np.int64) * A.shape[1] + coefCols)
+    if np.any(keys[np.minimum(data, len(keys) - 1)] != coefRows.astype(np.int64) * A.shape[1] + coefCols):
+        raise ValueError('Preiskoeffizient fehlt in der Matrix')
+    window = {'coefRows' : coefRows,
+              'coefCols' : coefCols,
+              'data'     : data,
+              'rhs'      : np.concatenate([w['rhs'] + r for w, r in zip(index, r0)] + [np.array([], dtype=int)]),
+              'bounds'   : np.concatenate([w['bounds'] + c for w, c in zip(index, c0)] + [np.array([], dtype=int)])}
+
+    inf = np.inf
+    # Zielfunktion --> Maximiere Profit - Summe(F - E)
+    c = np.zeros(n)
+    c[totals['Profit']] = 1
+    c[totals['F']] = -weight
+    c[totals['E']] = weight
+
+    return {'c'      : c,
+            'A'      : A,
+            'sense'  : np.concatenate([block['sense'] for name, block in blocks] + [np.full(3 * T + 1, '=')]),
+            'rhs'    : np.concatenate([block['rhs'] for name, block in blocks] + [np.zeros(3 * T + 1)]),
+            'lb'     : np.concatenate([block['lb'] for name, block in blocks] + [np.full(3 * T + 1, -inf)]),
+            'ub'     : np.concatenate([block['ub'] for name, block in blocks] + [np.full(3 * T + 1, inf)]),
+            'vtype'  : np.concatenate([block['vtype'] for name, block in blocks] + [np.full(3 * T + 1, 'C')]),
+            'layout' : layout,
+            'cols'   : cols,
+            'totals' : totals,
+            'window' : window,
+            'T'      : T}
+
+
+def windowValues(windows, prices, T, weight=None): # Fensterabhängige Werte in der Reihenfolge von problem['window']
+
+    # windows: convWindow/storageWindow je Kraftwerk in der Reihenfolge der Blöcke
+    weight = np.ones(T) if weight is None else np.asarray(weight, dtype=float)
+    coef = [c for w in windows for c in w['coef']] + [-np.asarray(prices['power'], dtype=float)[:T] * weight]
+    rhs = [r for w in windows for r in w['rhs']]
+
+    return {'coef' : np.concatenate(coef),
+            'rhs'  : np.concatenate(rhs + [np.array([])]),
+            'lb'   : np.concatenate([w['lb'] for w in windows] + [np.array([])]),
+            'ub'   : np.concatenate([w['ub'] for w in windows] + [np.array([])])}
@@ -8,22 +8,58 @@
 # Letzte Änderung:
 #
 #           21.10.2018  Aufbau der Klasse --> Ziel: einfache Optimierung
+#           17.10.2026  Matrixaufbau der Nebenbedingungen (portfolioMatrix)
+#           17.10.2026  Variablenregister je Kraftwerk (plantVars)
+#           17.10.2026  Spaltenweise Ergebnisabfrage (schedule)
+#           17.10.2026  Rollierender Horizont auf einem bestehenden Modell (updateModel, runRolling)
+#           17.10.2026  Solver-Backends (Gurobi, HiGHS) für den Matrixaufbau
+#           17.10.2026  Kompakte Lauf-/Stillstandszeiten (compact)
+#           17.10.2026  Gesamtproblem ohne Solver abrufbar (buildProblem)
+#           17.10.2026  Geprüfte Kraftwerksdatensätze (plantDatabase)
+#           17.10.2026  Phasenzeiten und Optimierungsverlauf (telemetry), Logging statt print
+#           17.10.2026  Zeitschritte unterschiedlicher Länge und Gewichte (setResolution)
+#           17.10.2026  Checkpoints der Startzustände und des rollierenden Horizonts
+#           17.10.2026  Fenster optimieren und Zeitschritte getrennt übernehmen (optimizeWindow, commit)
+#           17.10.2026  updateModel ohne Neuaufbau, nur fensterabhängige Werte (portfolioMatrix.windowValues)
+#           17.10.2026  Aufbau je Zeitschritt: Übergang in den ersten Zeitschritt wie im Matrixaufbau
 # 
 #-----------------------------------------------------------------------------
 
 # Laden der Abhängigkeiten
 import numpy as np
-from gurobipy import *
+try:
+    from gurobipy import *
+    gurobi = True
+except ImportError:                                     # ohne Gurobi nur Matrixaufbau mit backend='highs'
+    gurobi = False
 import matplotlib.pyplot as plt
 import pandas as pd
+import portfolioMatrix as pm
+import solverBackend as sb
+import plantDatabase as pdb
+import checkpoint as ckpt
+from telemetry import telemetry, log
+
+# Startzustände je Kraftwerk für die nächste Optimierung (Checkpoints)
+stateKeys = ['P0', 'on', 'P+0', 'P-0', 'V0']
 
 class powerPlantPortfolio:
     
-        def __init__(self,dt=0.25):
+        def __init__(self,dt=0.25,matrix=True,backend='gurobi',compact=False):
 
-            self.m = Model('portfolio')                 # Anlegen eines Models ins Gurobi    
-            self.m.Params.OutputFlag=0                  # keine Ausgabe der Optimierungsergebnisse
+            if not matrix and backend != 'gurobi':
+                raise ValueError('Aufbau je Zeitschritt (matrix=False) nur mit Gurobi')
+            if not matrix and compact:
+                raise ValueError('Kompakte Lauf-/Stillstandszeiten (compact=True) nur mit Matrixaufbau')
+            
+            self.backendName = backend                  # Solver für den Matrixaufbau ('gurobi', 'highs')
+            self.backend = None                         # Backend mit dem geladenen Problem
+            self.problem = None                         # Gesamtproblem als dünnbesetzte Matrizen
+            self.x = None                               # Lösung über alle Spalten des Gesamtproblems
+            self.m = self.__newModel() if backend == 'gurobi' else None     # Anlegen eines Models ins Gurobi    
             self.dt = dt                                # Zeitschrittweite/ Auflösung
+            self.matrix = matrix                        # Aufbau der NB als Matrixblöcke (sonst je Zeitschritt)
+            self.compact = compact                      # Lauf-/Stillstandszeiten mit Start-/Stoppvariablen
             self.powerPlants = []                       # Anlegen einer Liste mit allen Kraftwerken im Portfolio
             
             self.powerPrice = []                        # Preiszeitreihe Strom
@@ -35,13 +71,30 @@ class powerPlantPortfolio:
             
             self.T = 0                                  # zu berechnennde Zeitschritte
             self.t = np.arange(self.T)                  # Zeitschritte [0,1,2,3,...]
+            self.offset = 0                             # Beginn des Zeitfensters in den Zeitreihen der Kraftwerke (Wärme)
+            self.length = None                          # Länge der Zeitschritte in dt (None = 1)
+            self.weight = None                          # Gewicht der Zeitschritte in der Zielfunktion (None = 1)
             
             self.results = {}                           # Ergebnisse der Optimierung
+            self.plantVars = {}                         # Variablen je Kraftwerk {name : {'P' : ..., 'On' : ...}}
+            self.schedule = pd.DataFrame()              # Fahrpläne als Tabelle (Index: Kraftwerk, Zeitschritt)
+            self.solution = {}                          # Lösung des letzten Fensters je Kraftwerk
+            self.telemetry = telemetry()                # Phasenzeiten, Modellgrößen, Optimierungsverlauf
 
-            print('Portfolio initialisiert')
+            log.info('Portfolio initialisiert')
             
             pass
         
+        def __newModel(self): # Neues, leeres Gurobi-Modell
+            
+            if not gurobi:
+                raise ImportError('gurobipy ist nicht installiert, powerPlantPortfolio(backend="highs") verwenden')
+            
+            m = Model('portfolio')
+            m.Params.OutputFlag=0                       # keine Ausgabe der Optimierungsergebnisse
+            
+            return m
+        
         def setPrices(self, power,co,gas,lignite,coal,nuc): # Setzen der Preise und Länge der Optimierung
             
             # --> Preise
@@ -55,12 +108,27 @@ class powerPlantPortfolio:
             self.T = len(power)
             self.t = np.arange(self.T)
             
-            print('Preise und Zeitschritte gesetzt')
+            log.info('Preise und Zeitschritte gesetzt (%i Zeitschritte)', self.T)
             
             pass
         
-        def addPowerPlant(self,powerPlant): # Fügt ein Kraftwerk zum Portfolio hinzu
+        def setResolution(self,length=None,weight=None): # Zeitschritte unterschiedlicher Länge und Gewichte (nach setPrices)
+            
+            # length: Länge je Zeitschritt in dt (Segmente), weight: Gewicht je Zeitschritt in der Zielfunktion
+            # (Länge x Häufigkeit einer repräsentativen Periode), None = 1
+            for values in (length, weight):
+                if values is not None and len(values) != self.T:
+                    raise ValueError('%i Werte für %i Zeitschritte' % (len(values), self.T))
+            self.length = None if length is None else np.asarray(length, dtype=float)
+            self.weight = None if weight is None else np.asarray(weight, dtype=float)
             
+            pass
+        
+        def addPowerPlant(self,powerPlant): # Fügt ein Kraftwerk zum Portfolio hinzu (dict oder Datensatz aus plantDatabase)
+
+            # Prüfung der Schlüssel und Werte (Fehler hier statt beim Modellaufbau)
+            powerPlant = pdb.toRecord(powerPlant).asDict()
+
             # Eintrag zur Kraftwerksliste hinzufügen
             self.powerPlants.append(powerPlant)
             
@@ -85,7 +153,7 @@ class powerPlantPortfolio:
                 
             self.results.update({powerPlant['name'] : result})
             
-            print('Kraftwerk ' + powerPlant['name'] + ' hinzugefügt')
+            log.info('Kraftwerk %s hinzugefügt', powerPlant['name'])
             
             pass
         
@@ -145,17 +213,27 @@ class powerPlantPortfolio:
                 end = np.min([i+powerPlant['runTime']-1,self.T])
                 tau = np.arange(start,end)
                 self.m.addConstrs(on[i]-on[i-1] <= on[k] for k in tau)
+            # Übergang in den ersten Zeitschritt gegen den Zustand aus der letzten Optimierung, wie im Matrixaufbau
+            # immer vorhanden und mit rechter Seite 1 inaktiv (gleiche Nebenbedingungen in beiden Aufbauarten)
+            stop = 0 if self.results[name]['on'] > 0 else 1
+            self.m.addConstrs(on[k]-on[0] <= stop for k in np.arange(1, np.min([max(powerPlant['stopTime']-1,1),self.T])))
+            run = 0 if self.results[name]['on'] < 0 else 1
+            self.m.addConstrs(on[0]-on[k] <= run for k in np.arange(1, np.min([max(powerPlant['runTime']-1,1),self.T])))
                 
             if len(powerPlant['heat']) > 0:
-                print(powerPlant['heat'])
                 self.m.addConstrs(power[i] >= powerPlant['heat'][i] for i in self.t)
             
-            
+            # Variablen des Kraftwerks im Register ablegen
+            self.plantVars[name] = {'P'      : power,
+                                    'F'      : fuel,
+                                    'E'      : emission,
+                                    'Profit' : profit,
+                                    'On'     : on}
             
             # Einbinden der NB in das Model
             self.m.update()
             
-            print('Nebenbedingungen für ' + name + ' hinzugefügt')
+            log.debug('Nebenbedingungen für %s hinzugefügt', name)
             
             pass
         
@@ -206,33 +284,123 @@ class powerPlantPortfolio:
             self.m.addConstr(pM[0] >= self.results[name]['P-0'] - powerPlant['grad--'])
             self.m.addConstrs(pM[i] <= pM[i-1]+powerPlant['grad-+'] for i in self.t[1:])
             self.m.addConstrs(pM[i] >= pM[i-1]-powerPlant['grad--'] for i in self.t[1:])
+            # Variablen des Speichers im Register ablegen
+            self.plantVars[name] = {'P'      : power,
+                                    'V'      : volume,
+                                    'P+'     : pP,
+                                    'P-'     : pM,
+                                    'On'     : on,
+                                    'Profit' : profit}
             # Einbinden der NB in das Model
             self.m.update()
             
-            print('Nebenbedingungen für ' + name + ' hinzugefügt')
+            log.debug('Nebenbedingungen für %s hinzugefügt', name)
             
             pass
 
-        def buildModel(self): # Aufbau des Optimierungsmodells
-            # Füge für jedes Kraftwerk im Portfolio die Nebenbedingungen hinzu
+        def __prices(self): # Preise als Arrays für den Matrixaufbau
+            
+            return {'power'   : np.asarray(self.powerPrice, dtype=float),
+                    'co'      : np.asarray(self.coPrice, dtype=float),
+                    'gas'     : np.asarray(self.gasPrice, dtype=float),
+                    'lignite' : self.lignitePrice,
+                    'coal'    : self.coalPrice,
+                    'nuc'     : self.nucPrice}
+        
+        def __block(self,powerPlant): # Matrixblock eines Kraftwerks mit aktuellen Preisen und Startzustand
+            
+            name = powerPlant['name']   # --> Name des Kraftwerks
+            
+            if powerPlant['typ'] == 'konv':
+                return pm.convBlock(powerPlant, self.results[name], self.__prices(), self.T, self.offset, self.compact)
+            if powerPlant['typ'] == 'storage':
+                return pm.storageBlock(powerPlant, self.results[name], self.__prices(), self.T, self.dt, self.offset,
+                                       self.length)
+        
+        def __window(self): # Preise, Startzustände und Wärmebedarf des Fensters in der Reihenfolge von problem['window']
+            
+            prices = self.__prices()
+            windows = []
             for powerPlant in self.powerPlants:
+                name = powerPlant['name']
                 if powerPlant['typ'] == 'konv':
-                    self.__addconvPlant(powerPlant)
+                    windows.append(pm.convWindow(powerPlant, self.results[name], prices, self.T, self.offset))
                 if powerPlant['typ'] == 'storage':
-                    self.__addStorage(powerPlant)
+                    windows.append(pm.storageWindow(powerPlant, self.results[name], prices, self.T))
+            
+            return pm.windowValues(windows, prices, self.T, self.weight)
+        
+        def __family(self,family): # Variablen einer Familie über alle Kraftwerke aus dem Register
+            
+            return [v[family] for v in self.plantVars.values() if family in v]
+        
+        def buildProblem(self): # Gesamtproblem aus den Blöcken aller Kraftwerke (ohne Solver)
+            
+            blocks = []
+            for powerPlant in self.powerPlants:
+                with self.telemetry.phase('block', powerPlant['name']):
+                    blocks.append((powerPlant['name'], self.__block(powerPlant)))
+            with self.telemetry.phase('assemble'):
+                problem = pm.assemble(blocks, self.__prices(), self.T, self.weight)
+            self.telemetry.count(rows=problem['A'].shape[0], cols=problem['A'].shape[1], nonzeros=problem['A'].nnz,
+                                 binaries=int(np.sum(problem['vtype'] == 'B')))
+            
+            return problem
+        
+        def __buildModelMatrix(self): # Aufbau des Optimierungsmodells aus Matrixblöcken
+            
+            self.problem = self.buildProblem()
+            with self.telemetry.phase('load'):
+                if self.backendName == 'gurobi':
+                    self.backend = sb.gurobiBackend(self.problem, self.m)
+                else:
+                    self.backend = sb.backends[self.backendName](self.problem)
+            
+            # Variablen je Kraftwerk im Register ablegen (Gurobi: MVar, HiGHS: Spaltenbereich)
+            for powerPlant in self.powerPlants:
+                name = powerPlant['name']
+                self.plantVars[name] = {family : self.backend.handle(cols)
+                                        for family, cols in self.problem['cols'][name].items()}
+                log.debug('Nebenbedingungen für %s hinzugefügt', name)
+            
+            pass
+
+        def buildModel(self): # Aufbau des Optimierungsmodells (Phase build)
+
+            with self.telemetry.phase('build'):
+                self.__buildModel()
+
+            pass
+
+        def __buildModel(self):
+            # Bereits aufgebautes Modell verwerfen, damit sich keine NB anhäufen
+            if self.m is not None and self.m.NumVars > 0:
+                self.m.dispose()
+                self.m = self.__newModel()
+            self.plantVars = {}
+            if self.matrix:
+                self.__buildModelMatrix()
+                return
+            # Füge für jedes Kraftwerk im Portfolio die Nebenbedingungen hinzu
+            for powerPlant in self.powerPlants:
+                with self.telemetry.phase('block', powerPlant['name']):
+                    if powerPlant['typ'] == 'konv':
+                        self.__addconvPlant(powerPlant)
+                    if powerPlant['typ'] == 'storage':
+                        self.__addStorage(powerPlant)
 
             # Gesamtleistung im Portfolio
             power = self.m.addVars(self.t,vtype=GRB.CONTINUOUS, name='P', lb=-GRB.INFINITY,ub=GRB.INFINITY)
-            pPower = [x for x in self.m.getVars() if 'P_' in x.VarName]
-            self.m.addConstrs(power[i] == quicksum(p for p in pPower if '[%i]' %i in p.VarName) for i in self.t) 
+            pPower = self.__family('P')
+            self.m.addConstrs(power[i] == quicksum(p[i] for p in pPower) for i in self.t) 
             # Brennstoffkosten im Portfolio
             fuel = self.m.addVars(self.t,vtype=GRB.CONTINUOUS, name='F',  lb=-GRB.INFINITY,ub=GRB.INFINITY)
-            pFuel = [x for x in self.m.getVars() if 'F_' in x.VarName]
-            self.m.addConstrs(fuel[i] == quicksum(f for f in pFuel if '[%i]' %i in f.VarName) for i in self.t)
+            pFuel = self.__family('F')
+            self.m.addConstrs(fuel[i] == quicksum(f[i] for f in pFuel) for i in self.t)
             # Emissionskosten im Portfolio
             emission = self.m.addVars(self.t,vtype=GRB.CONTINUOUS, name='E', lb=-GRB.INFINITY,ub=GRB.INFINITY)
-            pEmssion = [x for x in self.m.getVars() if 'E_' in x.VarName]
-            self.m.addConstrs(emission[i] == quicksum(e for e in pEmssion if '[%i]' %i in e.VarName) for i in self.t)
+            pEmssion = self.__family('E')
+            self.m.addConstrs(emission[i] == quicksum(e[i] for e in pEmssion) for i in self.t)
             # Gewinn des Portfolios
             profit = self.m.addVar(vtype=GRB.CONTINUOUS, name='Profit', lb=-GRB.INFINITY,ub=GRB.INFINITY)
             self.m.addConstr(profit == quicksum(power[i] * self.powerPrice[i] for i in self.t))
@@ -240,83 +408,252 @@ class powerPlantPortfolio:
             self.m.setObjective(profit - quicksum(fuel[i] - emission[i] for i in self.t) ,GRB.MAXIMIZE)
             # Einbinden der NB in das Model
             self.m.update()
+            self.telemetry.count(rows=self.m.NumConstrs, cols=self.m.NumVars, nonzeros=self.m.NumNZs,
+                                 binaries=self.m.NumBinVars)
 
             pass
         
-        def __getResults(self):
+        def updateModel(self): # Aktualisiert Preise, Startzustände und Wärmebedarf im bestehenden Modell
+            
+            # Ohne Matrixblöcke gibt es nichts zu aktualisieren --> neu aufbauen
+            if not self.matrix:
+                self.buildModel()
+                return
+            
+            # Nur die Preiskoeffizienten, rechten Seiten (Startzustand, Wärme) und Grenzen aus problem['window']
+            # übernehmen, ohne das Gesamtproblem neu aufzubauen (self.problem wird dabei mit aktualisiert)
+            with self.telemetry.phase('update'):
+                self.backend.update(self.__window())
+            
+            pass
+        
+        def __optimize(self): # Optimierung mit dem Backend (Matrixaufbau) oder direkt mit Gurobi, True wenn optimal
+            
+            if self.matrix:
+                with self.telemetry.phase('solve'):
+                    optimal = self.backend.optimize()
+                    self.x = self.backend.values() if optimal else None
+                self.telemetry.count(status=self.backend.status, objective=self.backend.objVal,
+                                     bound=self.backend.objBound, presolve=self.backend.presolve)
+                self.telemetry.trace(self.backend.progress)
+                return optimal
+            
+            with self.telemetry.phase('solve'):
+                self.m.optimize()
+            optimal = self.m.Status == GRB.OPTIMAL
+            self.telemetry.count(status=self.m.Status, objective=self.m.ObjVal if optimal else np.nan)
+            
+            return optimal
+        
+        def __values(self,name): # Lösungswerte aller Variablenblöcke eines Kraftwerks als Arrays
+            
+            # Matrixaufbau: Ausschnitte aus der Lösung über alle Spalten
+            if self.matrix:
+                return {family : self.x[cols] for family, cols in self.problem['cols'][name].items()}
+            # Aufbau je Zeitschritt: ein Aufruf je Variablenblock
+            return {family : np.fromiter(self.m.getAttr('X', handle).values(), dtype=float, count=self.T)
+                    for family, handle in self.plantVars[name].items()}
+        
+        def __onState(self,onTs,on0): # Betriebszustand am Ende: +Zeitschritte in Betrieb, -Zeitschritte im Stillstand
+            
+            onTs = np.round(onTs)
+            switches = np.flatnonzero(np.diff(onTs))
+            # kein Wechsel --> Zustand aus der letzten Optimierung fortschreiben
+            if len(switches) == 0:
+                if onTs[-1] == 1:
+                    return on0 + len(onTs) if on0 > 0 else len(onTs)
+                return on0 - len(onTs) if on0 < 0 else -len(onTs)
+            # sonst Zeitschritte seit dem letzten Wechsel
+            steps = len(onTs) - switches[-1] - 1
+            
+            return steps if onTs[-1] == 1 else -steps
+        
+        def __getResults(self,n=None,state=True):
+
+            with self.telemetry.phase('extract'):
+                self.__extract(n,state)
+
+            pass
+
+        def __extract(self,n=None,state=True):
             
+            # state: Zustand nach dem letzten übernommenen Zeitschritt als Startzustand übernehmen
+
+            n = self.T if n is None else n                  # übernommene Zeitschritte (rollierender Horizont)
+            frames = []                                     # Spaltenweise Ergebnisse je Kraftwerk
             for powerPlant in self.powerPlants:
                 name = powerPlant['name']                   # Names des KW
                 typ = powerPlant['typ']                     # Typ des KW
-                # Ergebnisse für konv. Kraftwerke
+                # Abfrage der Optimierungsergebnisse je Variablenblock
+                values = self.__values(name)
+                self.solution[name] = values
+                frames.append(pd.DataFrame({family : v[:n] for family, v in values.items()},
+                                           index=pd.MultiIndex.from_product([[name], self.offset + np.arange(n)],
+                                                                            names=['plant', 't'])))
+                # Zustand nach dem letzten übernommenen Zeitschritt für die nächste Optimierung
+                if not state:
+                    continue
                 if typ == 'konv':
-                    powerTs = []                            # Fahrplan Kraftwerk
-                    fuelTs = []                             # Brennstoffkosten
-                    EmissionTs = []                         # Emissionen
-                    profitTs = []                           # Gewinn/Kosten
-                    onTs = []                               # in Betrieb
-                    # Abfrage der Optimierungsergbenisse
-                    for i in self.t:
-                        powerTs.append(self.m.getVarByName('P_%s[%i]' %(name,i)).x)
-                        fuelTs.append(self.m.getVarByName('F_%s[%i]' %(name,i)).x)
-                        EmissionTs.append(self.m.getVarByName('E_%s[%i]' %(name,i)).x)
-                        profitTs.append(self.m.getVarByName('Profit_%s[%i]' %(name,i)).x)
-                        onTs.append(self.m.getVarByName('On_%s[%i]' %(name,i)).x)
-                    # Speichern der Ergebnisse
-                    self.results[name]['PTs'] = powerTs
-                    self.results[name]['FTs'] = fuelTs
-                    self.results[name]['ETs'] = EmissionTs
-                    self.results[name]['profitTs'] = profitTs
-                    self.results[name]['profit'] = np.sum(profitTs)
-                    self.results[name]['P0'] = powerTs[i]
-                    # Bestimmen der Betriebszeiten (in Betrieb oder Stillstand)
-                    onTs = np.diff(onTs)
-                    lastSwitch = 0; counter = 0
-                    for ts in onTs:
-                        if ts != 0:
-                            lastSwitch = counter
-                        counter += 1
-                    if onTs[lastSwitch] == 1:   # Anfahrt
-                        on = self.T-lastSwitch-1
-                    else:                       # Abfahrt
-                        on = -1*(self.T-lastSwitch+1) 
-                    self.results[name]['on'] = on
-                # Ergebnisse für Speicher    
+                    self.results[name]['P0'] = values['P'][n-1]
+                    self.results[name]['on'] = self.__onState(values['On'][:n], self.results[name]['on'])
                 if typ == 'storage':
-                    powerTs = []                            # Fahrplan Kraftwerk
-                    volumeTs = []                           # Füllstände
-                    profitTs = []                           # Gewinn/Kosten
-                    plusTs = []                             # Ladeleistung
-                    minusTs = []                            # Entladeleistung
-                    for i in self.t:
-                        powerTs.append(self.m.getVarByName('P_%s[%i]' %(name,i)).x)
-                        volumeTs.append(self.m.getVarByName('V_%s[%i]' %(name,i)).x)
-                        profitTs.append(self.m.getVarByName('Profit_%s[%i]' %(name,i)).x)
-                        plusTs.append(self.m.getVarByName('P+_%s[%i]' %(name,i)).x)
-                        minusTs.append(self.m.getVarByName('P-_%s[%i]' %(name,i)).x)
-                    # Speichern der Ergebnisse
-                    self.results[name]['PTs'] = powerTs
-                    self.results[name]['VTs'] = volumeTs
-                    self.results[name]['P+0'] = plusTs[i]
-                    self.results[name]['P-0'] = minusTs[i]
-                    self.results[name]['profit'] = np.sum(profitTs)
-                    self.results[name]['profitTs'] = profitTs
+                    self.results[name]['P+0'] = values['P+'][n-1]
+                    self.results[name]['P-0'] = values['P-'][n-1]
+                    self.results[name]['V0'] = values['V'][n-1]
+            
+            # Fahrpläne aller Kraftwerke (Index: Kraftwerk, Zeitschritt)
+            self.schedule = pd.concat(frames) if len(frames) > 0 else pd.DataFrame()
+            self.__setResults()
                     
-                pass                    
+            pass                    
+        
+        def __setResults(self): # Zeitreihen in self.results aus der Fahrplantabelle
+            
+            for powerPlant in self.powerPlants:
+                name = powerPlant['name']                   # Names des KW
+                frame = self.schedule.loc[name]
+                self.results[name]['PTs'] = frame['P'].to_numpy()
+                self.results[name]['profitTs'] = frame['Profit'].to_numpy()
+                self.results[name]['profit'] = np.sum(self.results[name]['profitTs'])
+                # Ergebnisse für konv. Kraftwerke
+                if powerPlant['typ'] == 'konv':
+                    self.results[name]['FTs'] = frame['F'].to_numpy()
+                    self.results[name]['ETs'] = frame['E'].to_numpy()
+                # Ergebnisse für Speicher    
+                if powerPlant['typ'] == 'storage':
+                    self.results[name]['VTs'] = frame['V'].to_numpy()
+            
+            pass
+        
+        def __warmStart(self,n): # Startlösung für das nächste Fenster: letzte Lösung um n Schritte verschoben
+            
+            # Alle Variablenfamilien haben T Spalten, nur Profit (letzte Spalte) ist skalar
+            x = self.x[:-1].reshape(-1, self.T)
+            start = np.hstack([x[:, n:], np.repeat(x[:, -1:], min(n, self.T), axis=1)])
+            self.backend.setStart(np.append(start.ravel(), self.x[-1]))
+            
+            pass
+        
+        def getState(self,schedule=None): # Startzustände, Position im Horizont und Fahrpläne als (Arrays, Metadaten)
+            
+            # Ein Wert je Kraftwerk und Zustand (nan, wenn der Zustand nicht zum Kraftwerkstyp gehört)
+            names = [powerPlant['name'] for powerPlant in self.powerPlants]
+            arrays = {key : np.array([self.results[name].get(key, np.nan) for name in names], dtype=float)
+                      for key in stateKeys}
+            meta = {'names' : names, 'offset' : self.offset, 'columns' : []}
+            schedule = self.schedule if schedule is None else schedule
+            if len(schedule) > 0:
+                plants = schedule.index.get_level_values('plant')
+                arrays['plant'] = pd.Index(names).get_indexer(plants).astype(np.int32)
+                arrays['t'] = schedule.index.get_level_values('t').to_numpy(dtype=np.int64)
+                arrays['schedule'] = schedule.to_numpy(dtype=float)
+                meta['columns'] = list(schedule.columns)
+            
+            return arrays, meta
+        
+        def setState(self,arrays,meta): # Übernimmt Startzustände, Position im Horizont und Fahrpläne aus getState
+            
+            names = [powerPlant['name'] for powerPlant in self.powerPlants]
+            if sorted(names) != sorted(meta['names']):
+                raise ValueError('Checkpoint mit anderen Kraftwerken: %s' % ', '.join(meta['names']))
+            for key in stateKeys:
+                for name, value in zip(meta['names'], arrays[key].tolist()):
+                    if not np.isnan(value):
+                        self.results[name][key] = int(value) if key == 'on' else value
+            self.offset = meta['offset']
+            self.schedule = pd.DataFrame()
+            if len(meta['columns']) > 0:
+                index = pd.MultiIndex.from_arrays([np.array(meta['names'])[arrays['plant']], arrays['t']],
+                                                  names=['plant', 't'])
+                self.schedule = pd.DataFrame(arrays['schedule'], index=index, columns=meta['columns'])
+                self.__setResults()
+            
+            pass
+        
+        def saveState(self,path,sync=False): # Checkpoint (Binärdatei, siehe checkpoint.py)
+            
+            ckpt.save(path, *self.getState(), sync=sync)
+            
+            pass
+        
+        def loadState(self,path): # Startzustände und Fahrpläne aus einem Checkpoint
+            
+            self.setState(*ckpt.load(path))
+            
+            pass
+        
+        def runRolling(self,power,co,gas,lignite,coal,nuc,window,step,checkpoint=None,resume=False):
+            # Rollierender Horizont: Fenster (window) optimieren, die ersten step Zeitschritte übernehmen, verschieben
+            # checkpoint: checkpoint.Checkpointer (Intervall in Fenstern), resume: beim Checkpoint fortsetzen
+            
+            if not self.matrix:
+                raise ValueError('Rollierender Horizont nur mit Matrixaufbau (matrix=True)')
+            
+            total = len(power)
+            # Preise am Ende mit dem letzten Wert auffüllen, damit jedes Fenster die volle Länge hat
+            power, co, gas = [pm.window(x, 0, total + window) for x in (power, co, gas)]
+            
+            schedules = []
+            self.offset = 0
+            if resume and checkpoint is not None and checkpoint.exists():
+                self.setState(*checkpoint.load())
+                schedules.append(self.schedule)
+                log.info('Fortsetzung ab Zeitschritt %i (%s)', self.offset, checkpoint.path)
+            first = True
+            while self.offset < total:
+                n = min(step, total - self.offset)
+                cut = slice(self.offset, self.offset + window)
+                self.setPrices(power[cut], co[cut], gas[cut], lignite, coal, nuc)
+                # Erstes Fenster aufbauen, danach nur Koeffizienten, rechte Seiten und Grenzen anpassen
+                if first:
+                    self.buildModel()
+                    first = False
+                else:
+                    self.updateModel()
+                if not self.__optimize():
+                    raise RuntimeError('Fehler während der Optimierung im Fenster ab Zeitschritt %i' % self.offset)
+                self.commit(n)
+                schedules.append(self.schedule)
+                if checkpoint is not None:
+                    checkpoint.tick(lambda: self.getState(pd.concat(schedules)))
+            
+            # Übernommene Zeitschritte aller Fenster zusammenführen
+            self.schedule = pd.concat(schedules).sort_index()
+            self.__setResults()
+            
+            pass
+        
+        def optimizeWindow(self): # Optimierung des Fensters, Fahrplan ohne Übernahme der Startzustände, True wenn optimal
+            
+            if not self.__optimize():
+                return False
+            self.__getResults(state=False)
+            
+            return True
+        
+        def commit(self,n): # Übernimmt die ersten n Zeitschritte der letzten Lösung und verschiebt das Fenster
+            
+            # Startzustände nach n Zeitschritten, Warmstart für das verschobene Fenster (self.schedule: n Zeitschritte)
+            n = min(n, self.T)
+            self.__getResults(n)
+            self.__warmStart(n)
+            self.offset += n
+            
+            pass
         
-        def runOpt(self,plot = True):
+        def runOpt(self,plot = True): # Optimierung und Ergebnisabfrage, True wenn optimal
 
-            try: 
-                self.m.optimize()
-                self.__getResults()
+            if not self.__optimize():
+                # Ergebnisse bleiben auf dem Stand der letzten erfolgreichen Optimierung
+                log.warning('Fehler während der Optimierung: keine optimale Lösung (Status %s)',
+                            self.telemetry.counters.get('status'))
+                return False
+            self.__getResults()
                 
-                if plot:
-                    self.__plotResults()
-
-            except:
-                print('Fehler während der Optimierung')
+            if plot:
+                self.__plotResults()
             
-            pass
+            return True
         
         def __plotResults(self):
 
@@ -328,7 +665,7 @@ class powerPlantPortfolio:
             
             fig, ax = plt.subplots(1,1)
             # --> Power Plot
-            ax.stackplot(self.t, power, labels=labels)
+            ax.stackplot(np.arange(power.shape[1]), power, labels=labels)
             ax.legend(loc='upper left')
             ax.set_title('Power')
             ax.set_xlabel('time [h]')
@@ -416,5 +753,5 @@ if __name__ == "__main__":
     myPortfolio.addPowerPlant(myPlan3)          
     myPortfolio.buildModel()
     myPortfolio.runOpt()
-    myPortfolio.buildModel()
+    myPortfolio.updateModel()
     myPortfolio.runOpt()            
\ No newline at end of file
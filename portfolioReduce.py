@@ -0,0 +1,417 @@
+#-----------------------------------------------------------------------------
+#
+# Autor: Christian Rieke
+# Datum: 17.10.2026
+#
+# Beschreibung: Zeitreihenaggregation mit repräsentativen Perioden
+#
+#               Der Optimierungshorizont wird in Perioden gleicher Länge
+#               (z.B. Tage oder Wochen) geteilt. Die Perioden werden nach
+#               ihren Preis- und Wärmeprofilen geclustert (k-means), je
+#               Cluster steht die Periode nahe dem Schwerpunkt (Medoid) mit
+#               der Anzahl ihrer Perioden als Gewicht. Innerhalb der
+#               repräsentativen Perioden werden benachbarte, ähnliche
+#               Zeitschritte zu Segmenten zusammengefasst (adaptive
+#               Auflösung). Das reduzierte Modell besteht aus den
+#               hintereinander gelegten repräsentativen Perioden.
+#
+#               Speicher: der Füllstand innerhalb einer repräsentativen
+#               Periode startet bei einer freien Variablen B, der Füllstand
+#               S zu Beginn jeder ursprünglichen Periode wird über die
+#               Änderung ihrer repräsentativen Periode verkettet
+#               (S[p+1] = S[p] + V_Ende - B), die Grenzen gelten für
+#               S[p] + (min/max Füllstand - B).
+#
+#               Die Fahrpläne werden auf die volle Auflösung zurückgeführt
+#               (jede Periode erhält den Fahrplan ihrer repräsentativen
+#               Periode, Speicherfüllstände über S). An den Periodengrenzen
+#               stoßen repräsentative Perioden aneinander, die im reduzierten
+#               Modell nicht benachbart sind; Gradienten und Lauf-/
+#               Stillstandszeiten können dort verletzt sein (violations).
+#               Der Fahrplan wird daher in voller Auflösung mit den
+#               Betriebszuständen des Plans neu eingesetzt (LP, redispatch)
+#               und mit den tatsächlichen Preisen bewertet.
+#
+# Letzte Änderung:
+#
+#           17.10.2026  Repräsentative Perioden, Segmente, Speicherverkettung
+#           17.10.2026  Prüfung des zurückgeführten Fahrplans, Neueinsatz in voller Auflösung
+#
+#-----------------------------------------------------------------------------
+
+# Laden der Abhängigkeiten
+import time
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from scipy.cluster.vq import kmeans2
+import portfolioMatrix as pm
+import solverBackend as sb
+from portfolioOpt import powerPlantPortfolio, stateKeys
+from telemetry import log
+
+
+def profiles(pf): # Zeitreihen für die Clusterung: Strom-, CO2- und Gaspreis, Wärmebedarf der konv. Kraftwerke
+
+    T = pf.T
+    series = [pf.powerPrice, pf.coPrice, pf.gasPrice]
+    series += [pm.window(powerPlant['heat'], pf.offset, T) for powerPlant in pf.powerPlants
+               if powerPlant['typ'] == 'konv' and len(powerPlant['heat']) > 0]
+    X = np.column_stack([np.broadcast_to(np.asarray(s, dtype=float), (T,)) for s in series])
+    # Normierung je Zeitreihe, konstante Zeitreihen haben keinen Einfluss
+    std = X.std(axis=0)
+
+    return (X - X.mean(axis=0)) / np.where(std > 0, std, 1)
+
+
+def clusterPeriods(X, periodLength, periods, seed=0): # Repräsentative Perioden aus den Profilen X (Zeitschritte x Zeitreihen)
+
+    # Letzte, unvollständige Periode mit dem letzten Wert auffüllen
+    n = -(-len(X) // periodLength)
+    X = np.pad(X, ((0, n * periodLength - len(X)), (0, 0)), mode='edge')
+    Y = X.reshape(n, -1)
+    centroids, label = kmeans2(Y, min(periods, n), seed=seed, minit='++')
+    # Medoid je (nicht leerem) Cluster, Reihenfolge chronologisch
+    medoids = {}
+    for c in np.unique(label):
+        members = np.flatnonzero(label == c)
+        medoids[c] = members[np.argmin(np.sum((Y[members] - centroids[c]) ** 2, axis=1))]
+    order = sorted(medoids, key=medoids.get)
+    rank = {c: k for k, c in enumerate(order)}
+    assign = np.array([rank[c] for c in label])
+
+    return {'periods' : np.array([medoids[c] for c in order]),     # repräsentative Perioden (Periodenindex)
+            'assign'  : assign,                                   # repräsentative Periode je Periode
+            'weight'  : np.bincount(assign).astype(float),        # Anzahl Perioden je repräsentativer Periode
+            'length'  : periodLength}
+
+
+def segments(X, maxLength=1, tol=0.5): # Segmentlängen einer Periode: ähnliche Nachbarn zusammenfassen
+
+    # Ein Segment endet, wenn es maxLength Zeitschritte lang ist oder die Spannweite einer
+    # (normierten) Zeitreihe im Segment tol übersteigt
+    lengths = []
+    i = 0
+    while i < len(X):
+        j = i + 1
+        while j < len(X) and j - i < maxLength and np.all(np.ptp(X[i:j + 1], axis=0) <= tol):
+            j += 1
+        lengths.append(j - i)
+        i = j
+
+    return np.array(lengths)
+
+
+def reducePortfolio(pf, periodLength, periods, maxLength=1, tol=0.5, seed=0):
+    # Reduziertes Portfolio aus repräsentativen Perioden (periodLength Zeitschritte) mit Segmenten (bis maxLength)
+
+    X = profiles(pf)
+    plan = clusterPeriods(X, periodLength, periods, seed)
+    L = periodLength
+    nP = len(plan['assign'])
+    X = np.pad(X, ((0, nP * L - len(X)), (0, 0)), mode='edge')
+    # Segmente je repräsentativer Periode, Zuordnung Zeitschritt der Periode --> Zeitschritt des reduzierten Modells
+    lengths, start, size = [], [], []
+    step = np.zeros((len(plan['periods']), L), dtype=int)       # reduzierter Zeitschritt
+    pos = np.zeros((len(plan['periods']), L), dtype=int)        # Position im Segment
+    for k, p in enumerate(plan['periods']):
+        seg = segments(X[p * L:(p + 1) * L], maxLength, tol)
+        start.append(len(lengths))
+        size.append(len(seg))
+        step[k] = start[k] + np.repeat(np.arange(len(seg)), seg)
+        pos[k] = np.arange(L) - np.repeat(np.cumsum(seg) - seg, seg)
+        lengths.extend(seg)
+    lengths = np.array(lengths, dtype=float)
+    full = np.arange(pf.T)
+    k = plan['assign'][full // L]
+    plan.update({'start'   : np.array(start),                               # erster reduzierter Zeitschritt je repr. Periode
+                 'size'    : np.array(size),                                # Segmente je repr. Periode
+                 'lengths' : lengths,                                       # Länge je reduziertem Zeitschritt [dt]
+                 'index'   : step[k, full % L],                             # reduzierter Zeitschritt je Zeitschritt
+                 'pos'     : pos[k, full % L]})
+    # Zeitschritte der repräsentativen Perioden im (aufgefüllten) Horizont und Mittelwert je Segment
+    source = (plan['periods'][:, None] * L + np.arange(L)).ravel()
+    target = step.ravel()
+
+    def reduce(series):
+        series = np.pad(np.broadcast_to(np.asarray(series, dtype=float), (pf.T,)), (0, nP * L - pf.T), mode='edge')
+        return np.bincount(target, weights=series[source]) / lengths
+
+    red = powerPlantPortfolio(dt=pf.dt, backend=pf.backendName, compact=pf.compact)
+    red.setPrices(reduce(pf.powerPrice), reduce(pf.coPrice), reduce(pf.gasPrice),
+                  pf.lignitePrice, pf.coalPrice, pf.nucPrice)
+    red.setResolution(lengths, lengths * plan['weight'][np.repeat(np.arange(len(size)), size)])
+    for powerPlant in pf.powerPlants:
+        if powerPlant['typ'] == 'konv' and len(powerPlant['heat']) > 0:
+            powerPlant = dict(powerPlant, heat=reduce(pm.window(powerPlant['heat'], pf.offset, pf.T)))
+        red.addPowerPlant(powerPlant)
+        name = powerPlant['name']
+        red.results[name].update({key : pf.results[name][key] for key in stateKeys if key in pf.results[name]})
+
+    return red, plan
+
+
+def linkStorage(problem, pf, plan): # Speicherfüllstände über die ursprünglichen Perioden verketten
+
+    A = problem['A'].tocoo()
+    keep = np.ones(A.nnz, dtype=bool)                   # Einträge der bisherigen Matrix
+    rhs = problem['rhs'].copy()
+    first = A.shape[0]                                  # erste neue Zeile
+    n = A.shape[1]                                      # erste neue Spalte
+    entries = []                                        # (Zeilen, Spalten, Koeffizienten) der neuen Einträge
+    sense, value = [], []                               # Relation und rechte Seite der neuen Zeilen
+    lb, ub, layout, links = [], [], [], {}
+    start, size, assign = plan['start'], plan['size'], plan['assign']
+    K, nP = len(start), len(assign)
+    rep = np.repeat(np.arange(K), size)                 # repräsentative Periode je reduziertem Zeitschritt
+    t = np.arange(len(rep))
+    Acsc = problem['A'].tocsc()
+
+    def add(terms, s, v): # Zeilen aus (Spalten, Koeffizient) je Term, eine Zeile je Eintrag in v
+        nonlocal first
+        v = np.asarray(v, dtype=float)
+        r = first + np.arange(len(v))
+        for col, coef in terms:
+            entries.append((r, np.asarray(col), np.full(len(v), float(coef))))
+        sense.append(np.full(len(v), s))
+        value.append(v)
+        first += len(v)
+
+    for powerPlant in pf.powerPlants:
+        if powerPlant['typ'] != 'storage':
+            continue
+        name = powerPlant['name']
+        V = problem['cols'][name]['V'].start
+        # B: Füllstand vor der repr. Periode, S: Füllstand zu Beginn jeder Periode (und am Ende),
+        # Hi/Lo: größter/kleinster Füllstand in der repr. Periode
+        link = {}
+        for family, k in (('B', K), ('S', nP + 1), ('Hi', K), ('Lo', K)):
+            link[family] = slice(n, n + k)
+            layout.append((family + '_' + name, k))
+            lb.append(np.full(k, powerPlant['VMin'], dtype=float))
+            ub.append(np.full(k, powerPlant['VMax'], dtype=float))
+            n += k
+        links[name] = link
+        B, S, Hi, Lo = (link[family].start for family in ('B', 'S', 'Hi', 'Lo'))
+
+        # Füllstandsgleichung im ersten Zeitschritt jeder repr. Periode: V[t-1] bzw. V0 --> B[k]
+        for k in range(K):
+            col = V + start[k]
+            column = Acsc[:, col]
+            r = column.indices[column.data == 1][0]
+            if k > 0:
+                keep &= ~((A.row == r) & (A.col == col - 1))
+            rhs[r] = 0
+            entries.append((np.array([r]), np.array([B + k]), np.array([-1.0])))
+        # Hi[k] >= V[t] und Lo[k] <= V[t] für t in der repr. Periode k
+        add([(Hi + rep, 1), (V + t, -1)], '>', np.zeros(len(t)))
+        add([(Lo + rep, 1), (V + t, -1)], '<', np.zeros(len(t)))
+        # Verkettung: S[0] = V0, S[p+1] = S[p] + V_Ende[k] - B[k], Grenzen S[p] + Hi/Lo[k] - B[k]
+        p = np.arange(nP)
+        add([([S], 1)], '=', [pf.results[name]['V0']])
+        add([(S + p + 1, 1), (S + p, -1), (V + start[assign] + size[assign] - 1, -1), (B + assign, 1)], '=', np.zeros(nP))
+        add([(S + p, 1), (Hi + assign, 1), (B + assign, -1)], '<', np.full(nP, powerPlant['VMax'], dtype=float))
+        add([(S + p, 1), (Lo + assign, 1), (B + assign, -1)], '>', np.full(nP, powerPlant['VMin'], dtype=float))
+
+    if not links:
+        return problem
+    rows = np.concatenate([A.row[keep]] + [e[0] for e in entries])
+    cols = np.concatenate([A.col[keep]] + [e[1] for e in entries])
+    vals = np.concatenate([A.data[keep]] + [e[2] for e in entries])
+    extra = n - A.shape[1]
+
+    return dict(problem,
+                A=sp.coo_matrix((vals, (rows, cols)), shape=(first, n)).tocsr(),
+                c=np.concatenate([problem['c'], np.zeros(extra)]),
+                sense=np.concatenate([problem['sense']] + sense),
+                rhs=np.concatenate([rhs] + value),
+                lb=np.concatenate([problem['lb']] + lb),
+                ub=np.concatenate([problem['ub']] + ub),
+                vtype=np.concatenate([problem['vtype'], np.full(extra, 'C')]),
+                layout=problem['layout'] + layout,
+                links=links)
+
+
+def fullPrices(pf): # Preise des Portfolios über den vollen Horizont
+
+    return {'power'   : np.broadcast_to(np.asarray(pf.powerPrice, dtype=float), (pf.T,)),
+            'co'      : np.broadcast_to(np.asarray(pf.coPrice, dtype=float), (pf.T,)),
+            'gas'     : np.broadcast_to(np.asarray(pf.gasPrice, dtype=float), (pf.T,)),
+            'lignite' : pf.lignitePrice,
+            'coal'    : pf.coalPrice,
+            'nuc'     : pf.nucPrice}
+
+
+def disaggregate(pf, plan, problem, x): # Fahrpläne in voller Auflösung, bewertet mit den tatsächlichen Preisen
+
+    index = plan['index']
+    period = np.arange(pf.T) // plan['length']
+    k = plan['assign'][period]
+    price = fullPrices(pf)
+    frames = []
+    for powerPlant in pf.powerPlants:
+        name = powerPlant['name']
+        values = {family : x[cols] for family, cols in problem['cols'][name].items()}
+        frame = {family : v[index] for family, v in values.items() if family not in ('F', 'E', 'Profit', 'V')}
+        frame['On'] = np.round(frame['On'])
+        frame['Profit'] = frame['P'] * price['power']
+        if powerPlant['typ'] == 'konv':
+            fuel = pm.fuelPrice(powerPlant, price, pf.T)
+            frame['F'] = frame['P'] * fuel / powerPlant['eta'] if fuel is not None else np.zeros(pf.T)
+            frame['E'] = frame['P'] * powerPlant['chi'] * price['co']
+        if powerPlant['typ'] == 'storage':
+            link = {family : x[cols] for family, cols in problem['links'][name].items()}
+            # Füllstand linear innerhalb der Segmente, verschoben auf den Füllstand S der Periode
+            V = values['V']
+            before = np.concatenate([[0], V[:-1]])
+            before[plan['start']] = link['B']
+            level = before[index] + (plan['pos'] + 1) / plan['lengths'][index] * (V[index] - before[index])
+            frame['V'] = link['S'][period] + level - link['B'][k]
+        frames.append(pd.DataFrame(frame, index=pd.MultiIndex.from_product([[name], pf.offset + np.arange(pf.T)],
+                                                                           names=['plant', 't'])))
+
+    return pd.concat(frames)
+
+
+def violations(pf, schedule, tol=1e-6): # Verletzte Nebenbedingungen eines Fahrplans in voller Auflösung
+
+    # Gradienten (auch gegen den Startzustand), Leistungsgrenzen, Füllstände und Lauf-/Stillstandszeiten
+    # zwischen zwei Schaltvorgängen (Mindestdauer wie in den paarweisen Zeilen: runTime-1 bzw. stopTime-1),
+    # am Anfang gegen den Startzustand wie in portfolioMatrix.convBlock
+    rows = []
+
+    def check(name, constraint, excess):
+        for t in np.flatnonzero(excess > tol):
+            rows.append({'plant' : name, 'constraint' : constraint, 't' : pf.offset + t, 'excess' : excess[t]})
+
+    for powerPlant in pf.powerPlants:
+        name = powerPlant['name']
+        frame = schedule.loc[name]
+        state = pf.results[name]
+        if powerPlant['typ'] == 'konv':
+            P = frame['P'].to_numpy()
+            on = np.round(frame['On'].to_numpy())
+            dP = np.diff(np.concatenate([[state['P0']], P]))
+            check(name, 'grad+', dP - powerPlant['grad+'])
+            check(name, 'grad-', -dP - powerPlant['grad-'])
+            check(name, 'powerMax', P - on * powerPlant['powerMax'])
+            check(name, 'powerMin', on * powerPlant['powerMin'] - P)
+            switch = np.flatnonzero(np.diff(on) != 0) + 1
+            excess = {'runTime' : np.zeros(len(P)), 'stopTime' : np.zeros(len(P))}
+            for a, b in zip(switch[:-1], switch[1:]):
+                constraint = 'runTime' if on[a] > 0 else 'stopTime'
+                excess[constraint][a] = powerPlant[constraint] - 1 - (b - a)
+            # erster Abschnitt: Fortsetzung des Startzustands oder Schalten in 0
+            if len(switch) > 0:
+                running = on[0] > 0
+                if running == (state['on'] > 0):
+                    constraint = 'runTime' if running else 'stopTime'
+                    excess[constraint][0] = powerPlant[constraint] - abs(state['on']) - switch[0]
+                else:
+                    constraint = 'runTime' if running else 'stopTime'
+                    excess[constraint][0] = powerPlant[constraint] - 1 - switch[0]
+            for constraint, e in excess.items():
+                check(name, constraint, e)
+        if powerPlant['typ'] == 'storage':
+            for family, up, down, key in (('P+', 'grad++', 'grad+-', 'P+0'), ('P-', 'grad-+', 'grad--', 'P-0')):
+                d = np.diff(np.concatenate([[state[key]], frame[family].to_numpy()]))
+                check(name, up, d - powerPlant[up])
+                check(name, down, -d - powerPlant[down])
+            V = frame['V'].to_numpy()
+            check(name, 'VMax', V - powerPlant['VMax'])
+            check(name, 'VMin', powerPlant['VMin'] - V)
+
+    return pd.DataFrame(rows, columns=['plant', 'constraint', 't', 'excess'])
+
+
+def redispatch(pf, schedule, bounds=(), free=0): # Neueinsatz in voller Auflösung mit den Betriebszuständen des Fahrplans
+
+    # bounds: Periodengrenzen (Zeitschritte), um die On in [b-free, b+free) frei bleibt (keine = LP)
+    problem = pf.buildProblem()
+    lb, ub = problem['lb'].copy(), problem['ub'].copy()
+    T = problem['T']
+    t = np.arange(T)
+    fix = np.ones(T, dtype=bool)
+    for b in bounds:
+        fix[(t >= b - free) & (t < b + free)] = False
+    for name, cols in problem['cols'].items():
+        if 'On' in cols:
+            on = np.round(schedule.loc[name, 'On'].to_numpy())
+            col = np.arange(cols['On'].start, cols['On'].stop)[fix]
+            # Grenzen aus dem Startzustand (Lauf-/Stillstandszeit) haben Vorrang
+            lb[col] = ub[col] = np.clip(on[fix], lb[col], ub[col])
+    vtype = problem['vtype'] if not fix.all() else np.full(len(lb), 'C')
+    backend = sb.backends[pf.backendName](dict(problem, lb=lb, ub=ub, vtype=vtype))
+    if not backend.optimize():
+        return None, np.nan
+    x = backend.values()
+    frames = [pd.DataFrame({family : x[c] for family, c in cols.items()},
+                           index=pd.MultiIndex.from_product([[name], pf.offset + t], names=['plant', 't']))
+              for name, cols in problem['cols'].items()]
+
+    return pd.concat(frames), backend.objVal
+
+
+def solveReduced(pf, periodLength, periods, maxLength=1, tol=0.5, seed=0, repair=True):
+    # Optimierung mit repräsentativen Perioden und Rückführung auf die volle Auflösung
+    # repair: Neueinsatz in voller Auflösung mit festen Betriebszuständen, an den Periodengrenzen mit
+    #         Verletzungen bleibt On frei (wenn unzulässig: an allen Grenzen), sonst wird der
+    #         zurückgeführte Fahrplan unverändert bewertet
+
+    start = time.perf_counter()
+    red, plan = reducePortfolio(pf, periodLength, periods, maxLength, tol, seed)
+    problem = linkStorage(red.buildProblem(), red, plan)
+    backend = sb.backends[pf.backendName](problem)
+    build = time.perf_counter() - start
+    start = time.perf_counter()
+    if not backend.optimize():
+        raise RuntimeError('Fehler während der Optimierung des reduzierten Modells (Status %s)' % backend.status)
+    solve = time.perf_counter() - start
+    schedule = disaggregate(pf, plan, problem, backend.values())
+    found = violations(pf, schedule)
+    start = time.perf_counter()
+    repaired = False
+    if repair:
+        # On frei über die längste Lauf-/Stillstandszeit um die Grenzen (auch 0: Startzustand) nahe den Verletzungen
+        L = plan['length']
+        free = max([max(p['runTime'], p['stopTime']) for p in pf.powerPlants if p['typ'] == 'konv'] + [1])
+        near = np.unique(np.round((found['t'].to_numpy(dtype=float) - pf.offset) / L).astype(int) * L)
+        for bounds in (near, np.arange(0, pf.T, L)):
+            fixed, objVal = redispatch(pf, schedule, bounds, free)
+            if fixed is not None:
+                schedule, repaired = fixed, True
+                break
+        if not repaired:
+            log.warning('Neueinsatz in voller Auflösung unzulässig, Fahrplan verletzt %i Nebenbedingungen', len(found))
+    evaluated = schedule['Profit'].sum() - schedule['F'].sum() + schedule['E'].sum()
+
+    return {'objective'  : backend.objVal,                # Zielfunktionswert des reduzierten Modells
+            'evaluated'  : evaluated,                     # Fahrplan in voller Auflösung mit tatsächlichen Preisen
+            'violations' : found,                         # verletzte Nebenbedingungen des zurückgeführten Fahrplans
+            'repaired'   : repaired,                      # evaluated/schedule aus dem Neueinsatz (zulässig)
+            'repair'     : time.perf_counter() - start,
+            'schedule'   : schedule,
+            'plan'      : plan,
+            'T'         : red.T,
+            'rows'      : problem['A'].shape[0],
+            'cols'      : problem['A'].shape[1],
+            'build'     : build,
+            'solve'     : solve}
+
+
+if __name__ == "__main__":
+
+    import benchmark
+
+    # Vier Wochen stündlich, sieben repräsentative Tage mit Segmenten bis 3 h
+    powerPlants, prices = benchmark.syntheticPortfolio(4, 2, 24 * 28, 1.0)
+    pf = powerPlantPortfolio(dt=1.0, backend='highs', compact=True)
+    pf.setPrices(prices['power'], prices['co'], prices['gas'], prices['lignite'], prices['coal'], prices['nuc'])
+    for powerPlant in powerPlants:
+        pf.addPowerPlant(powerPlant)
+    result = solveReduced(pf, 24, 7, maxLength=3)
+    print('%i statt %i Zeitschritte, Zielfunktion %.0f (reduziert), %.0f (volle Auflösung)'
+          % (result['T'], pf.T, result['objective'], result['evaluated']))
+    print('Zurückgeführter Fahrplan: %i verletzte Nebenbedingungen, Neueinsatz %s'
+          % (len(result['violations']), 'zulässig' if result['repaired'] else 'unzulässig'))
+    print(violations(pf, result['schedule']).groupby(['plant', 'constraint']).size())
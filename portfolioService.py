@@ -0,0 +1,417 @@
+#-----------------------------------------------------------------------------
+#
+# Autor: Christian Rieke
+# Datum: 17.10.2026
+#
+# Beschreibung: Dienst zur laufenden Neuoptimierung bei Preisaktualisierungen
+#
+#               reoptService hält ein powerPlantPortfolio mit bestehendem
+#               Modell und die vollständigen Preis- und Wärmezeitreihen.
+#               Aktualisierungen kommen als JSON-Zeilen aus einer Datei, die
+#               fortlaufend gelesen wird, oder über einen lokalen TCP-Socket:
+#
+#                   {"start": k, "power": [...], "co": [...], "gas": [...],
+#                    "heat": {"K0": [...]}, "now": k, "end": true}
+#
+#               start: erster Zeitschritt der Werte, now: aktueller
+#               Zeitschritt (Fahrplan bis now wird übernommen), end: Ende des
+#               Stroms. Alle Felder sind optional. Das Einlesen schreibt nur in
+#               die Zeitreihen und merkt sich den geänderten Bereich; die
+#               Optimierung läuft in einer eigenen Schleife, fasst alle
+#               Aktualisierungen innerhalb von coalesce Sekunden zusammen und
+#               rechnet nur, wenn das aktuelle Fenster [offset, offset+T)
+#               betroffen ist oder sich verschoben hat. Aufbau bzw. Anpassung
+#               des Modells und der Solver laufen in einem Thread (Executor),
+#               damit das Einlesen nie blockiert. Jeder Fahrplan geht mit
+#               Latenzen (Eingang der Aktualisierung bis Ausgabe) in die
+#               Warteschlange output und optional als JSON-Zeile in sink.
+#
+# Letzte Änderung:
+#
+#           17.10.2026  Asynchroner Dienst mit Zusammenfassen, Executor und Latenzmessung
+#           17.10.2026  Uhrsprünge übernehmen den gelösten Fahrplan, Übernahme im Executor
+#
+#-----------------------------------------------------------------------------
+
+# Laden der Abhängigkeiten
+import os
+import json
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+import portfolioMatrix as pm
+from telemetry import log
+
+
+class reoptService:
+
+        def __init__(self,pf,total,power,co,gas,lignite,coal,nuc,window,coalesce=0.05,budget=None,sink=None):
+
+            # pf: powerPlantPortfolio mit Kraftwerken (matrix=True), total: Länge des Horizonts
+            # power/co/gas: bekannte Preise (kürzere Reihen werden mit dem letzten Wert aufgefüllt)
+            # window: Länge des Optimierungsfensters, budget: Latenzziel [s] (nur Auswertung)
+            # sink: Dateipfad für die Fahrpläne als JSON-Zeilen
+
+            if not pf.matrix:
+                raise ValueError('Neuoptimierung nur mit Matrixaufbau (matrix=True)')
+
+            self.pf = pf
+            self.total = total
+            self.window = window
+            self.coalesce = coalesce
+            self.budget = budget
+            self.sink = sink
+            # Zeitreihen über den Horizont plus ein Fenster (aufgefüllt, jedes Fenster hat die volle Länge)
+            self.series = {key : self.__padded(x) for key, x in (('power', power), ('co', co), ('gas', gas))}
+            self.fuels = (lignite, coal, nuc)
+            self.heat = {p['name'] : self.__padded(p['heat']) for p in pf.powerPlants if p['typ'] == 'konv' and len(p['heat']) > 0}
+            # bekannte Länge je Zeitreihe, dahinter gilt der letzte bekannte Wert
+            self.known = {key : len(x) for key, x in (('power', power), ('co', co), ('gas', gas))}
+            self.known.update({name : total + window for name in self.heat})
+
+            self.now = 0                                # aktueller Zeitschritt (Uhr des Stroms)
+            self.dirty = None                           # geänderter Bereich [von, bis) seit der letzten Optimierung
+            self.pending = []                           # Eingangszeiten der noch nicht verarbeiteten Aktualisierungen
+            self.solved = False                         # Lösung für das aktuelle Fenster vorhanden
+            self.closed = False                         # Ende des Stroms erreicht
+            self.event = None                           # neue Aktualisierung (asyncio.Event, in run angelegt)
+            self.output = asyncio.Queue()               # ausgegebene Fahrpläne
+            self.executor = ThreadPoolExecutor(max_workers=1)
+            self.updates = []                           # je Aktualisierung: Eingang, Ausgabe, Latenz
+            self.solves = []                            # je Optimierung: Fenster, Anzahl, Dauer, Latenz, Status
+
+            pass
+
+        def ingest(self,update): # Übernimmt eine Aktualisierung (dict) in die Zeitreihen, blockiert nicht
+
+            arrival = time.perf_counter()
+            start = int(update.get('start', self.now))
+            end = start
+            for key in ('power', 'co', 'gas'):
+                if key in update:
+                    values = np.asarray(update[key], dtype=float)
+                    self.__write(key, self.series[key], start, values)
+                    end = max(end, start + len(values))
+            for name, values in update.get('heat', {}).items():
+                if name not in self.heat:
+                    self.heat[name] = np.zeros(self.total + self.window)
+                    self.known[name] = 0
+                values = np.asarray(values, dtype=float)
+                self.__write(name, self.heat[name], start, values)
+                end = max(end, start + len(values))
+            if end > start:
+                self.dirty = (start, end) if self.dirty is None else (min(self.dirty[0], start), max(self.dirty[1], end))
+            if 'now' in update:
+                self.now = min(max(self.now, int(update['now'])), self.total)
+            if update.get('end', False):
+                self.closed = True
+
+            self.pending.append(arrival)
+            if self.event is not None:
+                self.event.set()
+
+            pass
+
+        def __padded(self,series): # Zeitreihe über Horizont plus Fenster, mit dem letzten Wert aufgefüllt
+
+            if len(series) == 0:
+                return np.zeros(self.total + self.window)
+
+            return pm.window(series, 0, self.total + self.window)
+
+        def __write(self,key,series,start,values): # Werte ab start in eine Zeitreihe, dahinter bis zum Ende der letzte Wert
+
+            values = values[:max(len(series) - start, 0)]
+            end = start + len(values)
+            series[start:end] = values
+            if end >= self.known[key] and len(values) > 0:
+                series[end:] = values[-1]
+                self.known[key] = end
+
+            pass
+
+        def __advance(self): # Zeitschritte bis zur aktuellen Zeit: (aus dem gelösten Fenster übernommen, übersprungen)
+
+            pf = self.pf
+            n = self.now - pf.offset
+            if n <= 0:
+                return 0, 0
+            steps = min(n, pf.T) if self.solved else 0
+
+            return steps, n - steps
+
+        def __move(self,steps,jump): # Fahrplan übernehmen und Fenster verschieben (läuft im Executor)
+
+            pf = self.pf
+            if steps > 0:
+                pf.commit(steps)
+            if jump > 0:
+                # Jenseits des gelösten Fensters gilt der Zustand nach dem letzten übernommenen Zeitschritt weiter
+                log.warning('Keine Lösung für Zeitschritte %i bis %i, Startzustände ab Zeitschritt %i',
+                            pf.offset, pf.offset + jump, pf.offset)
+                pf.offset += jump
+
+            pass
+
+        def __solve(self,steps,jump,prices,heat,build): # Übernahme, Aufbau bzw. Anpassung und Optimierung (im Executor)
+
+            pf = self.pf
+            self.__move(steps, jump)
+            pf.setPrices(*prices)
+            for powerPlant in pf.powerPlants:
+                if powerPlant['name'] in heat:
+                    powerPlant['heat'] = heat[powerPlant['name']]
+            start = time.perf_counter()
+            if build:
+                pf.buildModel()
+            else:
+                pf.updateModel()
+            optimal = pf.optimizeWindow()
+
+            return optimal, time.perf_counter() - start
+
+        async def __solver(self): # Optimierungsschleife: warten, zusammenfassen, im Executor rechnen, ausgeben
+
+            loop = asyncio.get_running_loop()
+            pf = self.pf
+            while True:
+                await self.event.wait()
+                await asyncio.sleep(self.coalesce)
+                self.event.clear()
+                arrivals, self.pending = self.pending, []
+                dirty, self.dirty = self.dirty, None
+                steps, jump = self.__advance()
+                moved = steps + jump > 0
+                offset = pf.offset + steps + jump
+                affected = dirty is not None and dirty[0] < offset + self.window and dirty[1] > offset
+                if offset < self.total and (moved or affected or not self.solved):
+                    await self.__emit(loop, arrivals, steps, jump)
+                else:
+                    if moved:
+                        await loop.run_in_executor(self.executor, self.__move, steps, jump)
+                        self.solved = False
+                    # Fenster nicht betroffen: kein neuer Fahrplan, Aktualisierungen ohne Latenz protokollieren
+                    log.debug('%i Aktualisierungen außerhalb des Fensters ab %i', len(arrivals), pf.offset)
+                    self.updates.extend({'arrival' : arrival, 'emitted' : np.nan, 'latency' : np.nan, 'solve' : -1}
+                                        for arrival in arrivals)
+                if self.__done():
+                    break
+
+            pass
+
+        def __done(self): # Ende des Stroms und keine offenen Aktualisierungen
+
+            return self.closed and not self.event.is_set() and len(self.pending) == 0
+
+        async def __emit(self,loop,arrivals,steps,jump): # Fenster übernehmen, optimieren und Fahrplan mit Latenzen ausgeben
+
+            pf = self.pf
+            offset = pf.offset + steps + jump
+            cut = slice(offset, offset + self.window)
+            # Kopien, damit das Einlesen während der Optimierung weiterschreiben kann
+            prices = [self.series[key][cut].copy() for key in ('power', 'co', 'gas')] + list(self.fuels)
+            heat = {name : series.copy() for name, series in self.heat.items()}
+            build = pf.backend is None
+            optimal, solveTime = await loop.run_in_executor(self.executor, self.__solve, steps, jump, prices, heat, build)
+            emitted = time.perf_counter()
+
+            self.solved = optimal
+            latency = [emitted - arrival for arrival in arrivals]
+            index = len(self.solves)
+            self.solves.append({'offset'    : pf.offset,
+                                'updates'   : len(arrivals),
+                                'solveTime' : solveTime,
+                                'latency'   : max(latency) if len(latency) > 0 else np.nan,
+                                'objective' : pf.backend.objVal if optimal else np.nan,
+                                'status'    : pf.backend.status,
+                                'late'      : self.budget is not None and len(latency) > 0 and max(latency) > self.budget})
+            self.updates.extend({'arrival' : arrival, 'emitted' : emitted, 'latency' : l, 'solve' : index}
+                                for arrival, l in zip(arrivals, latency))
+            if not optimal:
+                log.warning('Keine optimale Lösung im Fenster ab Zeitschritt %i', pf.offset)
+                return
+
+            result = {'offset' : pf.offset, 'schedule' : pf.schedule, 'latency' : self.solves[-1]['latency'],
+                      'solveTime' : solveTime}
+            await self.output.put(result)
+            if self.sink is not None:
+                with open(self.sink, 'a') as f:
+                    frame = pf.schedule['P'].unstack('t')
+                    f.write(json.dumps({'offset'    : pf.offset,
+                                        'latency'   : result['latency'],
+                                        'solveTime' : solveTime,
+                                        'P'         : {name : row.tolist() for name, row in frame.iterrows()}}) + '\n')
+
+            pass
+
+        async def tailFile(self,path,poll=0.01): # Liest JSON-Zeilen aus einer wachsenden Datei bis zum Ende des Stroms
+
+            while not os.path.exists(path):
+                await asyncio.sleep(poll)
+            with open(path) as f:
+                buffer = ''
+                while not self.closed:
+                    line = f.readline()
+                    if not line:
+                        await asyncio.sleep(poll)
+                        continue
+                    buffer += line
+                    # unvollständige Zeile (Schreiber noch nicht fertig) --> weiterlesen
+                    if not buffer.endswith('\n'):
+                        continue
+                    if buffer.strip():
+                        self.ingest(json.loads(buffer))
+                    buffer = ''
+
+            pass
+
+        async def __client(self,reader,writer): # Eine Verbindung des TCP-Servers: JSON-Zeilen bis zum Ende
+
+            while not self.closed:
+                line = await reader.readline()
+                if not line:
+                    break
+                if line.strip():
+                    self.ingest(json.loads(line))
+            writer.close()
+
+            pass
+
+        async def run(self,path=None,port=None,host='127.0.0.1'): # Dienst bis zum Ende des Stroms (Datei oder Socket)
+
+            self.event = asyncio.Event()
+            if len(self.pending) > 0 or self.dirty is not None:
+                self.event.set()
+            self.output = asyncio.Queue()
+            solver = asyncio.ensure_future(self.__solver())
+            server = None
+            if path is not None:
+                source = asyncio.ensure_future(self.tailFile(path))
+            elif port is not None:
+                server = await asyncio.start_server(self.__client, host, port)
+                source = None
+            else:
+                raise ValueError('Datei (path) oder Port (port) angeben')
+
+            try:
+                await solver
+            finally:
+                if source is not None:
+                    source.cancel()
+                if server is not None:
+                    server.close()
+                    await server.wait_closed()
+            # Restliche Zeitschritte bis zum Ende des Stroms übernehmen
+            steps, jump = self.__advance()
+            if steps + jump > 0:
+                await asyncio.get_running_loop().run_in_executor(self.executor, self.__move, steps, jump)
+                self.solved = False
+
+            pass
+
+        def close(self):
+
+            self.executor.shutdown()
+
+            pass
+
+        def latency(self): # Latenzen je Aktualisierung
+
+            return pd.DataFrame(self.updates, columns=['arrival', 'emitted', 'latency', 'solve'])
+
+        def solveLog(self): # Fenster, Anzahl zusammengefasster Aktualisierungen, Dauer und Status je Optimierung
+
+            return pd.DataFrame(self.solves, columns=['offset', 'updates', 'solveTime', 'latency', 'objective', 'status', 'late'])
+
+        def summary(self): # Kennzahlen der Latenz
+
+            latency = self.latency()
+            skipped = int(np.sum(latency['solve'] < 0))
+            latency = latency['latency'].dropna().to_numpy()
+            solves = self.solveLog()
+            return {'updates'   : len(latency) + skipped,
+                    'skipped'   : skipped,
+                    'solves'    : len(solves),
+                    'p50'       : float(np.percentile(latency, 50)) if len(latency) > 0 else np.nan,
+                    'p95'       : float(np.percentile(latency, 95)) if len(latency) > 0 else np.nan,
+                    'max'       : float(np.max(latency)) if len(latency) > 0 else np.nan,
+                    'solveTime' : float(solves['solveTime'].mean()) if len(solves) > 0 else np.nan,
+                    'late'      : int(solves['late'].sum()) if len(solves) > 0 else 0}
+
+
+def recordedUpdates(power,co,gas,step,lead,chunks=1): # Aufgezeichnete Preisreihen als Folge von Aktualisierungen
+
+    # Je Takt (step Zeitschritte) rückt die Uhr vor, Preise werden lead Zeitschritte im Voraus
+    # in chunks Teilen (Burst) veröffentlicht, die erste Aktualisierung enthält die Preise bis lead
+    total = len(power)
+    updates = [{'start' : 0, 'power' : list(power[:lead]), 'co' : list(co[:lead]), 'gas' : list(gas[:lead]), 'now' : 0}]
+    for now in range(step, total + 1, step):
+        begin, end = now - step + lead, min(now + lead, total)
+        bounds = np.linspace(begin, end, chunks + 1).astype(int)
+        for a, b in zip(bounds[:-1], bounds[1:]):
+            if b > a:
+                updates.append({'start' : int(a), 'power' : list(power[a:b]), 'co' : list(co[a:b]), 'gas' : list(gas[a:b])})
+        updates.append({'now' : now})
+    updates.append({'now' : total, 'end' : True})
+
+    return updates
+
+
+async def replay(updates,path=None,port=None,host='127.0.0.1',delay=0.0): # Spielt Aktualisierungen in eine Datei oder einen Socket ein
+
+    # delay: Pause nach jeder Zeitaktualisierung ('now') [s], Preisaktualisierungen kommen als Burst
+    if path is not None:
+        with open(path, 'a') as f:
+            for update in updates:
+                f.write(json.dumps(update) + '\n')
+                f.flush()
+                if 'now' in update:
+                    await asyncio.sleep(delay)
+        return
+
+    for attempt in range(100):
+        try:
+            reader, writer = await asyncio.open_connection(host, port)
+            break
+        except OSError:
+            await asyncio.sleep(0.01)
+    for update in updates:
+        writer.write((json.dumps(update) + '\n').encode())
+        await writer.drain()
+        if 'now' in update:
+            await asyncio.sleep(delay)
+    writer.close()
+
+    pass
+
+
+if __name__ == '__main__':
+
+    import tempfile
+    import benchmark
+    from portfolioOpt import powerPlantPortfolio
+
+    # Wiedergabe einer aufgezeichneten (synthetischen) Preisreihe: 2 Tage, Fenster 1 Tag, Takt 1 h
+    T, window, step = 192, 96, 4
+    powerPlants, prices = benchmark.syntheticPortfolio(4, 2, T + window, seed=0)
+    updates = recordedUpdates(prices['power'][:T], prices['co'][:T], prices['gas'][:T], step, window, chunks=3)
+
+    async def main(mode):
+        pf = powerPlantPortfolio(dt=0.25, backend='highs')
+        for powerPlant in powerPlants:
+            pf.addPowerPlant(dict(powerPlant))
+        service = reoptService(pf, T, [], [], [], prices['lignite'], prices['coal'], prices['nuc'], window,
+                               coalesce=0.02, budget=1.0)
+        if mode == 'file':
+            path = os.path.join(tempfile.mkdtemp(), 'prices.jsonl')
+            await asyncio.gather(service.run(path=path), replay(updates, path=path, delay=0.2))
+        else:
+            await asyncio.gather(service.run(port=8765), replay(updates, port=8765, delay=0.2))
+        service.close()
+        print(mode, service.summary())
+        print(service.solveLog().head())
+
+    asyncio.run(main('file'))
+    asyncio.run(main('socket'))
@@ -0,0 +1,236 @@
+#-----------------------------------------------------------------------------
+#
+# Autor: Christian Rieke
+# Datum: 17.10.2026
+#
+# Beschreibung: Solver-Backends für das Portfolio
+#
+#               Ein Backend übernimmt das mit portfolioMatrix.assemble
+#               aufgebaute Gesamtproblem (dünnbesetzte Matrizen), löst es
+#               und liefert die Lösung als Array. Über update werden nur
+#               die fensterabhängigen Werte (problem['window']: Preis-
+#               koeffizienten, rechte Seiten von Start- und Wärmezeilen,
+#               Grenzen aus dem Startzustand) übernommen, soweit sie sich
+#               geändert haben (rollierender Horizont).
+#
+#               gurobi : Gurobi (gurobipy, Lizenz erforderlich)
+#               highs  : HiGHS über scipy.optimize.milp (ohne Lizenz)
+#
+# Letzte Änderung:
+#
+#           17.10.2026  Backends für Gurobi und HiGHS
+#           17.10.2026  Obere Schranke der Optimierung (objBound)
+#           17.10.2026  Status, Presolve-Zeit und Verlauf der Optimierung (progress)
+#           17.10.2026  update nur über die Indizes der fensterabhängigen Werte (statt Matrixvergleich)
+#
+#-----------------------------------------------------------------------------
+
+# Laden der Abhängigkeiten
+import time
+import numpy as np
+import scipy.sparse as sp
+from scipy.optimize import milp, Bounds, LinearConstraint
+
+try:
+    import gurobipy as gp
+except ImportError:                                     # Gurobi ist optional
+    gp = None
+
+
+def changedWindow(problem, values): # Übernimmt Fensterwerte (portfolioMatrix.windowValues) in das Problem
+
+    # Rückgabe: Positionen der geänderten Einträge in coef, rhs und bounds von problem['window']
+    window = problem['window']
+    for key, index in (('coef', 'data'), ('rhs', 'rhs'), ('lb', 'bounds'), ('ub', 'bounds')):
+        if len(values[key]) != len(window[index]):
+            raise ValueError('Problemgröße hat sich geändert, neues Backend erforderlich')
+    A = problem['A']
+    changed = {'coef'   : np.flatnonzero(A.data[window['data']] != values['coef']),
+               'rhs'    : np.flatnonzero(problem['rhs'][window['rhs']] != values['rhs']),
+               'bounds' : np.flatnonzero((problem['lb'][window['bounds']] != values['lb'])
+                                         | (problem['ub'][window['bounds']] != values['ub']))}
+    A.data[window['data']] = values['coef']
+    problem['rhs'][window['rhs']] = values['rhs']
+    problem['lb'][window['bounds']] = values['lb']
+    problem['ub'][window['bounds']] = values['ub']
+
+    return changed
+
+
+class gurobiBackend:
+
+        name = 'gurobi'
+
+        def __init__(self, problem, m=None):
+
+            if gp is None:
+                raise ImportError('gurobipy ist nicht installiert, Backend "highs" verwenden')
+
+            if m is None:
+                m = gp.Model('portfolio')
+                m.Params.OutputFlag = 0
+            self.m = m                                  # Gurobi-Modell
+            self.problem = problem                      # aktuell geladenes Problem
+            self.objVal = np.nan                        # Zielfunktionswert der letzten Optimierung
+            self.objBound = np.nan                      # obere Schranke (Maximierung) der letzten Optimierung
+            self.status = None                          # Status der letzten Optimierung (Gurobi-Statuscode)
+            self.presolve = np.nan                      # Zeit bis zum Ende des Presolve [s]
+            self.progress = []                          # Verlauf {'time', 'incumbent', 'bound'} der letzten Optimierung
+            self.__coefs = None                         # (Constr, Var) der Preiskoeffizienten für chgCoeff (erst bei Bedarf)
+
+            # Je Variablenfamilie ein MVar (Namen wie P_WW[3]), danach ein Vektor über alle Spalten
+            parts = []
+            n = 0
+            for varName, shape in problem['layout']:
+                k = int(np.prod(shape))
+                cols = slice(n, n + k)
+                parts.append(self.m.addMVar(shape, lb=problem['lb'][cols].reshape(shape),
+                                            ub=problem['ub'][cols].reshape(shape),
+                                            vtype=problem['vtype'][cols].reshape(shape),
+                                            name=varName).reshape(k))
+                n += k
+            self.x = gp.hstack(parts)
+            # Alle Nebenbedingungen in einem Aufruf
+            self.rows = self.m.addMConstr(problem['A'], self.x, problem['sense'], problem['rhs'])
+            # Zielfunktion --> Maximiere
+            self.x.Obj = problem['c']
+            self.m.ModelSense = gp.GRB.MAXIMIZE
+            self.m.update()
+
+            pass
+
+        def handle(self, cols): # Modellvariablen zu einem Spaltenbereich
+
+            return self.x[cols]
+
+        def __callback(self, model, where): # Presolve-Ende und Verlauf von bester Lösung und Schranke
+
+            cb = gp.GRB.Callback
+            if where in (cb.SIMPLEX, cb.BARRIER, cb.MIP, cb.MIPSOL, cb.MIPNODE) and np.isnan(self.presolve):
+                self.presolve = model.cbGet(cb.RUNTIME)
+            if where == cb.MIP:
+                point = (model.cbGet(cb.MIP_OBJBST), model.cbGet(cb.MIP_OBJBND))
+            elif where == cb.MIPSOL:
+                point = (model.cbGet(cb.MIPSOL_OBJBST), model.cbGet(cb.MIPSOL_OBJBND))
+            else:
+                return
+            # ohne Lösung meldet Gurobi -/+1e100 --> nan
+            point = tuple(np.nan if abs(v) >= gp.GRB.INFINITY else v for v in point)
+            # nur Änderungen aufzeichnen
+            last = (self.progress[-1]['incumbent'], self.progress[-1]['bound']) if len(self.progress) > 0 else None
+            if last is None or not np.array_equal(point, last, equal_nan=True):
+                self.progress.append({'time' : model.cbGet(cb.RUNTIME), 'incumbent' : point[0], 'bound' : point[1]})
+
+            pass
+
+        def optimize(self): # Optimierung, True wenn optimal
+
+            self.presolve = np.nan
+            self.progress = []
+            self.m.optimize(self.__callback)
+            self.status = self.m.Status
+            optimal = self.m.Status == gp.GRB.OPTIMAL
+            self.objVal = self.m.ObjVal if optimal else np.nan
+            self.objBound = (self.m.ObjBound if self.m.IsMIP else self.m.ObjVal) if optimal else np.nan
+            if optimal:
+                self.progress.append({'time' : self.m.Runtime, 'incumbent' : self.objVal, 'bound' : self.objBound})
+
+            return optimal
+
+        def values(self): # Lösung über alle Spalten
+
+            return np.asarray(self.x.X, dtype=float)
+
+        def setStart(self, x): # Startlösung (MIP-Start)
+
+            self.x.Start = x
+
+            pass
+
+        def update(self, values): # Übernimmt geänderte Preiskoeffizienten, rechte Seiten und Grenzen des Fensters
+
+            window = self.problem['window']
+            changed = changedWindow(self.problem, values)
+            # Matrixkoeffizienten: gurobipy ändert nur einzeln --> nur die geänderten Preiskoeffizienten
+            if len(changed['coef']) > 0:
+                if self.__coefs is None:
+                    self.__coefs = (self.rows[window['coefRows']].tolist(), self.x[window['coefCols']].tolist())
+                constrs, variables = self.__coefs
+                for k, v in zip(changed['coef'], values['coef'][changed['coef']]):
+                    self.m.chgCoeff(constrs[k], variables[k], v)
+            # Rechte Seiten und Grenzen als Teilvektoren
+            if len(changed['rhs']) > 0:
+                self.rows[window['rhs'][changed['rhs']]].RHS = values['rhs'][changed['rhs']]
+            if len(changed['bounds']) > 0:
+                cols = self.x[window['bounds'][changed['bounds']]]
+                cols.LB = values['lb'][changed['bounds']]
+                cols.UB = values['ub'][changed['bounds']]
+            self.m.update()
+
+            pass
+
+
+class highsBackend:
+
+        name = 'highs'
+
+        def __init__(self, problem, options=None):
+
+            self.problem = problem                      # aktuell geladenes Problem
+            self.options = {'mip_rel_gap' : 1e-4}       # Optionen für scipy.optimize.milp (wie Gurobi-Standard)
+            self.options.update(options or {})
+            self.objVal = np.nan                        # Zielfunktionswert der letzten Optimierung
+            self.objBound = np.nan                      # obere Schranke (Maximierung) der letzten Optimierung
+            self.status = None                          # Status der letzten Optimierung (scipy.optimize.milp)
+            self.presolve = np.nan                      # über scipy nicht verfügbar
+            self.progress = []                          # Verlauf {'time', 'incumbent', 'bound'} (nur Endwert)
+            self.result = None                          # Ergebnis von scipy.optimize.milp
+
+            pass
+
+        def handle(self, cols): # Spaltenbereich (HiGHS hat keine Variablenobjekte)
+
+            return cols
+
+        def optimize(self): # Optimierung, True wenn optimal
+
+            problem = self.problem
+            sense = problem['sense']
+            rhs = problem['rhs']
+            # Relationen als Zeilengrenzen: '<' --> (-inf, rhs], '>' --> [rhs, inf), '=' --> [rhs, rhs]
+            lower = np.where(sense == '<', -np.inf, rhs)
+            upper = np.where(sense == '>', np.inf, rhs)
+            # milp minimiert --> Zielfunktion negieren
+            start = time.perf_counter()
+            self.result = milp(-problem['c'],
+                               integrality=(problem['vtype'] != 'C').astype(int),
+                               bounds=Bounds(problem['lb'], problem['ub']),
+                               constraints=LinearConstraint(sp.csr_array(problem['A']), lower, upper),
+                               options=self.options)
+            self.status = self.result.status
+            optimal = self.result.status == 0
+            self.objVal = -self.result.fun if optimal else np.nan
+            bound = getattr(self.result, 'mip_dual_bound', None)
+            self.objBound = (self.objVal if bound is None else -bound) if optimal else np.nan
+            # scipy bietet keinen Callback --> nur Endwert
+            self.progress = [{'time' : time.perf_counter() - start, 'incumbent' : self.objVal, 'bound' : self.objBound}]
+
+            return optimal
+
+        def values(self): # Lösung über alle Spalten
+
+            return np.asarray(self.result.x, dtype=float)
+
+        def setStart(self, x): # HiGHS über scipy bietet keinen MIP-Start
+
+            pass
+
+        def update(self, values): # Fensterwerte im Problem ersetzen (wird bei jedem optimize neu an HiGHS übergeben)
+
+            changedWindow(self.problem, values)
+
+            pass
+
+
+backends = {'gurobi' : gurobiBackend,
+            'highs'  : highsBackend}
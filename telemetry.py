@@ -0,0 +1,108 @@
+#-----------------------------------------------------------------------------
+#
+# Autor: Christian Rieke
+# Datum: 17.10.2026
+#
+# Beschreibung: Messung der Phasen von Modellaufbau und Optimierung
+#
+#               telemetry sammelt Zeiten je Phase (build, block je
+#               Kraftwerk, load, solve, extract, ...), Modellgrößen und
+#               den Verlauf der Optimierung (beste Lösung und Schranke
+#               über der Zeit) als Datensätze. Zusätzlich wird jedes
+#               Ereignis über den Logger 'portfolio' ausgegeben (Stufe
+#               DEBUG, ohne Logging-Konfiguration also nicht sichtbar).
+#
+#               logging.basicConfig(level=logging.DEBUG)  --> Ausgabe
+#
+#               Einzelne Phasen werden nur für die letzten keep Messungen
+#               aufbewahrt (rollierender Horizont, Dienst), die Summen je
+#               Phase (summary) über alle Messungen.
+#
+# Letzte Änderung:
+#
+#           17.10.2026  Phasenzeiten, Modellgrößen und Optimierungsverlauf
+#           17.10.2026  Begrenzte Phasenliste (keep), Summen je Phase über alle Messungen
+#
+#-----------------------------------------------------------------------------
+
+# Laden der Abhängigkeiten
+import time
+import logging
+import contextlib
+import collections
+import pandas as pd
+
+log = logging.getLogger('portfolio')
+
+
+class telemetry:
+
+        def __init__(self, keep=10000):
+
+            self.keep = keep                            # Anzahl aufbewahrter Phasen
+            self.phases = collections.deque(maxlen=keep)    # letzte Phasen {'phase', 'plant', 'start', 'time'}
+            self.totals = {}                            # Anzahl und Summe der Zeiten je Phase [count, sum]
+            self.counters = {}                          # Modellgrößen und Kennzahlen der letzten Optimierung
+            self.progress = []                          # Verlauf {'time', 'incumbent', 'bound'} der letzten Optimierung
+            self.origin = time.perf_counter()           # Bezugszeitpunkt für 'start'
+
+            pass
+
+        @contextlib.contextmanager
+        def phase(self, name, plant=None): # Zeitmessung einer Phase (with-Block)
+
+            start = time.perf_counter()
+            try:
+                yield
+            finally:
+                record = {'phase' : name,
+                          'plant' : plant,
+                          'start' : start - self.origin,
+                          'time'  : time.perf_counter() - start}
+                self.phases.append(record)
+                total = self.totals.setdefault(name, [0, 0.0])
+                total[0] += 1
+                total[1] += record['time']
+                if log.isEnabledFor(logging.DEBUG):
+                    log.debug('%s%s: %.4f s', name, '' if plant is None else ' ' + str(plant), record['time'])
+
+        def count(self, **counters): # Setzen von Kennzahlen (Modellgröße, Status, ...)
+
+            self.counters.update(counters)
+            log.debug('%s', ', '.join('%s=%s' % item for item in counters.items()))
+
+            pass
+
+        def trace(self, progress): # Verlauf der letzten Optimierung übernehmen
+
+            self.progress = list(progress)
+            for point in self.progress:
+                log.debug('t=%.3f s: Lösung %s, Schranke %s', point['time'], point['incumbent'], point['bound'])
+
+            pass
+
+        def last(self, name): # Dauer der letzten Phase name (nan wenn nicht gemessen)
+
+            for record in reversed(self.phases):
+                if record['phase'] == name:
+                    return record['time']
+
+            return float('nan')
+
+        def frame(self): # Letzte Phasen als Tabelle
+
+            return pd.DataFrame(list(self.phases), columns=['phase', 'plant', 'start', 'time'])
+
+        def summary(self): # Anzahl und Summe der Zeiten je Phase über alle Messungen
+
+            return pd.DataFrame([[name, count, time] for name, (count, time) in self.totals.items()],
+                                columns=['phase', 'count', 'sum']).set_index('phase')
+
+        def reset(self): # Alle Datensätze verwerfen
+
+            self.phases = collections.deque(maxlen=self.keep)
+            self.totals = {}
+            self.counters = {}
+            self.progress = []
+
+            pass
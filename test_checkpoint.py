@@ -0,0 +1,141 @@
+"""Checkpoint files, and runs resumed from a checkpoint against uninterrupted runs."""
+import numpy as np
+import pytest
+import benchmark
+import checkpoint as ckpt
+from Mesa_Tutorial import MoneyModel
+from moneyArray import ArrayMoneyModel
+from portfolioOpt import powerPlantPortfolio
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / 'state.ckpt')
+    arrays = {'a': np.arange(7, dtype=np.uint8), 'b': np.linspace(0, 1, 12).reshape(3, 4),
+              'empty': np.empty(0, dtype=np.int64), 'c': np.array([-1, 2**40])}
+    ckpt.save(path, arrays, {'steps': 3, 'name': 'x'})
+    loaded, meta = ckpt.load(path)
+    assert meta == {'steps': 3, 'name': 'x'}
+    assert list(loaded) == list(arrays)
+    for name, a in arrays.items():
+        assert loaded[name].dtype == a.dtype
+        assert np.array_equal(loaded[name], a)
+    loaded['a'][0] = 9                                  # arrays are writable
+
+
+def test_compact_dtype():
+    assert ckpt.compact([0, 200]).dtype == np.uint8
+    assert ckpt.compact([0, 70000]).dtype == np.uint32
+    assert ckpt.compact([-1, 2]).dtype == np.array([-1, 2]).dtype
+
+
+def test_rejects_truncated_and_foreign_files(tmp_path):
+    path = str(tmp_path / 'state.ckpt')
+    ckpt.save(path, {'a': np.arange(100.0)})
+    with open(path, 'rb') as f:
+        data = f.read()
+    with open(path, 'wb') as f:
+        f.write(data[:-64])
+    with pytest.raises(ValueError):
+        ckpt.load(path)
+    with open(path, 'wb') as f:
+        f.write(b'not a checkpoint')
+    with pytest.raises(ValueError):
+        ckpt.load(path)
+
+
+def test_checkpointer_interval(tmp_path):
+    saver = ckpt.Checkpointer(str(tmp_path / 'state.ckpt'), interval=3)
+    states = []
+    for k in range(7):
+        saver.tick(lambda: (states.append(k) or {'k': np.array([k])}, {}))
+    assert states == [2, 5]
+    assert saver.saves == 2
+    assert saver.load()[0]['k'][0] == 5
+
+
+@pytest.mark.parametrize('stream', [False, True])
+def test_array_model_resumes_identically(tmp_path, stream):
+    path = str(tmp_path / 'model.ckpt')
+    data = str(tmp_path / 'collection') if stream else None
+    model = ArrayMoneyModel(200, 6, 6, seed=1, interval=2, path=data, agent_vars=True,
+                            checkpoint=ckpt.Checkpointer(path, interval=5))
+    for k in range(5):
+        model.step()
+    model.checkpoint = None                             # keep the checkpoint of step 5
+    for k in range(6):
+        model.step()
+    wealth = model.wealth.copy()
+    gini = model.get_model_vars_dataframe().copy()
+    agents = np.array(model.datacollector.get_agent_vars('Wealth'))
+
+    # the later steps (and on disk their samples) are redone after the resume
+    resumed = ArrayMoneyModel.resume(path)
+    assert resumed.steps == 5
+    for k in range(6):
+        resumed.step()
+    assert np.array_equal(resumed.wealth, wealth)
+    assert np.array_equal(np.c_[resumed.x, resumed.y], np.c_[model.x, model.y])
+    assert resumed.get_model_vars_dataframe().equals(gini)
+    assert np.array_equal(resumed.datacollector.get_agent_vars('Wealth'), agents)
+
+
+def test_mesa_model_resumes_identically(tmp_path):
+    path = str(tmp_path / 'model.ckpt')
+    model = MoneyModel(50, 5, 5, seed=2, checkpoint=ckpt.Checkpointer(path, interval=4))
+    for k in range(8):
+        model.step()
+    model.checkpoint = None                             # keep the checkpoint of step 8
+    for k in range(5):
+        model.step()
+
+    resumed = MoneyModel.resume(path)
+    assert resumed.schedule.steps == 8
+    for k in range(5):
+        resumed.step()
+    wealth = lambda m: [a.wealth for a in sorted(m.schedule.agents, key=lambda a: a.unique_id)]
+    position = lambda m: [a.pos for a in sorted(m.schedule.agents, key=lambda a: a.unique_id)]
+    assert wealth(resumed) == wealth(model)
+    assert position(resumed) == position(model)
+    assert resumed.datacollector.model_vars['Gini'] == model.datacollector.model_vars['Gini']
+
+
+def portfolio():
+    powerPlants, prices = benchmark.syntheticPortfolio(2, 1, 40, dt=1.0, seed=5)
+    pf = powerPlantPortfolio(dt=1.0, backend='highs')
+    for powerPlant in powerPlants:
+        pf.addPowerPlant(powerPlant)
+    return pf, prices
+
+
+def rolling(pf, prices, **kwargs):
+    pf.runRolling(prices['power'][:32], prices['co'][:32], prices['gas'][:32],
+                  prices['lignite'], prices['coal'], prices['nuc'], window=12, step=4, **kwargs)
+
+
+def test_portfolio_state_round_trip(tmp_path):
+    path = str(tmp_path / 'portfolio.ckpt')
+    pf, prices = portfolio()
+    rolling(pf, prices)
+    pf.saveState(path)
+    other, prices = portfolio()
+    other.loadState(path)
+    assert other.offset == pf.offset
+    assert other.schedule.equals(pf.schedule)
+    for name in pf.results:
+        for key in ('P0', 'on', 'P+0', 'P-0', 'V0'):
+            if key in pf.results[name]:
+                assert other.results[name][key] == pf.results[name][key]
+
+
+def test_rolling_run_resumes(tmp_path):
+    path = str(tmp_path / 'rolling.ckpt')
+    pf, prices = portfolio()
+    saver = ckpt.Checkpointer(path, interval=3)
+    rolling(pf, prices, checkpoint=saver)
+    # last checkpoint after 6 of 8 windows, the resumed run solves the remaining two
+    arrays, meta = saver.load()
+    assert meta['offset'] == 24
+    resumed, prices = portfolio()
+    rolling(resumed, prices, checkpoint=ckpt.Checkpointer(path, interval=3), resume=True)
+    assert resumed.offset == pf.offset
+    assert np.allclose(resumed.schedule.to_numpy(), pf.schedule.to_numpy(), atol=1e-6, equal_nan=True)
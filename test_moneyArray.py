@@ -0,0 +1,35 @@
+"""Statistical equivalence of ArrayMoneyModel and the mesa MoneyModel.
+
+Both models are run with fixed seeds. The tests fail if a KS test rejects
+equal distributions at ALPHA or the Gini trajectories drift apart by more
+than ZMAX standard errors at any step.
+"""
+import numpy as np
+import pytest
+from moneyArray import ArrayMoneyModel, compareReference
+
+ALPHA = 0.01
+ZMAX = 4.0
+
+
+@pytest.mark.parametrize('width, height', [(10, 10), (2, 5), (1, 4)])
+def test_equivalent_to_reference(width, height):
+    result = compareReference(N=50, width=width, height=height, steps=40, runs=40, seed=0)
+    assert result['gini'] >= ALPHA
+    assert result['wealth'] >= ALPHA
+    assert result['trajectory'] <= ZMAX
+
+
+@pytest.mark.parametrize('width, height', [(2, 5), (1, 4), (2, 2)])
+def test_small_grid_moves_to_distinct_neighbours(width, height):
+    model = ArrayMoneyModel(2000, width, height, seed=0)
+    start = model.cells()
+    model.move()
+    for cell in range(width * height):
+        moved = model.cells()[start == cell]
+        neighbors = model.neighbors[cell, :model.neighbor_count[cell]]
+        assert set(moved) <= set(neighbors)
+        # every distinct neighbour about equally often (mesa counts each cell once)
+        counts = np.array([np.sum(moved == n) for n in neighbors])
+        expected = len(moved) / len(neighbors)
+        assert np.all(np.abs(counts - expected) < 5 * np.sqrt(expected))
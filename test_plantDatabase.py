@@ -0,0 +1,129 @@
+"""Plant records (validation, dict round-trip) and the cached fleet loader."""
+import os
+import shutil
+import numpy as np
+import pytest
+import plantDatabase as pdb
+from portfolioOpt import powerPlantPortfolio
+
+conv = {'typ': 'konv', 'name': 'K', 'fuel': 'gas', 'powerMax': 400.0, 'powerMin': 100.0, 'eta': 0.5, 'chi': 0.2,
+        'grad+': 100.0, 'grad-': 100.0, 'stopTime': 4, 'runTime': 4, 'P0': 0.0, 'on': -4, 'heat': []}
+storage = {'typ': 'storage', 'name': 'S', 'VMax': 600.0, 'VMin': 0.0, 'P+_Max': 100.0, 'P+_Min': 10.0,
+           'P-_Max': 100.0, 'P-_Min': 0.0, 'eta+': 0.85, 'eta-': 0.85, 'grad++': 100.0, 'grad+-': 100.0,
+           'grad-+': 100.0, 'grad--': 100.0, 'P+0': 0.0, 'P-0': 0.0, 'V0': 300.0}
+
+
+@pytest.mark.parametrize('powerPlant', [conv, storage])
+def test_dict_round_trip(powerPlant):
+    record = pdb.toRecord(powerPlant)
+    assert pdb.toRecord(record) is record
+    result = record.asDict()
+    for key, value in powerPlant.items():
+        assert np.array_equal(result[key], value)
+
+
+def test_defaults_for_start_state():
+    record = pdb.toRecord({key: value for key, value in conv.items() if key not in ('P0', 'on', 'heat')})
+    assert (record.P0, record.on, len(record.heat)) == (0.0, 0, 0)
+
+
+@pytest.mark.parametrize('change, message', [
+    ({'fuel': 'wood'}, 'Brennstoff'),
+    ({'powerMax': 0.0}, 'powerMax'),
+    ({'powerMin': 500.0}, 'powerMin'),
+    ({'eta': 1.5}, 'eta'),
+    ({'chi': -0.1}, 'chi'),
+    ({'grad-': -1.0}, 'Gradienten'),
+    ({'runTime': -1}, 'Stillstandszeit'),
+    ({'heat': [[1.0]]}, 'heat'),
+    ({'typ': 'wind'}, 'typ'),
+    ({'Pmax': 1.0}, 'unbekannte'),
+])
+def test_conv_validation(change, message):
+    with pytest.raises(ValueError, match=message):
+        pdb.toRecord(dict(conv, **change))
+
+
+@pytest.mark.parametrize('change, message', [
+    ({'VMin': 700.0}, 'VMin'),
+    ({'V0': 700.0}, 'V0'),
+    ({'P+_Min': 200.0}, 'P\\+_Min'),
+    ({'eta-': 0.0}, 'eta'),
+    ({'grad--': -1.0}, 'Gradienten'),
+])
+def test_storage_validation(change, message):
+    with pytest.raises(ValueError, match=message):
+        pdb.toRecord(dict(storage, **change))
+
+
+def test_missing_key():
+    powerPlant = dict(conv)
+    del powerPlant['eta']
+    with pytest.raises(ValueError, match='fehlende'):
+        pdb.toRecord(powerPlant)
+
+
+def test_portfolio_rejects_invalid_plant():
+    pf = powerPlantPortfolio(backend='highs')
+    with pytest.raises(ValueError, match='K'):
+        pf.addPowerPlant(dict(conv, eta=0.0))
+    assert pf.powerPlants == []
+
+
+@pytest.fixture
+def sources(tmp_path, monkeypatch):
+    # source files in a temporary directory, the cache next to them, the Excel parser counted
+    paths = {}
+    for key, path in pdb.sources.items():
+        paths[key] = str(tmp_path / os.path.basename(path))
+        shutil.copy(path, paths[key])
+    monkeypatch.setattr(pdb, 'cacheDir', str(tmp_path / 'cache'))
+    calls = []
+    readFleet = pdb.readFleet
+
+    def counted(paths=None):
+        calls.append(paths)
+        return readFleet(paths)
+
+    monkeypatch.setattr(pdb, 'readFleet', counted)
+    return paths, calls
+
+
+def test_cache_hit_and_invalidation(sources):
+    paths, calls = sources
+    fleet = pdb.loadFleet(paths)
+    assert len(calls) == 1
+    assert len(os.listdir(pdb.cacheDir)) == 1
+    cached = pdb.loadFleet(paths)
+    assert len(calls) == 1
+    assert set(cached) == set(fleet)
+    for column in fleet:
+        assert np.array_equal(cached[column], fleet[column])
+    # a changed source file gives a new key and is read again
+    with open(paths['entsoe'], 'ab') as f:
+        f.write(b'\0')
+    pdb.loadFleet(paths)
+    assert len(calls) == 2
+    assert len(os.listdir(pdb.cacheDir)) == 2
+    # a new reader version invalidates as well
+    pdb.version += 1
+    try:
+        pdb.loadFleet(paths)
+    finally:
+        pdb.version -= 1
+    assert len(calls) == 3
+
+
+def test_records_from_fleet(sources):
+    paths, calls = sources
+    fleet = pdb.loadFleet(paths, cache=False)
+    assert not os.path.exists(pdb.cacheDir)
+    records = pdb.fleetRecords(fleet, dt=0.5, minPower=100)
+    names = [record.name for record in records]
+    assert len(names) == len(set(names))
+    for record in records:
+        powerPlant = record.asDict()
+        if powerPlant['typ'] == 'konv':
+            assert powerPlant['powerMax'] >= 100
+            # plants can start: gradient at least the minimum load
+            assert powerPlant['grad+'] >= powerPlant['powerMin']
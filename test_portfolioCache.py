@@ -0,0 +1,85 @@
+"""solveCache hits and misses, problemKey and revenue of agents without a dispatch."""
+import numpy as np
+import benchmark
+from marketModel import MarketModel
+from portfolioCache import problemKey, solveCache
+from portfolioOpt import powerPlantPortfolio
+
+T = 12
+
+
+def portfolio(backend='highs'):
+    powerPlants, prices = benchmark.syntheticPortfolio(3, 0, T, dt=1.0, seed=2)
+    pf = powerPlantPortfolio(dt=1.0, backend=backend)
+    for powerPlant in powerPlants:
+        pf.addPowerPlant(powerPlant)
+    pf.setPrices(prices['power'], prices['co'], prices['gas'], prices['lignite'], prices['coal'], prices['nuc'])
+    return pf, prices
+
+
+def test_hit_restores_schedule_and_miss_on_new_prices():
+    # identical portfolios (like agents with the same plants) share an entry
+    cache = solveCache()
+    first, prices = portfolio()
+    assert cache.solve(first)
+    second, prices = portfolio()
+    assert cache.solve(second)
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert second.backend is None
+    assert second.schedule.equals(first.schedule)
+    assert second.results['K1']['P0'] == first.results['K1']['P0']
+    third, prices = portfolio()
+    third.setPrices(prices['power'] + 10, prices['co'], prices['gas'], prices['lignite'], prices['coal'], prices['nuc'])
+    assert cache.solve(third)
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_tolerance_shares_key():
+    first, prices = portfolio()
+    second, prices = portfolio()
+    first.setPrices(np.round(prices['power']), prices['co'], prices['gas'],
+                    prices['lignite'], prices['coal'], prices['nuc'])
+    # same grid cell as the rounded prices
+    second.setPrices(np.round(prices['power']) + 0.1, prices['co'], prices['gas'],
+                     prices['lignite'], prices['coal'], prices['nuc'])
+    assert problemKey(first, 1.0) == problemKey(second, 1.0)
+    assert problemKey(first) != problemKey(second)
+
+
+def test_eviction():
+    cache = solveCache(maxSize=1)
+    for shift in (0, 10, 0):
+        pf, prices = portfolio()
+        pf.setPrices(prices['power'] + shift, prices['co'], prices['gas'],
+                     prices['lignite'], prices['coal'], prices['nuc'])
+        assert cache.solve(pf)
+    assert cache.stats()['evictions'] == 2
+    assert cache.hits == 0
+
+
+def test_key_covers_resolution_and_backend():
+    pf, prices = portfolio()
+    keys = {problemKey(pf)}
+    pf.setResolution(weight=np.full(T, 2.0))
+    keys.add(problemKey(pf))
+    pf.setResolution(length=np.full(T, 2.0))
+    keys.add(problemKey(pf))
+    pf.setResolution()
+    pf.backendName = 'gurobi'
+    keys.add(problemKey(pf))
+    assert len(keys) == 4
+
+
+def test_failed_dispatch_earns_nothing():
+    powerPlants, prices = benchmark.syntheticPortfolio(2, 0, T, dt=1.0, seed=3)
+    demand = np.full(T, 300.0)
+    model = MarketModel([powerPlants, [dict(p) for p in powerPlants]], demand, prices['power'], prices['co'],
+                        prices['gas'], prices['lignite'], prices['coal'], prices['nuc'], dt=1.0, cacheSize=0)
+    model.step()
+    assert all(a.solved for a in model.schedule.agents)
+    # the second period fails for agent 1: its schedule of period 1 must not earn revenue again
+    solve = model.cache.solve
+    model.cache.solve = lambda pf: False if pf is model.schedule.agents[1].portfolio else solve(pf)
+    model.step()
+    assert not model.schedule.agents[1].solved
+    assert model.schedule.agents[1].revenue == 0.0
@@ -0,0 +1,73 @@
+"""Lagrangian decomposition: bounds, coupled schedules and the uncoupled case against the full model."""
+import numpy as np
+import pytest
+import benchmark
+import portfolioDecomp as decomp
+from portfolioOpt import powerPlantPortfolio
+
+T = 16
+
+
+def portfolio(seed=6):
+    powerPlants, prices = benchmark.syntheticPortfolio(3, 1, T, dt=1.0, seed=seed)
+    pf = powerPlantPortfolio(dt=1.0, backend='highs')
+    pf.setPrices(prices['power'], prices['co'], prices['gas'], prices['lignite'], prices['coal'], prices['nuc'])
+    for powerPlant in powerPlants:
+        pf.addPowerPlant(powerPlant)
+    return pf
+
+
+def total(schedule):
+    return schedule['P'].groupby(level='t').sum().to_numpy()
+
+
+def test_feasible():
+    total = np.array([1.0, 2.0, 3.0])
+    assert decomp._feasible(total, 3.0, '<') and not decomp._feasible(total, 2.5, '<')
+    assert decomp._feasible(total, 1.0, '>') and not decomp._feasible(total, 1.5, '>')
+    assert decomp._feasible(total, total + 1e-9, '=') and not decomp._feasible(total, 2.0, '=')
+
+
+def test_uncoupled_matches_full_model():
+    result = decomp.solveDecomposed(portfolio(), processes=1)
+    full = portfolio()
+    full.buildModel()
+    assert full.runOpt(plot=False)
+    assert result['iterations'] == 1
+    assert np.isclose(result['objective'], full.backend.objVal, rtol=1e-4)
+    assert result['bound'] >= result['objective'] - 1e-6 * abs(result['objective'])
+    assert result['schedule'].index.names == ['plant', 't']
+    assert len(result['schedule']) == 4 * T
+
+
+@pytest.mark.parametrize('processes', [1, 2])
+def test_coupled_bound_and_schedule(processes):
+    free = decomp.solveDecomposed(portfolio(), processes=1)
+    cap = 0.5 * total(free['schedule']).max()
+    result = decomp.solveDecomposed(portfolio(), cap=cap, sense='<', maxIter=20, processes=processes)
+    # the cap binds: the best feasible schedule keeps it and earns less than without it
+    assert np.isfinite(result['objective'])
+    assert np.all(total(result['schedule']) <= cap + 1e-6)
+    assert result['objective'] <= free['objective'] + 1e-6 * abs(free['objective'])
+    # Lagrange bound above every feasible objective, gap and history consistent with it
+    assert result['bound'] >= result['objective'] - 1e-6 * abs(result['objective'])
+    assert result['gap'] >= -1e-9
+    history = result['history']
+    assert len(history) == result['iterations']
+    assert np.all(np.diff(history['bound']) <= 1e-9)
+    assert np.all(np.diff(history['primal']) >= -1e-9)
+    assert np.all(result['lambda'] >= 0)
+
+
+def test_repair_keeps_commitment_and_cap():
+    pf = portfolio()
+    free = decomp.solveDecomposed(portfolio(), processes=1)
+    values = {name: {family: group.to_numpy() for family, group in free['schedule'].loc[name].items()}
+              for name in free['schedule'].index.get_level_values('plant').unique()}
+    cap = np.full(T, 0.8 * total(free['schedule']).max())
+    objVal, repaired = decomp._repair(pf, values, cap, '<')
+    assert np.isfinite(objVal) and objVal <= free['objective'] + 1e-6 * abs(free['objective'])
+    assert np.all(np.sum([v['P'] for v in repaired.values()], axis=0) <= cap + 1e-6)
+    for name, v in repaired.items():
+        if 'On' in v:
+            assert np.allclose(v['On'], np.round(values[name]['On']))
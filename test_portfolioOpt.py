@@ -0,0 +1,95 @@
+"""updateModel against a rebuilt model, matrix build against the per-step Gurobi build."""
+import numpy as np
+import pytest
+import benchmark
+import solverBackend as sb
+from portfolioOpt import powerPlantPortfolio
+
+TOTAL, WINDOW, STEP = 24, 12, 5
+
+
+def portfolio(backend):
+    powerPlants, prices = benchmark.syntheticPortfolio(3, 1, TOTAL, dt=1.0, seed=1)
+    # heat demand on one plant so the heat rows move with the window, zero prices at some steps
+    powerPlants[1]['heat'] = list(np.linspace(0, powerPlants[1]['powerMin'], TOTAL))
+    prices['power'][[3, 15]] = 0.0
+    pf = powerPlantPortfolio(dt=1.0, backend=backend)
+    for powerPlant in powerPlants:
+        pf.addPowerPlant(powerPlant)
+    return pf, prices
+
+
+def window(pf, prices):
+    cut = slice(pf.offset, pf.offset + WINDOW)
+    pf.setPrices(prices['power'][cut], prices['co'][cut], prices['gas'][cut],
+                 prices['lignite'], prices['coal'], prices['nuc'])
+
+
+@pytest.mark.parametrize('backend', ['highs', 'gurobi'])
+def test_update_matches_rebuild(backend):
+    if backend == 'gurobi' and sb.gp is None:
+        pytest.skip('gurobipy not installed')
+    pf, prices = portfolio(backend)
+    window(pf, prices)
+    pf.buildModel()
+    assert pf.optimizeWindow()
+    for k in range(2):
+        pf.commit(STEP)
+        window(pf, prices)
+        pf.updateModel()
+        rebuilt = pf.buildProblem()
+        assert (pf.problem['A'] != rebuilt['A']).nnz == 0
+        for key in ('rhs', 'lb', 'ub', 'c'):
+            assert np.array_equal(pf.problem[key], rebuilt[key])
+        assert pf.optimizeWindow()
+        updated = pf.backend.objVal
+        fresh = sb.backends[backend](rebuilt)
+        assert fresh.optimize()
+        assert np.isclose(updated, fresh.objVal, rtol=1e-3)
+
+
+def test_update_rejects_other_structure():
+    pf, prices = portfolio('highs')
+    window(pf, prices)
+    pf.buildModel()
+    pf.powerPlants[1]['heat'] = []
+    with pytest.raises(ValueError):
+        pf.updateModel()
+
+
+def fixedRows(powerPlants, results):
+    # the per-step build fixes On by rows where the matrix build uses bounds
+    rows = 0
+    for powerPlant in powerPlants:
+        on = results[powerPlant['name']].get('on')
+        if powerPlant['typ'] == 'konv' and on < 0:
+            rows += max(powerPlant['stopTime'] + on, 0)
+        if powerPlant['typ'] == 'konv' and on > 0:
+            rows += max(powerPlant['runTime'] - on, 0)
+    return rows
+
+
+@pytest.mark.parametrize('carried', [False, True])
+def test_matrix_matches_per_step_build(carried):
+    if sb.gp is None:
+        pytest.skip('gurobipy not installed')
+    powerPlants, prices = benchmark.syntheticPortfolio(3, 1, 16, dt=1.0, seed=4)
+    if carried:
+        # K0 started 2 steps ago at minimum load, K2 stopped one step ago
+        powerPlants[0].update(on=2, P0=powerPlants[0]['powerMin'])
+        powerPlants[2].update(on=-1, P0=0)
+    sizes = {}
+    for matrix in (True, False):
+        pf = powerPlantPortfolio(dt=1.0, matrix=matrix, backend='gurobi')
+        pf.setPrices(prices['power'], prices['co'], prices['gas'], prices['lignite'], prices['coal'], prices['nuc'])
+        for powerPlant in powerPlants:
+            pf.addPowerPlant(powerPlant)
+        fixed = fixedRows(pf.powerPlants, pf.results)
+        pf.buildModel()
+        assert pf.runOpt(plot=False)
+        sizes[matrix] = dict(pf.telemetry.counters)
+    assert fixed > 0 if carried else fixed == 0
+    assert sizes[True]['cols'] == sizes[False]['cols']
+    assert sizes[True]['binaries'] == sizes[False]['binaries']
+    assert sizes[True]['rows'] + fixed == sizes[False]['rows']
+    assert np.isclose(sizes[True]['objective'], sizes[False]['objective'], rtol=1e-4)
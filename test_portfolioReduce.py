@@ -0,0 +1,92 @@
+"""Representative periods: disaggregated schedules, their violations and the full-resolution repair."""
+import numpy as np
+import pytest
+import benchmark
+import portfolioReduce as pr
+import solverBackend as sb
+from portfolioOpt import powerPlantPortfolio
+
+T = 96
+
+
+def portfolio(seed=3):
+    powerPlants, prices = benchmark.syntheticPortfolio(3, 1, T, dt=1.0, seed=seed)
+    pf = powerPlantPortfolio(dt=1.0, backend='highs')
+    pf.setPrices(prices['power'], prices['co'], prices['gas'], prices['lignite'], prices['coal'], prices['nuc'])
+    for powerPlant in powerPlants:
+        pf.addPowerPlant(powerPlant)
+    return pf
+
+
+def optimum(pf):
+    backend = sb.highsBackend(pf.buildProblem())
+    assert backend.optimize()
+    return backend.objVal
+
+
+def test_all_periods_reproduce_full_model():
+    pf = portfolio()
+    result = pr.solveReduced(pf, 24, 4, repair=False)
+    full = optimum(portfolio())
+    assert result['T'] == T
+    assert np.isclose(result['objective'], full, rtol=1e-6)
+    assert np.isclose(result['evaluated'], full, rtol=1e-6)
+    assert len(result['violations']) == 0
+    assert len(pr.violations(pf, result['schedule'])) == 0
+
+
+def test_disaggregated_schedule():
+    pf = portfolio()
+    result = pr.solveReduced(pf, 24, 2, repair=False)
+    schedule = result['schedule']
+    assert result['T'] == T // 2
+    assert list(schedule.index.names) == ['plant', 't']
+    price = pr.fullPrices(pf)['power']
+    for powerPlant in pf.powerPlants:
+        frame = schedule.loc[powerPlant['name']]
+        assert len(frame) == T
+        # valued with the actual prices of every time step, not the cluster means
+        assert np.allclose(frame['Profit'], frame['P'] * price)
+        assert np.array_equal(frame['On'], np.round(frame['On']))
+        if powerPlant['typ'] == 'storage':
+            assert np.all(frame['V'] >= powerPlant['VMin'] - 1e-6)
+            assert np.all(frame['V'] <= powerPlant['VMax'] + 1e-6)
+    assert np.isclose(result['evaluated'], schedule['Profit'].sum() - schedule['F'].sum() + schedule['E'].sum())
+    # the reported violations are those of the returned schedule
+    found = pr.violations(pf, schedule)
+    assert found.equals(result['violations'])
+    assert set(found['constraint']) <= {'grad+', 'grad-', 'powerMax', 'powerMin', 'runTime', 'stopTime',
+                                        'grad++', 'grad+-', 'grad-+', 'grad--', 'VMax', 'VMin'}
+    assert np.all(found['excess'] > 0)
+
+
+def test_repair_is_feasible():
+    pf = portfolio()
+    result = pr.solveReduced(pf, 24, 2)
+    assert result['repaired']
+    assert len(pr.violations(pf, result['schedule'])) == 0
+    assert result['evaluated'] <= optimum(portfolio()) * (1 + 1e-6)
+    assert result['evaluated'] >= pr.solveReduced(portfolio(), 24, 2, repair=False)['evaluated'] - 1e-6
+
+
+def running(pf, schedule):
+    # a conventional plant with a running step inside the horizon
+    for powerPlant in pf.powerPlants:
+        on = schedule.loc[powerPlant['name'], 'On'].to_numpy() if powerPlant['typ'] == 'konv' else []
+        if np.any(on[1:-1] > 0):
+            return powerPlant, 1 + int(np.flatnonzero(on[1:-1] > 0)[0])
+    pytest.skip('no running conventional plant')
+
+
+@pytest.mark.parametrize('family, constraint', [('P', 'powerMax'), ('On', 'powerMax')])
+def test_violations_detects_changes(family, constraint):
+    pf = portfolio()
+    schedule = pr.solveReduced(pf, 24, 4)['schedule'].copy()
+    powerPlant, t = running(pf, schedule)
+    name = powerPlant['name']
+    row = (name, pf.offset + t)
+    # above the maximum power, or producing while switched off
+    schedule.loc[row, family] = powerPlant['powerMax'] + 10 if family == 'P' else 0
+    found = pr.violations(pf, schedule)
+    assert set(found['plant']) == {name}
+    assert found.loc[found['constraint'] == constraint, 't'].tolist() == [pf.offset + t]
@@ -0,0 +1,72 @@
+"""reoptService against a local replay of a recorded price series."""
+import asyncio
+import numpy as np
+import benchmark
+from portfolioOpt import powerPlantPortfolio
+from portfolioService import reoptService, recordedUpdates, replay
+
+TOTAL, WINDOW = 32, 8
+
+
+def service():
+    powerPlants, prices = benchmark.syntheticPortfolio(2, 1, TOTAL + WINDOW, dt=1.0, seed=0)
+    pf = powerPlantPortfolio(dt=1.0, backend='highs')
+    for powerPlant in powerPlants:
+        pf.addPowerPlant(dict(powerPlant))
+    commits = []
+    commit = pf.commit
+
+    def recording(n):
+        # window that is committed (offset, solved schedule) and the start states afterwards
+        before = pf.offset, pf.schedule.copy()
+        commit(n)
+        commits.append((before, n, {name: dict(pf.results[name]) for name in ('K1', 'S0')}))
+
+    pf.commit = recording
+    return reoptService(pf, TOTAL, [], [], [], prices['lignite'], prices['coal'], prices['nuc'], WINDOW,
+                        coalesce=0.01), prices, commits
+
+
+def test_jump_beyond_window_commits_solved_plan(tmp_path):
+    svc, prices, commits = service()
+    updates = recordedUpdates(prices['power'][:TOTAL], prices['co'][:TOTAL], prices['gas'][:TOTAL],
+                              step=4, lead=WINDOW)
+    # first window, then the clock jumps 12 steps (> WINDOW) at once
+    jump = [updates[0], {'now': 12}, {'now': TOTAL, 'end': True}]
+    path = str(tmp_path / 'prices.jsonl')
+
+    async def main():
+        await asyncio.gather(svc.run(path=path), replay(jump, path=path, delay=0.5))
+
+    asyncio.run(main())
+    svc.close()
+
+    (offset, schedule), n, states = commits[0]
+    assert offset == 0 and n == WINDOW
+    # start states are those after the last committed step of the solved window, not the initial ones
+    last = schedule.xs(WINDOW - 1, level='t')
+    assert np.isclose(states['K1']['P0'], last.loc['K1', 'P'])
+    assert np.isclose(states['S0']['V0'], last.loc['S0', 'V'])
+    assert svc.pf.offset == TOTAL
+    assert svc.solveLog()['offset'].tolist()[:2] == [0, 12]
+
+
+def test_replay_steps_through_horizon(tmp_path):
+    svc, prices, commits = service()
+    updates = recordedUpdates(prices['power'][:TOTAL], prices['co'][:TOTAL], prices['gas'][:TOTAL],
+                              step=4, lead=WINDOW, chunks=2)
+    path = str(tmp_path / 'prices.jsonl')
+
+    async def main():
+        await asyncio.gather(svc.run(path=path), replay(updates, path=path, delay=0.2))
+
+    asyncio.run(main())
+    svc.close()
+
+    assert svc.pf.offset == TOTAL
+    summary = svc.summary()
+    assert summary['updates'] == len(updates)
+    assert summary['solves'] >= 1
+    # every commit continues where the previous one stopped
+    offsets = [offset + n for (offset, schedule), n, states in commits]
+    assert offsets == sorted(offsets)
@@ -0,0 +1,79 @@
+"""Gurobi and HiGHS backends on the same assembled problem."""
+import numpy as np
+import pytest
+import benchmark
+import portfolioOpt
+import solverBackend as sb
+from portfolioOpt import powerPlantPortfolio
+
+T = 16
+
+
+def problem():
+    powerPlants, prices = benchmark.syntheticPortfolio(3, 1, T, dt=1.0, seed=6)
+    pf = powerPlantPortfolio(dt=1.0, backend='highs')
+    pf.setPrices(prices['power'], prices['co'], prices['gas'], prices['lignite'], prices['coal'], prices['nuc'])
+    for powerPlant in powerPlants:
+        pf.addPowerPlant(powerPlant)
+    return pf.buildProblem()
+
+
+def feasible(problem, x, tol=1e-5):
+    Ax = problem['A'] @ x
+    rhs, sense = problem['rhs'], problem['sense']
+    ok = np.where(sense == '<', Ax <= rhs + tol, np.where(sense == '>', Ax >= rhs - tol, np.abs(Ax - rhs) <= tol))
+    integral = problem['vtype'] == 'B'
+    return (ok.all() and np.all(x >= problem['lb'] - tol) and np.all(x <= problem['ub'] + tol)
+            and np.allclose(x[integral], np.round(x[integral]), atol=tol))
+
+
+def test_highs_solution():
+    p = problem()
+    backend = sb.highsBackend(p)
+    assert backend.optimize()
+    x = backend.values()
+    assert feasible(p, x)
+    assert np.isclose(p['c'] @ x, backend.objVal)
+    assert backend.objBound >= backend.objVal - 1e-6
+    assert backend.progress[-1]['incumbent'] == backend.objVal
+
+
+def test_backends_agree():
+    if sb.gp is None:
+        pytest.skip('gurobipy not installed')
+    p = problem()
+    results = {}
+    for name, cls in sb.backends.items():
+        backend = cls(p)
+        assert backend.optimize()
+        assert feasible(p, backend.values())
+        results[name] = backend.objVal
+    assert np.isclose(results['gurobi'], results['highs'], rtol=1e-3)
+
+
+def test_portfolio_results_agree():
+    if sb.gp is None:
+        pytest.skip('gurobipy not installed')
+    powerPlants, prices = benchmark.syntheticPortfolio(3, 1, T, dt=1.0, seed=6)
+    profit = {}
+    for backend in ('gurobi', 'highs'):
+        pf = powerPlantPortfolio(dt=1.0, backend=backend)
+        pf.setPrices(prices['power'], prices['co'], prices['gas'], prices['lignite'], prices['coal'], prices['nuc'])
+        for powerPlant in powerPlants:
+            pf.addPowerPlant(powerPlant)
+        pf.buildModel()
+        assert pf.runOpt(plot=False)
+        assert list(pf.schedule.index.names) == ['plant', 't']
+        profit[backend] = pf.backend.objVal
+    assert np.isclose(profit['gurobi'], profit['highs'], rtol=1e-3)
+
+
+def test_gurobi_backend_without_gurobipy(monkeypatch):
+    monkeypatch.setattr(portfolioOpt, 'gurobi', False)
+    monkeypatch.setattr(sb, 'gp', None)
+    with pytest.raises(ImportError, match='highs'):
+        powerPlantPortfolio(backend='gurobi')
+    with pytest.raises(ImportError, match='highs'):
+        sb.gurobiBackend(problem())
+    # HiGHS needs no licence
+    assert powerPlantPortfolio(backend='highs').backendName == 'highs'
@@ -0,0 +1,88 @@
+"""TorusGrid neighbourhood tables and occupancy bookkeeping against mesa's MultiGrid."""
+import random
+import numpy as np
+import pytest
+from mesa import Agent, Model
+from mesa.space import MultiGrid
+from torusGrid import TorusGrid
+
+
+def agents(n):
+    model = Model()
+    return [Agent(i, model) for i in range(n)]
+
+
+def consistent(grid):
+    # every agent sits in the slot it is registered for, empties match the empty cells
+    for x in range(grid.width):
+        for y in range(grid.height):
+            cell = grid.grid[x][y]
+            for i, agent in enumerate(cell):
+                assert grid._slot[agent] == i
+                assert agent.pos == (x, y)
+            assert (len(cell) == 0) == ((x, y) in grid.empties)
+    assert len(grid._slot) == sum(len(cell) for column in grid.grid for cell in column)
+
+
+@pytest.mark.parametrize('width, height', [(5, 4), (2, 3), (1, 1)])
+def test_neighborhood_matches_mesa(width, height):
+    grid = TorusGrid(width, height)
+    reference = MultiGrid(width, height, True)
+    for x in range(width):
+        for y in range(height):
+            expected = reference.get_neighborhood((x, y), True, False)
+            assert grid.get_neighborhood((x, y), True) == expected
+            cells = grid.neighbors[x * height + y, :grid.neighbor_count[x * height + y]]
+            assert [divmod(int(c), height) for c in cells] == [tuple(p) for p in expected]
+            assert np.all(grid.neighbors[x * height + y, grid.neighbor_count[x * height + y]:] == -1)
+    # other neighbourhoods still come from mesa
+    assert grid.get_neighborhood((0, 0), False, True) == reference.get_neighborhood((0, 0), False, True)
+
+
+def test_random_moves_and_removals_keep_index():
+    rng = random.Random(0)
+    grid = TorusGrid(4, 3)
+    population = agents(40)
+    for agent in population:
+        grid.place_agent(agent, (rng.randrange(4), rng.randrange(3)))
+    consistent(grid)
+    placed = list(population)
+    for k in range(500):
+        agent = rng.choice(placed)
+        if rng.random() < 0.05 and len(placed) > 10:
+            grid.remove_agent(agent)
+            placed.remove(agent)
+            assert agent.pos is None and agent not in grid._slot
+        else:
+            grid.move_agent(agent, rng.choice(grid.get_neighborhood(agent.pos, True)))
+        consistent(grid)
+    assert grid.occupancy().sum() == len(placed)
+    assert grid.occupancy()[placed[0].pos] == len(grid.cell_contents(placed[0].pos))
+
+
+def test_double_placement_rejected():
+    grid = TorusGrid(3, 3)
+    agent, = agents(1)
+    grid.place_agent(agent, (0, 0))
+    grid._place_agent((0, 0), agent)                  # same cell: no-op
+    assert grid.cell_contents((0, 0)) == [agent]
+    with pytest.raises(ValueError):
+        grid._place_agent((1, 1), agent)
+
+
+def test_set_positions_restores_order():
+    rng = random.Random(1)
+    grid = TorusGrid(3, 3)
+    population = agents(20)
+    for agent in population:
+        grid.place_agent(agent, (rng.randrange(3), rng.randrange(3)))
+    for k in range(50):
+        agent = rng.choice(population)
+        grid.move_agent(agent, rng.choice(grid.get_neighborhood(agent.pos, True)))
+    cells, order = grid.cell_order(population)
+    contents = [[list(cell) for cell in column] for column in grid.grid]
+
+    other = TorusGrid(3, 3)
+    other.set_positions(population, cells, order)
+    assert [[list(cell) for cell in column] for column in other.grid] == contents
+    consistent(other)
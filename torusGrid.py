@@ -0,0 +1,101 @@
+#-----------------------------------------------------------------------------
+#
+# Toroidal MultiGrid with precomputed neighbourhoods and occupancy index
+#
+# 17.10.2026
+#
+# Christian Rieke
+#
+#-----------------------------------------------------------------------------
+
+
+# On a torus the Moore neighbourhood of a cell never changes, so it is
+# computed once for all cells: as lists of positions (same order as mesa's
+# get_neighborhood, which keeps random choices identical) and as a flat
+# cell index table for array code (cell = x * height + y). The cell lists
+# of the grid double as occupancy index: every agent knows its slot in its
+# cell, so moving an agent is O(1) (swap with the last agent) and
+# cell_contents returns the cell list itself instead of a new list.
+import numpy as np
+from mesa.space import MultiGrid
+
+
+class TorusGrid(MultiGrid):
+    """Toroidal MultiGrid with neighbourhood tables and O(1) moves."""
+    def __init__(self, width, height):
+        super().__init__(width, height, True)
+        self._slot = {}                 # agent -> index in its cell list
+        # Moore neighbourhood (radius 1, without center) of every cell
+        self._moore = [[super(TorusGrid, self).get_neighborhood((x, y), True, False)
+                        for y in range(height)] for x in range(width)]
+        self.neighbor_count = np.array([len(self._moore[x][y]) for x in range(width) for y in range(height)])
+        self.neighbors = np.full((width * height, 8), -1, dtype=np.int64)
+        for x in range(width):
+            for y in range(height):
+                cells = [nx * height + ny for nx, ny in self._moore[x][y]]
+                self.neighbors[x * height + y, :len(cells)] = cells
+
+    def get_neighborhood(self, pos, moore, include_center=False, radius=1):
+        '''Precomputed list for the Moore neighbourhood, mesa otherwise (do not modify the list).'''
+        if moore and not include_center and radius == 1:
+            x, y = pos
+            return self._moore[x][y]
+        return super().get_neighborhood(pos, moore, include_center, radius)
+
+    def cell_contents(self, pos):
+        '''Agents in a cell, the occupancy list itself (do not modify).'''
+        x, y = pos
+        return self.grid[x][y]
+
+    def occupancy(self):
+        '''Number of agents per cell as (width, height) array.'''
+        return np.array([[len(cell) for cell in column] for column in self.grid])
+
+    def cell_order(self, agents):
+        '''Flat cell of every agent and the agent indices in occupancy order (for set_positions).'''
+        index = {agent: i for i, agent in enumerate(agents)}
+        cells = np.array([agent.pos[0] * self.height + agent.pos[1] for agent in agents], dtype=np.int64)
+        order = np.fromiter((index[agent] for column in self.grid for cell in column for agent in cell),
+                            dtype=np.int64, count=len(index))
+        return cells, order
+
+    def set_positions(self, agents, cells, order=None):
+        '''Place all agents at once (cell = x * height + y), e.g. to restore a checkpoint.
+
+        order: agent indices in occupancy order (from cell_order), keeps the
+        order of the agents within each cell and thereby random choices.
+        '''
+        for column in self.grid:
+            for cell in column:
+                cell.clear()
+        self._slot.clear()
+        self.empties = set((x, y) for x in range(self.width) for y in range(self.height))
+        for i in (range(len(agents)) if order is None else order):
+            agent = agents[i]
+            x, y = divmod(int(cells[i]), self.height)
+            agent.pos = (x, y)
+            self._place_agent((x, y), agent)
+
+    def _place_agent(self, pos, agent):
+        x, y = pos
+        cell = self.grid[x][y]
+        if agent in self._slot:
+            i = self._slot[agent]
+            if i < len(cell) and cell[i] is agent:
+                return
+            raise ValueError('Agent is already placed in another cell')
+        self._slot[agent] = len(cell)
+        cell.append(agent)
+        if len(cell) == 1:
+            self.empties.discard(pos)
+
+    def _remove_agent(self, pos, agent):
+        x, y = pos
+        cell = self.grid[x][y]
+        i = self._slot.pop(agent)
+        last = cell.pop()
+        if last is not agent:
+            cell[i] = last
+            self._slot[last] = i
+        if len(cell) == 0:
+            self.empties.add(pos)